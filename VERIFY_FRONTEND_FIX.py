@@ -1,121 +1,122 @@
-import subprocess
-import time
-import json
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.output import Output
+from lingua_ops.snapshot import format_services, record_dict, take_snapshot
 
-def run_command(command):
-    """Run a command and return the result"""
-    try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        return result.returncode, result.stdout, result.stderr
-    except Exception as e:
-        return -1, "", str(e)
+# python VERIFY_FRONTEND_FIX.py --json-lines  (or LINGUA_OUTPUT=jsonl) writes one JSON object per step
 
-def check_pod_status():
+def check_pod_status(step, snapshot):
     """Check the status of the frontend pod"""
-    code, stdout, stderr = run_command("kubectl get pods -n lingua-app -l app=lingua-frontend -o json")
-    
-    if code != 0:
-        print(f"Error getting pod status: {stderr}")
+    if "pods" in snapshot.errors:
+        step.print(f"Error getting pod status: {snapshot.errors['pods']}")
         return None
     
-    try:
-        pod_info = json.loads(stdout)
-        if pod_info.get("items"):
-            return pod_info["items"][0]
-        return None
-    except json.JSONDecodeError:
-        print("Error parsing pod information")
-        return None
+    pods = snapshot.pods_for("lingua-frontend")
+    if pods:
+        return pods[0]
+    return None
 
-def get_pod_logs(pod_name):
+def get_pod_logs(cluster, pod_name):
     """Get logs from the pod"""
-    code, stdout, stderr = run_command(f"kubectl logs {pod_name} -n lingua-app")
-    if code == 0:
-        return stdout
-    return stderr
+    try:
+        return cluster.pod_log(pod_name)
+    except ClusterError as e:
+        return str(e)
 
 def main():
-    print("=" * 50)
-    print("Lingua Phone Frontend Fix Verification")
-    print("=" * 50)
-    print()
+    out = Output("VERIFY_FRONTEND_FIX")
+    out.print("=" * 50)
+    out.print("Lingua Phone Frontend Fix Verification")
+    out.print("=" * 50)
+    out.print()
     
     # Get cluster credentials
-    print("1. Getting cluster credentials...")
-    code, stdout, stderr = run_command("gcloud container clusters get-credentials lingua-cluster --zone=us-central1-a")
-    if code != 0:
-        print(f"   Warning: Could not get cluster credentials: {stderr}")
-    else:
-        print("   ✓ Cluster credentials obtained")
-    
-    print()
-    print("2. Checking frontend pod status...")
-    pod = check_pod_status()
+    with out.step("credentials", "1. Getting cluster credentials...") as step:
+        try:
+            cluster = connect()
+            step.print("   ✓ Cluster credentials obtained")
+        except ClusterError as e:
+            step.fail(f"   ✗ Could not get cluster credentials: {e}")
+    if step.status == "error":
+        out.finish(verdict="error")
+        return
     
+    out.print()
+    with out.step("pod", "2. Checking frontend pod status...") as step:
+        snapshot = take_snapshot(cluster, ("pods", "services"))
+        pod = check_pod_status(step, snapshot)
+        
+        if not pod:
+            step.fail("   ✗ Could not get pod information")
+        else:
+            step.data.update(record_dict(pod))
+            pod_name = pod.name
+            pod_status = pod.phase
+            
+            step.print(f"   Pod Name: {pod_name}")
+            step.print(f"   Status: {pod_status}")
+            
+            # Check container status in detail
+            if pod.containers:
+                container = pod.containers[0]
+                if container.state == "running":
+                    step.print("   ✓ Container is running")
+                elif container.state == "waiting":
+                    step.print(f"   ⚠ Container is waiting: {container.reason or 'Unknown'}")
+                    if container.message:
+                        step.print(f"     Message: {container.message}")
+                elif container.state == "terminated":
+                    step.print(f"   ✗ Container is terminated: {container.reason or 'Unknown'}")
+            
+            # Check restart count
+            restart_count = pod.restarts
+            step.print(f"   Restart Count: {restart_count}")
+            
+            if restart_count > 10:
+                step.warn("   ⚠ High restart count - pod may be unstable")
     if not pod:
-        print("   ✗ Could not get pod information")
+        out.finish(verdict="error")
         return
     
-    pod_name = pod["metadata"]["name"]
-    pod_status = pod["status"]["phase"]
-    container_statuses = pod["status"].get("containerStatuses", [])
-    
-    print(f"   Pod Name: {pod_name}")
-    print(f"   Status: {pod_status}")
-    
-    # Check container status in detail
-    if container_statuses:
-        container_state = container_statuses[0].get("state", {})
-        if "running" in container_state:
-            print("   ✓ Container is running")
-        elif "waiting" in container_state:
-            reason = container_state["waiting"].get("reason", "Unknown")
-            message = container_state["waiting"].get("message", "")
-            print(f"   ⚠ Container is waiting: {reason}")
-            if message:
-                print(f"     Message: {message}")
-        elif "terminated" in container_state:
-            reason = container_state["terminated"].get("reason", "Unknown")
-            print(f"   ✗ Container is terminated: {reason}")
-    
-    # Check restart count
-    restart_count = container_statuses[0].get("restartCount", 0) if container_statuses else 0
-    print(f"   Restart Count: {restart_count}")
-    
-    if restart_count > 10:
-        print("   ⚠ High restart count - pod may be unstable")
-    
-    print()
-    print("3. Checking services...")
-    code, stdout, stderr = run_command("kubectl get services -n lingua-app")
-    if code == 0:
-        print("   Services:")
-        print(stdout)
-    else:
-        print(f"   Error getting services: {stderr}")
-    
-    print()
-    print("4. Summary:")
-    print("-" * 30)
+    out.print()
+    with out.step("services", "3. Checking services...") as step:
+        if "services" in snapshot.errors:
+            step.fail(f"   Error getting services: {snapshot.errors['services']}")
+        else:
+            step.data["services"] = [record_dict(service) for service in snapshot.services]
+            step.print("   Services:")
+            step.print("\n".join(format_services(snapshot.services)))
     
-    if pod_status == "Running":
-        print("✅ SUCCESS: Frontend pod is running!")
-        print("   Your application should now be accessible at http://34.45.239.154")
-    elif pod_status == "Pending":
-        print("⚠ WARNING: Frontend pod is pending")
-        print("   This may be temporary while the pod is starting")
-    elif pod_status in ["Failed", "Unknown"]:
-        print("❌ ERROR: Frontend pod is in an error state")
-        print("   Please check the detailed diagnostics")
-    else:
-        print(f"ℹ INFO: Frontend pod is in {pod_status} state")
-        print("   This may be a transitional state")
+    out.print()
+    with out.step("summary", "4. Summary:\n" + "-" * 30) as step:
+        if pod_status == "Running" and pod.ready_count == len(pod.containers):
+            verdict = "success"
+            step.print("✅ SUCCESS: Frontend pod is running!")
+            step.print("   Your application should now be accessible at http://34.45.239.154")
+        elif pod_status == "Running":
+            # A crash-looping pod keeps the Running phase between restarts
+            verdict = "error"
+            step.fail(f"❌ ERROR: Frontend pod is running but not ready ({pod.status})")
+            step.print("   Please check the detailed diagnostics")
+        elif pod_status == "Pending":
+            verdict = "warning"
+            step.warn("⚠ WARNING: Frontend pod is pending")
+            step.print("   This may be temporary while the pod is starting")
+        elif pod_status in ["Failed", "Unknown"]:
+            verdict = "error"
+            step.fail("❌ ERROR: Frontend pod is in an error state")
+            step.print("   Please check the detailed diagnostics")
+        else:
+            verdict = "info"
+            step.warn(f"ℹ INFO: Frontend pod is in {pod_status} state")
+            step.print("   This may be a transitional state")
+        step.data["verdict"] = verdict
     
-    print()
-    print("Next steps:")
-    print("1. Wait a few minutes and run this script again")
-    print("2. If issues persist, run: diagnose-frontend-crash.bat")
-    print("3. Check your application at: http://34.45.239.154")
+    out.print()
+    out.print("Next steps:")
+    out.print("1. Wait a few minutes and run this script again")
+    out.print("2. If issues persist, run: diagnose-frontend-crash.bat")
+    out.print("3. Check your application at: http://34.45.239.154")
+    out.finish(verdict=verdict)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
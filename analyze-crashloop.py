@@ -0,0 +1,9 @@
+import sys
+
+from lingua_ops.crashloop import main
+
+# Explain crash-looping pods from their events and previous logs, e.g.
+#   python analyze-crashloop.py --app lingua-frontend
+#   python analyze-crashloop.py --json-lines
+if __name__ == "__main__":
+    sys.exit(main())
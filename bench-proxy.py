@@ -0,0 +1,10 @@
+import sys
+
+from lingua_ops.bench_proxy import main
+
+# Measure what the nginx /api/ proxy adds per request, e.g.
+#   python bench-proxy.py --direct http://localhost:3002 --proxy http://localhost:8080
+#   python bench-proxy.py --variants baseline,keepalive,keepalive+buffers,gzip-off --docker
+#   python bench-proxy.py --variants all --write-configs /tmp/nginx-variants
+if __name__ == "__main__":
+    sys.exit(main())
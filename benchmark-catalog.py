@@ -0,0 +1,9 @@
+import sys
+
+from lingua_ops.bench_catalog import main
+
+# Load /api/search, /api/products/:id and /api/cart/add with Zipfian product popularity, e.g.
+#   python benchmark-catalog.py --browsers 50 --buyers 20 --duration 60
+#   python benchmark-catalog.py --classes product_localized=3,search_native --seed 7 --output catalog.json
+if __name__ == "__main__":
+    sys.exit(main())
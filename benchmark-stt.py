@@ -0,0 +1,9 @@
+import sys
+
+from lingua_ops.bench_stt import main
+
+# Stream audio uploads to /api/speech-to-text and split upload from processing time, e.g.
+#   python benchmark-stt.py --durations 2,10,30 --concurrency 1,8
+#   python benchmark-stt.py --file recording.webm --requests 20 --output stt-bench.json
+if __name__ == "__main__":
+    sys.exit(main())
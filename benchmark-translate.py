@@ -0,0 +1,9 @@
+import sys
+
+from lingua_ops.bench_translate import main
+
+# Sweep /api/translate across language pairs, text lengths and concurrency levels, e.g.
+#   python benchmark-translate.py --output translate-bench.json
+#   python benchmark-translate.py --compare translate-bench.json --pairs en-hi,bn-en
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,49 +1,57 @@
-import subprocess
-import json
-
-def run_kubectl_command(command):
-    """Run a kubectl command and return the output"""
-    try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
-            return result.stdout
-        else:
-            return f"Error: {result.stderr}"
-    except Exception as e:
-        return f"Exception: {str(e)}"
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.output import Output
+from lingua_ops.snapshot import format_pod_details, format_snapshot, record_dict, take_snapshot
+
+# python check-cluster-info.py --json-lines  (or LINGUA_OUTPUT=jsonl) writes one JSON object per step
 
 def main():
-    print("Checking Kubernetes cluster information...")
-    print("=" * 50)
-
-    # Get pod information
-    print("1. Pod Information:")
-    pod_info = run_kubectl_command("kubectl get pods -n lingua-app -o wide")
-    print(pod_info)
-    print()
-
-    # Get pod description
-    print("2. Frontend Pod Description:")
-    pod_description = run_kubectl_command("kubectl describe pod lingua-frontend-578867dfc7-f57xf -n lingua-app")
-    print(pod_description)
-    print()
-
-    # Get pod logs
-    print("3. Frontend Pod Logs:")
-    pod_logs = run_kubectl_command("kubectl logs lingua-frontend-578867dfc7-f57xf -n lingua-app")
-    print(pod_logs)
-    print()
-
-    # Get service information
-    print("4. Service Information:")
-    service_info = run_kubectl_command("kubectl get services -n lingua-app")
-    print(service_info)
-    print()
-
-    # Get events
-    print("5. Events:")
-    events = run_kubectl_command("kubectl get events -n lingua-app")
-    print(events)
+    out = Output("check-cluster-info")
+    out.print("Checking Kubernetes cluster information...")
+    out.print("=" * 50)
+
+    with out.step("credentials") as step:
+        try:
+            cluster = connect()
+        except ClusterError as e:
+            step.fail(f"Error: {e}")
+    if step.status == "error":
+        out.finish()
+        return
+
+    # Pods, services, deployments, autoscalers and events
+    with out.step("resources", "1. Cluster Resources:") as step:
+        snapshot = take_snapshot(cluster)
+        step.data.update(snapshot.to_dict())
+        if snapshot.errors:
+            step.warn(f"Could not fetch {', '.join(snapshot.errors)}")
+        step.print("\n".join(format_snapshot(snapshot)))
+        step.print()
+
+    frontend_pods = snapshot.pods_for("lingua-frontend")
+    if not frontend_pods:
+        with out.step("frontend_pods") as step:
+            step.fail("No frontend pods found")
+        out.finish()
+        return
+
+    # Describe every frontend pod rather than one hard-coded name
+    with out.step("frontend_pods", "2. Frontend Pod Description:") as step:
+        for pod in frontend_pods:
+            events = snapshot.events_for(pod.name)
+            step.data[pod.name] = dict(record_dict(pod), events=[record_dict(event) for event in events])
+            step.print("\n".join(format_pod_details(pod, events)))
+            step.print()
+
+    with out.step("frontend_logs", "3. Frontend Pod Logs:") as step:
+        for pod in frontend_pods:
+            step.print(f"--- {pod.name} ---")
+            try:
+                step.data[pod.name] = cluster.pod_log(pod.name)
+                step.print(step.data[pod.name])
+            except ClusterError as e:
+                step.warn(f"Error: {e}")
+            step.print()
+    out.finish()
 
 if __name__ == "__main__":
     main()
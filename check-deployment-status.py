@@ -1,50 +1,49 @@
-import subprocess
 import sys
 
-def run_command(command):
-    """Run a command and return the output"""
-    try:
-        print(f"Running command: {command}")
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        print(f"STDOUT: {result.stdout}")
-        if result.stderr:
-            print(f"STDERR: {result.stderr}")
-        print(f"Return code: {result.returncode}")
-        return result.stdout, result.stderr, result.returncode
-    except Exception as e:
-        print(f"Exception occurred: {str(e)}")
-        return "", str(e), 1
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.output import Output
+from lingua_ops.snapshot import format_pods, format_services, record_dict, take_snapshot
+
+# python check-deployment-status.py --json-lines  (or LINGUA_OUTPUT=jsonl) writes one JSON object per step
 
 def main():
-    print("Checking deployment status...")
-    print("=" * 50)
-    
-    # Get cluster credentials
-    print("1. Getting cluster credentials...")
-    stdout, stderr, returncode = run_command("gcloud container clusters get-credentials lingua-cluster --zone=us-central1-a")
-    if returncode != 0:
-        print("Failed to get cluster credentials.")
+    out = Output("check-deployment-status")
+    out.print("Checking deployment status...")
+    out.print("=" * 50)
+
+    # Get cluster credentials (cached until the access token expires)
+    with out.step("credentials", "1. Getting cluster credentials...") as step:
+        try:
+            cluster = connect()
+        except ClusterError as e:
+            step.fail(f"Failed to get cluster credentials: {e}")
+    if step.status == "error":
+        out.finish()
         sys.exit(1)
-    
+
+    with out.step("snapshot") as step:
+        snapshot = take_snapshot(cluster, ("pods", "services"))
+        step.data["elapsed_ms"] = round(snapshot.elapsed * 1000, 1)
+
     # Check pod status
-    print("\n2. Checking pod status...")
-    stdout, stderr, returncode = run_command("kubectl get pods -n lingua-app")
-    if returncode == 0:
-        print("Pods in lingua-app namespace:")
-        print(stdout)
-    else:
-        print("Error getting pod status:")
-        print(stderr)
-    
+    with out.step("pods", "\n2. Checking pod status...") as step:
+        if "pods" in snapshot.errors:
+            step.fail(f"Error getting pod status:\n{snapshot.errors['pods']}")
+        else:
+            step.data["pods"] = [record_dict(pod) for pod in snapshot.pods]
+            step.print("Pods in lingua-app namespace:")
+            step.print("\n".join(format_pods(snapshot.pods)))
+
     # Check services
-    print("\n3. Checking services...")
-    stdout, stderr, returncode = run_command("kubectl get services -n lingua-app")
-    if returncode == 0:
-        print("Services in lingua-app namespace:")
-        print(stdout)
-    else:
-        print("Error getting services:")
-        print(stderr)
+    with out.step("services", "\n3. Checking services...") as step:
+        if "services" in snapshot.errors:
+            step.fail(f"Error getting services:\n{snapshot.errors['services']}")
+        else:
+            step.data["services"] = [record_dict(service) for service in snapshot.services]
+            step.print("Services in lingua-app namespace:")
+            step.print("\n".join(format_services(snapshot.services)))
+
+    out.finish()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,57 +1,61 @@
-import subprocess
-import time
-
-def check_frontend_status():
-    try:
-        # Get pod status
-        result = subprocess.run([
-            "kubectl", "get", "pods", "-n", "lingua-app", "-l", "app=lingua-frontend", "-o", "jsonpath={.items[*].status.phase}"
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            status = result.stdout.strip()
-            print(f"Frontend pod status: {status}")
-            
-            if status == "Running":
-                print("✅ Frontend is running successfully!")
-                return True
-            elif status == "CrashLoopBackOff":
-                print("❌ Frontend is still crashing!")
-                return False
-            else:
-                print(f"⚠️  Frontend is in {status} state")
-                return False
-        else:
-            print(f"Error getting pod status: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"Error checking frontend status: {e}")
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.output import Output
+from lingua_ops.snapshot import format_pod_details, record_dict, take_snapshot
+
+# python check-frontend-status.py --json-lines  (or LINGUA_OUTPUT=jsonl) writes one JSON object per step
+
+def check_frontend_status(step, snapshot):
+    if "pods" in snapshot.errors:
+        step.fail(f"Error getting pod status: {snapshot.errors['pods']}")
+        return False
+
+    pods = snapshot.pods_for("lingua-frontend")
+    status = " ".join(pod.status for pod in pods)
+    step.data["pods"] = [record_dict(pod) for pod in pods]
+    step.print(f"Frontend pod status: {status}")
+
+    if pods and all(pod.phase == "Running" and pod.ready_count == len(pod.containers) for pod in pods):
+        step.print("✅ Frontend is running successfully!")
+        return True
+    elif "CrashLoopBackOff" in status:
+        step.fail("❌ Frontend is still crashing!")
+        return False
+    else:
+        step.warn(f"⚠️  Frontend is in {status or 'no pods'} state")
         return False
 
 def main():
-    print("Checking frontend pod status...")
-    print("=" * 40)
-    
+    out = Output("check-frontend-status")
+    out.print("Checking frontend pod status...")
+    out.print("=" * 40)
+
+    with out.step("credentials") as step:
+        try:
+            cluster = connect()
+        except ClusterError as e:
+            step.fail(f"Error checking frontend status: {e}")
+    if step.status == "error":
+        out.finish(running=False)
+        return False
+
     # Check status
-    is_running = check_frontend_status()
-    
+    with out.step("status") as step:
+        snapshot = take_snapshot(cluster, ("pods", "events"))
+        is_running = check_frontend_status(step, snapshot)
+
     if not is_running:
-        print("\nChecking pod details...")
-        print("-" * 40)
-        # Get detailed pod information
-        try:
-            result = subprocess.run([
-                "kubectl", "describe", "pod", "-n", "lingua-app", "-l", "app=lingua-frontend"
-            ], capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                # Extract just the last 20 lines for brevity
-                lines = result.stdout.split('\n')
-                print("\n".join(lines[-20:]))
-            else:
-                print(f"Error getting pod details: {result.stderr}")
-        except Exception as e:
-            print(f"Error getting pod details: {e}")
+        # Show the end of the pod details, where the container state and events are
+        with out.step("details", "\nChecking pod details...\n" + "-" * 40) as step:
+            step.data["events"] = {}
+            for pod in snapshot.pods_for("lingua-frontend"):
+                events = snapshot.events_for(pod.name)
+                step.data["events"][pod.name] = [record_dict(event) for event in events]
+                step.print("\n".join(format_pod_details(pod, events)[-20:]))
+            if "events" in snapshot.errors:
+                step.warn(f"Error getting pod events: {snapshot.errors['events']}")
+
+    out.finish(running=is_running)
+    return is_running
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,41 +1,45 @@
-import subprocess
-import sys
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.output import Output
+from lingua_ops.snapshot import format_pods, format_services, record_dict, take_snapshot
 
-def run_command(command):
-    """Run a command and return the output"""
-    try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        return result.stdout, result.stderr, result.returncode
-    except Exception as e:
-        return "", str(e), 1
+# python check-pod-status.py --json-lines  (or LINGUA_OUTPUT=jsonl) writes one JSON object per step
 
 def main():
-    print("Checking pod status in lingua-app namespace...")
-    print("=" * 50)
-    
-    # Get pods in lingua-app namespace
-    stdout, stderr, returncode = run_command("kubectl get pods -n lingua-app")
-    
-    if returncode == 0:
-        print("Pods in lingua-app namespace:")
-        print(stdout)
-    else:
-        print("Error getting pod status:")
-        print(stderr)
-        print("Return code:", returncode)
-    
-    print("\n" + "=" * 50)
-    
-    # Get services in lingua-app namespace
-    stdout, stderr, returncode = run_command("kubectl get services -n lingua-app")
-    
-    if returncode == 0:
-        print("Services in lingua-app namespace:")
-        print(stdout)
-    else:
-        print("Error getting service status:")
-        print(stderr)
-        print("Return code:", returncode)
+    out = Output("check-pod-status")
+    out.print("Checking pod status in lingua-app namespace...")
+    out.print("=" * 50)
+
+    # Fetch pods and services together in one snapshot
+    with out.step("snapshot") as step:
+        try:
+            snapshot = take_snapshot(connect(), ("pods", "services"))
+        except ClusterError as e:
+            step.fail(f"Error connecting to the cluster:\n{e}")
+    if step.status == "error":
+        out.finish()
+        return
+
+    with out.step("pods") as step:
+        if "pods" in snapshot.errors:
+            step.fail(f"Error getting pod status:\n{snapshot.errors['pods']}")
+        else:
+            step.data["pods"] = [record_dict(pod) for pod in snapshot.pods]
+            step.print("Pods in lingua-app namespace:")
+            step.print("\n".join(format_pods(snapshot.pods)))
+    if step.status == "error":
+        out.finish()
+        return
+
+    out.print("\n" + "=" * 50)
+
+    with out.step("services") as step:
+        if "services" in snapshot.errors:
+            step.fail(f"Error getting service status:\n{snapshot.errors['services']}")
+        else:
+            step.data["services"] = [record_dict(service) for service in snapshot.services]
+            step.print("Services in lingua-app namespace:")
+            step.print("\n".join(format_services(snapshot.services)))
+    out.finish()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
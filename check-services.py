@@ -1,52 +1,47 @@
-import subprocess
 import sys
 
-def run_command(command):
-    """Run a command and return the output"""
-    try:
-        print(f"Running command: {command}")
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        print(f"STDOUT: {result.stdout}")
-        if result.stderr:
-            print(f"STDERR: {result.stderr}")
-        print(f"Return code: {result.returncode}")
-        return result.stdout, result.stderr, result.returncode
-    except Exception as e:
-        print(f"Exception occurred: {str(e)}")
-        return "", str(e), 1
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.output import Output
+from lingua_ops.snapshot import format_snapshot, take_snapshot
+
+# python check-services.py --json-lines  (or LINGUA_OUTPUT=jsonl) writes one JSON object per step
 
 def main():
-    print("Checking services in lingua-app namespace...")
-    print("=" * 50)
-    
-    # Get cluster credentials
-    print("1. Getting cluster credentials...")
-    stdout, stderr, returncode = run_command("gcloud container clusters get-credentials lingua-cluster --zone=us-central1-a")
-    if returncode != 0:
-        print("Failed to get cluster credentials.")
-        sys.exit(1)
-    
-    # Get services
-    print("\n2. Getting services...")
-    stdout, stderr, returncode = run_command("kubectl get services -n lingua-app")
-    if returncode != 0:
-        print("Failed to get services.")
-        print(f"Error: {stderr}")
+    out = Output("check-services")
+    out.print("Checking services in lingua-app namespace...")
+    out.print("=" * 50)
+
+    # Get cluster credentials (cached until the access token expires)
+    with out.step("credentials", "1. Getting cluster credentials...") as step:
+        try:
+            cluster = connect()
+        except ClusterError as e:
+            step.fail(f"Failed to get cluster credentials: {e}")
+    if step.status == "error":
+        out.finish()
         sys.exit(1)
-    
-    print("\nServices in lingua-app namespace:")
-    print(stdout)
-    
-    # Get all resources
-    print("\n3. Getting all resources...")
-    stdout, stderr, returncode = run_command("kubectl get all -n lingua-app")
-    if returncode != 0:
-        print("Failed to get all resources.")
-        print(f"Error: {stderr}")
+
+    # Fetch every resource in one snapshot
+    with out.step("resources", "\n2. Getting all resources...") as step:
+        snapshot = take_snapshot(cluster)
+        step.data.update(snapshot.to_dict())
+        if "services" in snapshot.errors:
+            step.fail(f"Failed to get services.\nError: {snapshot.errors['services']}")
+        else:
+            step.print("\nAll resources in lingua-app namespace:")
+            step.print("\n".join(format_snapshot(snapshot)))
+    if step.status == "error":
+        out.finish()
         sys.exit(1)
-    
-    print("\nAll resources in lingua-app namespace:")
-    print(stdout)
+
+    # Flag services whose selector matches no pods
+    with out.step("endpoints") as step:
+        step.data["unmatched"] = []
+        for service in snapshot.services:
+            if service.selector and not snapshot.endpoints_for(service):
+                step.data["unmatched"].append(service.name)
+                step.warn(f"Warning: service/{service.name} selects no pods ({service.selector})")
+    out.finish()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,64 +1,82 @@
-import subprocess
+import base64
 import sys
 
-def run_command(command):
-    """Run a command and return the result"""
-    print(f"Running: {command}")
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.images import build_changed, report_pipeline
+from lingua_ops.manifests import ManifestError, apply_kustomization
+from lingua_ops.rollout import wait_for_rollouts
+
+def create_secret(client, path="packages/backend/keys/service-account.json"):
+    """Create (or update) the google-cloud-key secret from the service account key file"""
+    with open(path, "rb") as f:
+        key = base64.b64encode(f.read()).decode("ascii")
+    body = {"metadata": {"name": "google-cloud-key"}, "type": "Opaque", "data": {"key.json": key}}
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-        print(result.stdout)
-        return result.returncode == 0
-    except subprocess.CalledProcessError as e:
-        print(f"Error: {e}")
-        print(f"stderr: {e.stderr}")
-        return False
+        client.create("secrets", body)
+    except ClusterError as e:
+        if e.status_code != 409:
+            raise
+        client.replace("secrets", "google-cloud-key", body)
 
 def main():
     print("Deploying Lingua Phone application to GKE...")
 
     # Step 1: Check if namespace exists, create if not
     print("\n1. Checking if namespace lingua-app exists...")
-    if not run_command("kubectl get namespace lingua-app"):
-        print("   Creating namespace lingua-app...")
-        if not run_command("kubectl create namespace lingua-app"):
-            print("   Failed to create namespace")
-            return 1
-        else:
+    client = connect()
+    try:
+        if not client.namespace_exists():
+            print("   Creating namespace lingua-app...")
+            client.create("namespaces", {"metadata": {"name": client.namespace}})
             print("   Namespace lingua-app created successfully")
-    else:
-        print("   Namespace lingua-app already exists")
+        else:
+            print("   Namespace lingua-app already exists")
+    except ClusterError as e:
+        print(f"   Failed to create namespace: {e}")
+        return 1
 
     # Step 2: Create secret for Google Cloud credentials
     print("\n2. Creating secret for Google Cloud credentials...")
-    if not run_command("kubectl create secret generic google-cloud-key --from-file=key.json=packages/backend/keys/service-account.json --namespace=lingua-app"):
-        print("   Failed to create secret")
-        return 1
-    else:
+    try:
+        create_secret(client)
         print("   Secret google-cloud-key created successfully")
+    except (OSError, ClusterError) as e:
+        print(f"   Failed to create secret: {e}")
+        return 1
 
-    # Step 3: Build Docker images
+    # Step 3: Build and push Docker images (unchanged images are skipped, the rest build concurrently)
     print("\n3. Building Docker images...")
-    print("   Building backend image...")
-    if not run_command("docker build -t lingua-backend:latest -f docker/backend.Dockerfile ."):
-        print("   Failed to build backend image")
-        return 1
+    images = []
+    if "--skip-build" in sys.argv:
+        print("   Skipped (--skip-build)")
     else:
-        print("   Backend image built successfully")
+        result = build_changed()
+        report_pipeline(result)
+        if not result.ok:
+            print("   Failed to build Docker images")
+            return 1
+        images = result.images
 
-    print("   Building frontend image...")
-    if not run_command("docker build -t lingua-frontend:latest -f docker/frontend.Dockerfile ."):
-        print("   Failed to build frontend image")
+    # Step 4: Deploy application to GKE, with the deployments pinned to the images just pushed
+    print("\n4. Deploying application to GKE...")
+    try:
+        apply_kustomization(client, "k8s", images)
+        print("   Application deployed successfully")
+    except (OSError, ManifestError, ClusterError) as e:
+        print(f"   Failed to deploy application: {e}")
         return 1
-    else:
-        print("   Frontend image built successfully")
 
-    # Step 4: Deploy application to GKE
-    print("\n4. Deploying application to GKE...")
-    if not run_command("kubectl apply -k k8s/"):
-        print("   Failed to deploy application")
+    # Step 5: Wait for the rollout
+    print("\n5. Waiting for deployments to be ready...")
+    try:
+        rollout = wait_for_rollouts(client)
+        print("\n".join(rollout.format()))
+        if not rollout.ok:
+            print("   Deployments are not ready; check them with python diagnose-frontend.py")
+            return 1
+    except ClusterError as e:
+        print(f"   Error watching rollout: {e}")
         return 1
-    else:
-        print("   Application deployed successfully")
 
     print("\nDeployment completed successfully!")
     print("You can check the status of your deployment with:")
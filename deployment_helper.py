@@ -4,83 +4,112 @@ Deployment helper script for Lingua Phone application
 This script helps check the status of your GKE deployment
 """
 
-import subprocess
 import sys
 import os
 
-def run_command(command, description):
-    """Run a command and return the result"""
-    print(f"\n{description}")
-    print(f"Running: {command}")
-    print("-" * 50)
-    
-    try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
-            print("SUCCESS:")
-            print(result.stdout)
+from lingua_ops import shell
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.output import Output, json_lines_requested
+from lingua_ops.snapshot import format_pods, format_services, record_dict, take_snapshot
+
+def run_command(out, name, command, description):
+    """Run a command as one output step and return whether it succeeded"""
+    with out.step(name, f"\n{description}") as step:
+        step.print(f"Running: {command}")
+        step.print("-" * 50)
+        
+        stdout, stderr, returncode = shell.run_command(command, verbose=False)
+        step.data.update(command=command, returncode=returncode, stdout=stdout, stderr=stderr)
+        if returncode == 0:
+            step.print("SUCCESS:")
+            step.print(stdout)
         else:
-            print("ERROR:")
-            print(result.stderr)
-        return result.returncode == 0
-    except Exception as e:
-        print(f"Exception occurred: {e}")
-        return False
+            step.fail("ERROR:")
+            step.error = stderr.strip() or f"exit code {returncode}"
+            step.print(stderr)
+    return returncode == 0
+
+def check_directory(out):
+    """Check if we're in the right directory"""
+    with out.step("directory") as step:
+        if not os.path.exists("docker") or not os.path.exists("k8s"):
+            step.fail("ERROR: Please run this script from the Lingua-phone-monorepo directory")
+    return step.status != "error"
 
 def check_deployment_status():
     """Check the current deployment status"""
-    print("=" * 60)
-    print("Lingua Phone - Deployment Status Checker")
-    print("=" * 60)
-    
-    # Check if we're in the right directory
-    if not os.path.exists("docker") or not os.path.exists("k8s"):
-        print("ERROR: Please run this script from the Lingua-phone-monorepo directory")
-        return
+    out = Output("deployment-helper")
+    out.print("=" * 60)
+    out.print("Lingua Phone - Deployment Status Checker")
+    out.print("=" * 60)
     
-    # Check Google Cloud authentication
-    if not run_command("gcloud auth list", "Checking Google Cloud authentication"):
-        print("Please authenticate with: gcloud auth login")
-        return
+    if not check_directory(out):
+        return out.finish()
     
-    # Get cluster credentials
-    run_command("gcloud container clusters get-credentials lingua-cluster --zone=us-central1-a", 
-                "Getting cluster credentials")
+    # Get cluster credentials (cached until the access token expires)
+    with out.step("credentials", "\nGetting cluster credentials") as step:
+        try:
+            cluster = connect()
+        except ClusterError as e:
+            step.fail(f"ERROR: {e}")
+            step.print("Please authenticate with: gcloud auth login")
+    if step.status == "error":
+        return out.finish()
     
-    # Check pod status
-    run_command("kubectl get pods -n lingua-app", "Checking pod status")
+    # Check pod and service status from one snapshot of the Kubernetes API
+    snapshot = take_snapshot(cluster, ("pods", "services"))
+    for description, kind, render in (
+        ("Checking pod status", "pods", format_pods),
+        ("Checking service status", "services", format_services),
+    ):
+        with out.step(kind, f"\n{description}") as step:
+            step.print("-" * 50)
+            if kind in snapshot.errors:
+                step.fail("ERROR:")
+                step.error = snapshot.errors[kind]
+                step.print(snapshot.errors[kind])
+            else:
+                step.data[kind] = [record_dict(item) for item in getattr(snapshot, kind)]
+                step.print("\n".join(render(getattr(snapshot, kind))))
     
-    # Check service status
-    run_command("kubectl get services -n lingua-app", "Checking service status")
-    
-    print("\n" + "=" * 60)
-    print("Status check completed!")
-    print("=" * 60)
+    out.print("\n" + "=" * 60)
+    out.print("Status check completed!")
+    out.print("=" * 60)
+    return out.finish(snapshot_ms=round(snapshot.elapsed * 1000, 1))
 
 def deploy_application():
     """Deploy the application using the Miniconda version"""
-    print("=" * 60)
-    print("Lingua Phone - Deployment Script (Miniconda Version)")
-    print("=" * 60)
+    out = Output("deployment-helper")
+    out.print("=" * 60)
+    out.print("Lingua Phone - Deployment Script (Miniconda Version)")
+    out.print("=" * 60)
     
-    # Check if we're in the right directory
-    if not os.path.exists("docker") or not os.path.exists("k8s"):
-        print("ERROR: Please run this script from the Lingua-phone-monorepo directory")
-        return
+    if not check_directory(out):
+        return out.finish()
     
     # Run the Miniconda deployment batch file
-    run_command("complete-deployment-miniconda.bat", "Running Miniconda deployment script")
+    run_command(out, "deploy", "complete-deployment-miniconda.bat", "Running Miniconda deployment script")
+    return out.finish()
 
 if __name__ == "__main__":
-    print("Lingua Phone Deployment Helper")
-    print("1. Check deployment status")
-    print("2. Deploy application (using Miniconda)")
-    
-    choice = input("\nEnter your choice (1 or 2): ").strip()
+    # "status" or "deploy" on the command line skips the menu; with --json-lines
+    # (or LINGUA_OUTPUT=jsonl) the menu is skipped too and the status check runs
+    commands = {"1": check_deployment_status, "status": check_deployment_status,
+                "2": deploy_application, "deploy": deploy_application}
+    args = [arg for arg in sys.argv[1:] if arg != "--json-lines"]
+    if args:
+        choice = args[0]
+    elif json_lines_requested():
+        choice = "status"
+    else:
+        print("Lingua Phone Deployment Helper")
+        print("1. Check deployment status")
+        print("2. Deploy application (using Miniconda)")
+        
+        choice = input("\nEnter your choice (1 or 2): ").strip()
     
-    if choice == "1":
-        check_deployment_status()
-    elif choice == "2":
-        deploy_application()
+    if choice in commands:
+        sys.exit(1 if commands[choice]() == "error" else 0)
     else:
-        print("Invalid choice. Please run the script again and select 1 or 2.")
\ No newline at end of file
+        print("Invalid choice. Please run the script again and select 1 or 2.")
+        sys.exit(2)
@@ -1,68 +1,128 @@
-import subprocess
-import sys
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.output import Output
+from lingua_ops.snapshot import (
+    format_events,
+    format_pod_details,
+    format_pods,
+    format_services,
+    record_dict,
+    take_snapshot,
+)
 
-def run_command(command):
-    print(f"Running: {command}")
-    print("-" * 50)
-    try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        print("STDOUT:")
-        print(result.stdout)
-        if result.stderr:
-            print("STDERR:")
-            print(result.stderr)
-        print(f"Return code: {result.returncode}")
-    except Exception as e:
-        print(f"Error running command: {e}")
-    print("\n" + "=" * 50 + "\n")
+# python diagnose-frontend.py --json-lines  (or LINGUA_OUTPUT=jsonl) writes one JSON object per section
+
+def section(out, name, title, fetch, error=None):
+    """Print one diagnosis section, reporting API errors instead of aborting
+
+    fetch(data) returns the lines to print and fills data with the same
+    information for JSON-lines output.
+    """
+    with out.step(name, title + "\n" + "-" * 50) as step:
+        try:
+            if error:
+                raise ClusterError(error)
+            for line in fetch(step.data):
+                step.print(line)
+        except ClusterError as e:
+            step.fail(f"Error: {e}")
+        out.print("\n" + "=" * 50 + "\n")
+
+def pod_logs(cluster, pods, previous, data):
+    lines = []
+    for pod in pods:
+        lines.append(f"--- {pod.name} ---")
+        try:
+            log = cluster.pod_log(pod.name, previous=previous, tail_lines=50)
+        except ClusterError as e:
+            log = f"Error: {e}"
+        data[pod.name] = log
+        lines.append(log)
+    return lines
+
+def pod_details(snapshot, pods, data):
+    lines = []
+    for pod in pods:
+        events = snapshot.events_for(pod.name)
+        data[pod.name] = dict(record_dict(pod), events=[record_dict(event) for event in events])
+        lines.extend(format_pod_details(pod, events) + [""])
+    return lines
+
+def service_lines(snapshot, name, data):
+    service = snapshot.service(name)
+    if service is None:
+        raise ClusterError(f"service {name} not found")
+    lines = format_services([service])
+    endpoints = snapshot.endpoints_for(service)
+    data.update(record_dict(service), endpoints=[pod.name for pod in endpoints])
+    lines.append(f"Endpoints: {', '.join(pod.name for pod in endpoints) or '<none>'}")
+    return lines
+
+def records(items, data, key):
+    data[key] = [record_dict(item) for item in items]
+    return items
 
 def main():
-    print("========================================")
-    print("Lingua Phone - Frontend Crash Diagnosis")
-    print("========================================\n")
+    out = Output("diagnose-frontend")
+    out.print("========================================")
+    out.print("Lingua Phone - Frontend Crash Diagnosis")
+    out.print("========================================\n")
     
-    # 1. Get cluster credentials
-    print("1. Getting cluster credentials...")
-    run_command("gcloud container clusters get-credentials lingua-cluster --zone=us-central1-a")
+    # 1. Get cluster credentials (cached until the access token expires)
+    with out.step("credentials", "1. Getting cluster credentials...") as step:
+        try:
+            cluster = connect()
+        except ClusterError as e:
+            step.fail(f"Error: {e}")
+            cluster = None
+        if cluster is not None:
+            snapshot = take_snapshot(cluster, ("pods", "services", "events"))
+            step.data["snapshot_ms"] = round(snapshot.elapsed * 1000, 1)
+    if cluster is None:
+        out.finish()
+        return
+    frontend_pods = snapshot.pods_for("lingua-frontend")
+    out.print()
     
     # 2. Check pod status
-    print("2. Checking current pod status...")
-    run_command("kubectl get pods -n lingua-app")
+    section(out, "pods", "2. Checking current pod status...",
+            lambda data: format_pods(records(snapshot.pods, data, "pods")), snapshot.errors.get("pods"))
     
     # 3. Get detailed pod information
-    print("3. Getting detailed pod information...")
-    run_command("kubectl describe pod -l app=lingua-frontend -n lingua-app")
+    section(out, "pod_details", "3. Getting detailed pod information...",
+            lambda data: pod_details(snapshot, frontend_pods, data), snapshot.errors.get("pods"))
     
     # 4. Check current pod logs
-    print("4. Checking pod logs (current)...")
-    run_command("kubectl logs -l app=lingua-frontend -n lingua-app --tail=50")
+    section(out, "logs", "4. Checking pod logs (current)...",
+            lambda data: pod_logs(cluster, frontend_pods, False, data))
     
     # 5. Check previous pod logs
-    print("5. Checking pod logs (previous)...")
-    run_command("kubectl logs -l app=lingua-frontend -n lingua-app --previous --tail=50")
+    section(out, "previous_logs", "5. Checking pod logs (previous)...",
+            lambda data: pod_logs(cluster, frontend_pods, True, data))
     
     # 6. Check Kubernetes events
-    print("6. Checking Kubernetes events...")
-    run_command("kubectl get events -n lingua-app --sort-by=.lastTimestamp")
+    section(out, "events", "6. Checking Kubernetes events...",
+            lambda data: format_events(records(snapshot.events, data, "events")), snapshot.errors.get("events"))
     
     # 7. Check service configuration
-    print("7. Checking service configuration...")
-    run_command("kubectl get service lingua-frontend-service -n lingua-app -o wide")
+    section(out, "frontend_service", "7. Checking service configuration...",
+            lambda data: service_lines(snapshot, "lingua-frontend-service", data), snapshot.errors.get("services"))
     
     # 8. Check backend service for comparison
-    print("8. Checking backend service (for comparison)...")
-    run_command("kubectl get service lingua-backend-service -n lingua-app -o wide")
+    section(out, "backend_service", "8. Checking backend service (for comparison)...",
+            lambda data: service_lines(snapshot, "lingua-backend-service", data), snapshot.errors.get("services"))
     
-    print("========================================")
-    print("Diagnosis Complete")
-    print("========================================")
-    print("\nPlease review the output above to identify the cause of the frontend crash.")
-    print("\nCommon causes:")
-    print("1. Nginx configuration errors")
-    print("2. Missing files in the Docker image")
-    print("3. Port binding issues")
-    print("4. Resource constraints")
-    print("5. Image not found or corrupted")
+    out.print("========================================")
+    out.print("Diagnosis Complete")
+    out.print("========================================")
+    out.print("\nPlease review the output above to identify the cause of the frontend crash.")
+    out.print("\nCommon causes:")
+    out.print("1. Nginx configuration errors")
+    out.print("2. Missing files in the Docker image")
+    out.print("3. Port binding issues")
+    out.print("4. Resource constraints")
+    out.print("5. Image not found or corrupted")
+    out.print("\nTo classify them automatically: python analyze-crashloop.py --app lingua-frontend")
+    out.finish(frontend_pods=[pod.name for pod in frontend_pods])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
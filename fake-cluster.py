@@ -0,0 +1,10 @@
+import sys
+
+from lingua_ops.fakecluster import main
+
+# Run a fake Kubernetes API server with the Lingua Phone deployments, e.g.
+#   python fake-cluster.py --speed 10
+#   python fake-cluster.py --crash lingua-frontend --latency 30
+# then run any script with LINGUA_K8S_API=http://127.0.0.1:8001
+if __name__ == "__main__":
+    sys.exit(main())
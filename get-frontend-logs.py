@@ -1,52 +1,69 @@
-import subprocess
 import sys
 
-def run_command(command):
-    """Run a command and return the output"""
-    try:
-        print(f"Running command: {command}")
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        print(f"STDOUT: {result.stdout}")
-        if result.stderr:
-            print(f"STDERR: {result.stderr}")
-        print(f"Return code: {result.returncode}")
-        return result.stdout, result.stderr, result.returncode
-    except Exception as e:
-        print(f"Exception occurred: {str(e)}")
-        return "", str(e), 1
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.logs import LogTailer
+from lingua_ops.output import Output
+from lingua_ops.snapshot import format_pod_details, record_dict, take_snapshot
+
+# python get-frontend-logs.py --json-lines  (or LINGUA_OUTPUT=jsonl) writes one JSON object per log line and step
 
 def main():
-    print("Getting frontend pod logs...")
-    print("=" * 50)
+    out = Output("get-frontend-logs")
+    out.print("Getting frontend pod logs...")
+    out.print("=" * 50)
     
-    # Get cluster credentials
-    print("1. Getting cluster credentials...")
-    stdout, stderr, returncode = run_command("gcloud container clusters get-credentials lingua-cluster --zone=us-central1-a")
-    if returncode != 0:
-        print("Failed to get cluster credentials.")
+    # Get cluster credentials (cached until the access token expires)
+    with out.step("credentials", "1. Getting cluster credentials...") as step:
+        try:
+            cluster = connect()
+        except ClusterError as e:
+            step.fail(f"Failed to get cluster credentials: {e}")
+        else:
+            snapshot = take_snapshot(cluster, ("pods", "events"))
+            pods = snapshot.pods_for("lingua-frontend")
+            step.data["pods"] = [pod.name for pod in pods]
+            if not pods:
+                step.fail(snapshot.errors.get("pods", "No frontend pods found."))
+    if step.status == "error":
+        out.finish()
         sys.exit(1)
+    pod_name = pods[0].name
     
-    # Get pod logs
-    print("\n2. Getting frontend pod logs...")
-    stdout, stderr, returncode = run_command("kubectl logs lingua-frontend-578867dfc7-f57xf -n lingua-app")
-    if returncode != 0:
-        print("Failed to get frontend pod logs.")
-        print(f"Error: {stderr}")
+    # Stream logs from every frontend pod as they arrive instead of downloading them whole
+    with out.step("logs", f"\n2. Getting frontend pod logs ({', '.join(pod.name for pod in pods)})...") as step:
+        step.print("\nFrontend pod logs:")
+
+        def show(line):
+            out.print(line.format())
+            out.record("log", pod=line.pod, container=line.container, timestamp=line.timestamp,
+                       level=line.level, text=line.text)
+
+        try:
+            tailer = LogTailer(cluster, "app=lingua-frontend").run(show)
+        except ClusterError as e:
+            step.fail(f"Failed to get frontend pod logs.\nError: {e}")
+        else:
+            step.data.update(lines=tailer.seen, errors=tailer.errors,
+                             skipped=[{"pod": pod, "container": container, "reason": reason}
+                                      for (pod, container), reason in sorted(tailer.skipped.items())])
+            for error in tailer.errors:
+                step.warn(f"Error: {error}")
+            for (pod, container), reason in sorted(tailer.skipped.items()):
+                step.print(f"Skipped {pod}/{container}: {reason}")
+    if step.status == "error":
+        out.finish()
         sys.exit(1)
     
-    print("\nFrontend pod logs:")
-    print(stdout)
-    
     # Also get pod description
-    print("\n3. Getting frontend pod description...")
-    stdout, stderr, returncode = run_command("kubectl describe pod lingua-frontend-578867dfc7-f57xf -n lingua-app")
-    if returncode != 0:
-        print("Failed to get frontend pod description.")
-        print(f"Error: {stderr}")
-        sys.exit(1)
+    with out.step("description", "\n3. Getting frontend pod description...") as step:
+        if "events" in snapshot.errors:
+            step.warn(f"Failed to get frontend pod events.\nError: {snapshot.errors['events']}")
+        events = snapshot.events_for(pod_name)
+        step.data["pod"] = dict(record_dict(pods[0]), events=[record_dict(event) for event in events])
+        step.print("\nFrontend pod description:")
+        step.print("\n".join(format_pod_details(pods[0], events)))
     
-    print("\nFrontend pod description:")
-    print(stdout)
+    out.finish(pod=pod_name)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,26 +1,62 @@
-import subprocess
 import sys
 
-def run_command(command, output_file):
-    print(f"Running: {command}")
-    try:
-        with open(output_file, 'w') as f:
-            result = subprocess.run(command, shell=True, stdout=f, stderr=subprocess.STDOUT)
-        print(f"Output saved to {output_file}")
-        print(f"Return code: {result.returncode}")
-    except Exception as e:
-        print(f"Error running command: {e}")
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.output import Output
+from lingua_ops.snapshot import format_pod_details, format_pods, record_dict, take_snapshot
+
+# python get-pod-description.py --json-lines  (or LINGUA_OUTPUT=jsonl) writes one JSON object per step
+
+def save(step, lines, output_file):
+    with open(output_file, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+    step.data["file"] = output_file
+    step.print(f"Output saved to {output_file}")
 
 def main():
-    print("Getting pod description...")
+    out = Output("get-pod-description")
+    out.print("Getting pod description...")
+    
+    # Pods and events come from one concurrent snapshot instead of two kubectl runs
+    with out.step("credentials") as step:
+        try:
+            cluster = connect()
+        except ClusterError as e:
+            step.fail(f"Failed to get cluster credentials: {e}")
+    if step.status == "error":
+        out.finish()
+        sys.exit(1)
+    
+    with out.step("snapshot") as step:
+        snapshot = take_snapshot(cluster, ("pods", "events"))
+        step.data["elapsed_ms"] = round(snapshot.elapsed * 1000, 1)
+        if "pods" in snapshot.errors:
+            step.fail(f"Error getting pods: {snapshot.errors['pods']}")
+        elif "events" in snapshot.errors:
+            step.warn(f"Error getting events (descriptions will not list them): {snapshot.errors['events']}")
+    if "pods" in snapshot.errors:
+        out.finish()
+        sys.exit(1)
     
     # Get pod description
-    run_command("kubectl describe pod -l app=lingua-frontend -n lingua-app", "pod-description.txt")
+    with out.step("description") as step:
+        lines = []
+        step.data["pods"] = []
+        for pod in snapshot.pods_for("lingua-frontend"):
+            events = snapshot.events_for(pod.name)
+            step.data["pods"].append(dict(record_dict(pod), events=[record_dict(event) for event in events]))
+            lines.extend(format_pod_details(pod, events))
+            lines.append("")
+        if not lines:
+            step.warn("No frontend pods found.")
+        save(step, lines or ["No frontend pods found."], "pod-description.txt")
     
     # Also get the current pod status
-    run_command("kubectl get pods -n lingua-app", "pod-status.txt")
+    with out.step("status") as step:
+        step.data["pods"] = [record_dict(pod) for pod in snapshot.pods]
+        save(step, format_pods(snapshot.pods), "pod-status.txt")
     
-    print("\nDone! Check pod-description.txt and pod-status.txt for details.")
+    out.print("\nDone! Check pod-description.txt and pod-status.txt for details.")
+    out.finish(files=["pod-description.txt", "pod-status.txt"])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
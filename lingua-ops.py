@@ -0,0 +1,10 @@
+import sys
+
+from lingua_ops.cli import main
+
+# One entry point for the deploy, status, diagnosis and benchmark tools, e.g.
+#   python lingua-ops.py status --json-lines
+#   python lingua-ops.py logs --follow --level warn
+#   python lingua-ops.py bench journey --users 25
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""
+Shared tooling for the Lingua Phone operations scripts.
+
+The standalone scripts in the repository root import from this package
+so that probing, cluster access and benchmarking live in one place.
+"""
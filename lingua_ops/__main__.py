@@ -0,0 +1,5 @@
+import sys
+
+from lingua_ops.cli import main
+
+sys.exit(main())
@@ -0,0 +1,364 @@
+"""
+Per-deploy latency baselines and a p95 regression gate.
+
+After each rollout `capture` runs a short closed-loop load test against the
+backend and stores every sample, per endpoint, in a SQLite database in the
+cache directory. The mix defaults to GATE_MIX: translate, search and product
+lookups, leaving out /api/chat and /api/tts, which are billed per call and
+slow enough that a short run would not gather --min-samples of them. `compare` checks the newest run against the last accepted
+one. For every endpoint it bootstraps the difference in p95 latency and
+flags a regression when the new p95 is at least --min-change slower and the
+bootstrap p-value is below --alpha. An endpoint also fails when the new run
+has fewer than --min-samples successful requests for it, or when its error
+rate rose by at least --min-error-increase with a one-sided two-proportion
+p-value below --alpha. `gate` does both and marks the new run accepted only
+if nothing failed, so one slow or broken build never becomes the baseline
+the next build is judged against. Without an accepted baseline the sample
+count check still applies, so a first run that only saw errors is rejected.
+
+Exit codes: 0 pass (or nothing stored), 1 regression or failed run, 2 usage.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+from lingua_ops import config, loadtest
+from lingua_ops.stats import percentile
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    label TEXT,
+    url TEXT,
+    duration_s REAL,
+    concurrency INTEGER,
+    accepted INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    endpoint TEXT NOT NULL,
+    latency_ms REAL NOT NULL,
+    ok INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_run ON samples(run_id, endpoint);
+"""
+
+# Re-weighting of loadtest.DEFAULT_MIX; takes the same syntax as --mix
+GATE_MIX = "translate=3,search=2,product=3"
+
+
+class BaselineStore:
+    """SQLite store of load-test runs and their raw latency samples"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(config.CACHE_DIR, "baselines.db")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def add_run(self, report, label=None, url=None):
+        """Store a loadtest.LoadReport and return the new run id"""
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO runs (created_at, label, url, duration_s, concurrency) VALUES (?, ?, ?, ?, ?)",
+                (datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"), label, url,
+                 report.duration, int(report.target)),
+            )
+            self.db.executemany(
+                "INSERT INTO samples (run_id, endpoint, latency_ms, ok) VALUES (?, ?, ?, ?)",
+                [(cursor.lastrowid, sample.name, sample.elapsed * 1000, int(sample.ok)) for sample in report.samples],
+            )
+        return cursor.lastrowid
+
+    def accept(self, run_id):
+        with self.db:
+            self.db.execute("UPDATE runs SET accepted = 1 WHERE id = ?", (run_id,))
+
+    def runs(self, limit=20):
+        return self.db.execute("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+
+    def run(self, run_id):
+        return self.db.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+
+    def latest(self):
+        return self.db.execute("SELECT * FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+
+    def last_accepted(self, before):
+        return self.db.execute(
+            "SELECT * FROM runs WHERE accepted = 1 AND id < ? ORDER BY id DESC LIMIT 1", (before,)
+        ).fetchone()
+
+    def samples(self, run_id):
+        """Return {endpoint: (sorted successful latencies in ms, error count)}"""
+        endpoints = {}
+        for row in self.db.execute("SELECT endpoint, latency_ms, ok FROM samples WHERE run_id = ?", (run_id,)):
+            latencies, errors = endpoints.setdefault(row["endpoint"], ([], [0]))
+            if row["ok"]:
+                latencies.append(row["latency_ms"])
+            else:
+                errors[0] += 1
+        return {name: (sorted(latencies), errors[0]) for name, (latencies, errors) in endpoints.items()}
+
+
+def bootstrap_p95(base, current, iterations=2000, seed=0):
+    """
+    One-sided bootstrap test that current's p95 is higher than base's.
+
+    Returns (observed difference in ms, p-value): the p-value is the share of
+    resampled differences that are zero or negative.
+    """
+    rng = random.Random(seed)
+    observed = percentile(current, 95) - percentile(base, 95)
+    not_worse = 0
+    for _ in range(iterations):
+        base_sample = sorted(rng.choices(base, k=len(base)))
+        current_sample = sorted(rng.choices(current, k=len(current)))
+        if percentile(current_sample, 95) - percentile(base_sample, 95) <= 0:
+            not_worse += 1
+    return observed, (not_worse + 1) / (iterations + 1)
+
+
+def error_rate_increase(base_errors, base_total, current_errors, current_total):
+    """
+    One-sided two-proportion z-test that current's error rate is higher than base's.
+
+    Returns (difference in error rate, p-value), or (None, None) when either
+    run has no requests at all.
+    """
+    if not base_total or not current_total:
+        return None, None
+    difference = current_errors / current_total - base_errors / base_total
+    pooled = (base_errors + current_errors) / (base_total + current_total)
+    error = math.sqrt(pooled * (1 - pooled) * (1 / base_total + 1 / current_total))
+    if not error:
+        return difference, 1.0
+    return difference, 0.5 * math.erfc(difference / error / math.sqrt(2))
+
+
+def compare_runs(store, base_id, current_id, alpha=0.05, min_change=0.10, min_samples=20,
+                 min_error_increase=0.01):
+    """
+    Compare two runs endpoint by endpoint; returns a list of result dicts.
+
+    base_id may be None, in which case only the new run's own sample counts
+    are checked.
+    """
+    base, current = store.samples(base_id) if base_id else {}, store.samples(current_id)
+    results = []
+    # Failed requests are stored too, so an endpoint missing from the new run was not in its mix
+    for endpoint in sorted(current):
+        base_latencies, base_errors = base.get(endpoint, ([], 0))
+        current_latencies, current_errors = current.get(endpoint, ([], 0))
+        result = {
+            "endpoint": endpoint,
+            "base_count": len(base_latencies),
+            "current_count": len(current_latencies),
+            "base_errors": base_errors,
+            "current_errors": current_errors,
+            "base_p95_ms": None,
+            "current_p95_ms": None,
+            "change": None,
+            "p_value": None,
+            "error_rate_change": None,
+            "error_p_value": None,
+            "regression": False,
+            "failures": [],
+            "note": None,
+        }
+        failures = result["failures"]
+        if len(current_latencies) < min_samples:
+            failures.append(f"only {len(current_latencies)} successful samples (need {min_samples})")
+        base_total, current_total = len(base_latencies) + base_errors, len(current_latencies) + current_errors
+        error_change, error_p_value = error_rate_increase(base_errors, base_total, current_errors, current_total)
+        if error_change is not None:
+            result.update(error_rate_change=round(error_change, 4), error_p_value=round(error_p_value, 4))
+            if error_change >= min_error_increase and error_p_value < alpha:
+                failures.append(f"error rate up {error_change * 100:.1f} points")
+        if len(base_latencies) < min_samples or len(current_latencies) < min_samples:
+            if base_id and endpoint not in base:
+                result["note"] = "not in the baseline's mix"
+            elif base_id and len(base_latencies) < min_samples:
+                result["note"] = f"baseline has fewer than {min_samples} successful samples"
+            result["regression"] = bool(failures)
+            results.append(result)
+            continue
+        base_p95, current_p95 = percentile(base_latencies, 95), percentile(current_latencies, 95)
+        difference, p_value = bootstrap_p95(base_latencies, current_latencies)
+        change = difference / base_p95 if base_p95 else 0.0
+        result.update(
+            base_p95_ms=round(base_p95, 1),
+            current_p95_ms=round(current_p95, 1),
+            change=round(change, 4),
+            p_value=round(p_value, 4),
+        )
+        if change >= min_change and p_value < alpha:
+            failures.insert(0, f"p95 up {change * 100:.1f}%")
+        result["regression"] = bool(failures)
+        results.append(result)
+    return results
+
+
+def format_comparison(base_run, current_run, results):
+    if base_run is None:
+        heading = (f"Checking run {current_run['id']} ({current_run['label'] or 'unlabelled'}) "
+                   f"on its own: no accepted baseline before it")
+    else:
+        heading = (f"Comparing run {current_run['id']} ({current_run['label'] or 'unlabelled'}) "
+                   f"against baseline run {base_run['id']} ({base_run['label'] or 'unlabelled'})")
+    lines = [heading, f"  {'ENDPOINT':<10} {'BASE P95':>10} {'NEW P95':>10} {'CHANGE':>8} {'P':>7}  ERRORS"]
+    for result in results:
+        errors = f"{result['base_errors']} -> {result['current_errors']}"
+        flag = f"  FAIL: {'; '.join(result['failures'])}" if result["failures"] else ""
+        if result["change"] is None:
+            note = f"  ({result['note']})" if result["note"] else ""
+            lines.append(f"  {result['endpoint']:<10} {'':>10} {'':>10} {'':>8} {'':>7}  {errors}{flag}{note}")
+            continue
+        lines.append(
+            f"  {result['endpoint']:<10} {result['base_p95_ms']:>8.1f}ms {result['current_p95_ms']:>8.1f}ms "
+            f"{result['change'] * 100:>+7.1f}% {result['p_value']:>7.4f}  {errors}{flag}"
+        )
+    return lines
+
+
+def capture(store, url=None, label=None, duration=20.0, concurrency=4, mix=None, on_line=print):
+    """Run the mix (default GATE_MIX) against the backend and store the samples as a new run"""
+    url = url or config.BACKEND_URL
+    mix = mix or loadtest.parse_mix(GATE_MIX)
+    on_line(f"Capturing baseline: {concurrency} workers for {duration:g}s against {url} "
+            f"({', '.join(spec.name for spec in mix)})")
+    report = loadtest.run(url, mix, concurrency=concurrency, duration=duration)
+    for line in report.format():
+        on_line(line)
+    run_id = store.add_run(report, label=label, url=url)
+    on_line(f"Stored as run {run_id}")
+    return run_id
+
+
+def check(store, current_id=None, base_id=None, alpha=0.05, min_change=0.10, min_samples=20,
+          min_error_increase=0.01, on_line=print):
+    """
+    Compare a run with its baseline; returns (failed, results).
+
+    Without an accepted baseline the run is only checked for enough
+    successful samples per endpoint.
+    """
+    current = store.run(current_id) if current_id else store.latest()
+    if current is None:
+        on_line("No runs stored yet")
+        return False, []
+    base = store.run(base_id) if base_id else store.last_accepted(current["id"])
+    results = compare_runs(store, base["id"] if base else None, current["id"], alpha=alpha,
+                           min_change=min_change, min_samples=min_samples,
+                           min_error_increase=min_error_increase)
+    for line in format_comparison(base, current, results):
+        on_line(line)
+    return any(result["regression"] for result in results), results
+
+
+def gate(url=None, label=None, duration=20.0, concurrency=4, alpha=0.05, min_change=0.10,
+         min_samples=20, min_error_increase=0.01, store=None, mix=None, on_line=print):
+    """Capture a run, compare it with the last accepted one, and accept it only if it passed"""
+    store = store or BaselineStore()
+    run_id = capture(store, url, label, duration, concurrency, mix, on_line)
+    failed, _ = check(store, run_id, alpha=alpha, min_change=min_change, min_samples=min_samples,
+                      min_error_increase=min_error_increase, on_line=on_line)
+    if failed:
+        on_line(f"Gate failed; run {run_id} was not accepted as the new baseline")
+    else:
+        store.accept(run_id)
+    return not failed
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Store per-deploy latency baselines and gate on p95 regressions")
+    parser.add_argument("--db", default=None, help="SQLite file (default: baselines.db in the cache directory)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_capture_options(command):
+        command.add_argument("--url", default=config.BACKEND_URL, help="backend base URL")
+        command.add_argument("--label", default=None, help="label for the run, e.g. the image tags")
+        command.add_argument("--duration", type=float, default=20.0, help="load test length in seconds")
+        command.add_argument("--concurrency", type=int, default=4, help="closed-loop workers")
+        command.add_argument("--mix", default=GATE_MIX,
+                             help="request mix, e.g. chat=1,translate=3 (default leaves out the billed chat and tts)")
+
+    def add_compare_options(command):
+        command.add_argument("--alpha", type=float, default=0.05, help="significance level")
+        command.add_argument("--min-change", type=float, default=0.10,
+                             help="smallest relative p95 increase that counts as a regression")
+        command.add_argument("--min-samples", type=int, default=20,
+                             help="successful samples an endpoint needs in the new run")
+        command.add_argument("--min-error-increase", type=float, default=0.01,
+                             help="smallest error-rate increase (as a fraction) that fails the run")
+
+    capture_command = commands.add_parser("capture", help="run the load test and store a new run")
+    add_capture_options(capture_command)
+    add_compare_options(capture_command)
+    compare = commands.add_parser("compare", help="compare a run with the last accepted one")
+    compare.add_argument("--run", type=int, default=None, help="run to check (default: newest)")
+    compare.add_argument("--base", type=int, default=None, help="baseline run (default: last accepted)")
+    compare.add_argument("--json", action="store_true", help="print the comparison as JSON")
+    add_compare_options(compare)
+    gate_command = commands.add_parser("gate", help="capture, compare, and accept the run if it passes")
+    add_capture_options(gate_command)
+    add_compare_options(gate_command)
+    accept = commands.add_parser("accept", help="mark a run as an accepted baseline")
+    accept.add_argument("run", type=int)
+    commands.add_parser("list", help="list stored runs")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command in ("capture", "gate"):
+        try:
+            loadtest.validate_load(args.concurrency)
+            mix = loadtest.parse_mix(args.mix)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 2
+    store = BaselineStore(args.db)
+    if args.command == "capture":
+        run_id = capture(store, args.url, args.label, args.duration, args.concurrency, mix)
+        if store.last_accepted(run_id) is None:
+            # The first run becomes the baseline, but only if it is usable as one
+            failed, _ = check(store, run_id, alpha=args.alpha, min_change=args.min_change,
+                              min_samples=args.min_samples, min_error_increase=args.min_error_increase)
+            if failed:
+                print(f"Run {run_id} was not accepted as the first baseline")
+                return 1
+            store.accept(run_id)
+        return 0
+    if args.command == "compare":
+        output = (lambda line: None) if args.json else print
+        failed, results = check(store, args.run, args.base, args.alpha, args.min_change, args.min_samples,
+                                args.min_error_increase, on_line=output)
+        if args.json:
+            print(json.dumps({"regression": failed, "endpoints": results}, indent=2))
+        return 1 if failed else 0
+    if args.command == "gate":
+        passed = gate(args.url, args.label, args.duration, args.concurrency, args.alpha, args.min_change,
+                      args.min_samples, args.min_error_increase, store, mix)
+        return 0 if passed else 1
+    if args.command == "accept":
+        if store.run(args.run) is None:
+            print(f"No run {args.run}")
+            return 2
+        store.accept(args.run)
+        return 0
+    for run in store.runs():
+        print(f"{run['id']:>4}  {run['created_at']}  {'accepted' if run['accepted'] else '        '}  "
+              f"{run['label'] or ''}  {run['url'] or ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
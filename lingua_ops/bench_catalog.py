@@ -0,0 +1,386 @@
+"""
+Catalog load benchmark for /api/search, /api/products/:id and /api/cart/add.
+
+Every shopping query ends up in onlineBoutiqueService: searchProducts for
+/api/search, and getProductInLanguage for /api/products/:id, which
+translates name and description whenever the language is not English.
+The benchmark runs two populations of simulated users at the same time:
+
+* browsers, which keep sending a weighted mix of query classes;
+* buyers, which keep adding products to their carts, the way traffic
+  looks just before a sale closes.
+
+Query classes:
+
+    search_keyword     one English catalogue word ("backpack", "jacket")
+    search_native      the same kind of word in Hindi, Bengali or Spanish
+    search_phrase      a sentence around the word ("मुझे एक जैकेट चाहिए")
+    search_miss        something the catalogue does not sell, or a misspelling
+    product            product page in English
+    product_localized  product page in hi/bn/es, two translateText calls each
+    product_missing    an ID that does not exist (404 is the expected answer)
+    cart_add           POST /api/cart/add from a buyer
+
+Product popularity is Zipfian: the catalogue from productsData.ts is
+shuffled with the seed and product k gets weight 1/k^s. Popular products
+dominate both lookups and the search words drawn from product
+categories. The report gives latency, errors and throughput per class. It
+also gives the zero-result rate of each search class (mock-mode search
+only matches English substrings of product names), a per-language split,
+and head/tail latency for product lookups, so a cache that only helps
+the popular products is visible.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import accumulate
+
+from lingua_ops import config
+from lingua_ops.http import Client, arequest
+from lingua_ops.mockbackend import PRODUCTS_FILE, load_products
+from lingua_ops.stats import summarize
+
+SCHEMA_VERSION = 1
+LANGUAGES = ("hi", "bn", "es")
+# Share of the catalogue, by popularity, that counts as the head
+HEAD_SHARE = 0.2
+
+# Category -> the word a shopper would type for it, per language
+CATEGORY_TERMS = {
+    "travel_bag": {"en": "backpack", "hi": "बैग", "bn": "ব্যাগ", "es": "mochila"},
+    "t_shirts_men": {"en": "t-shirt", "hi": "टी-शर्ट", "bn": "টি-শার্ট", "es": "camiseta"},
+    "jackets_men": {"en": "jacket", "hi": "जैकेट", "bn": "জ্যাকেট", "es": "chaqueta"},
+    "jacket_women": {"en": "jacket", "hi": "जैकेट", "bn": "জ্যাকেট", "es": "chaqueta"},
+    "top_women": {"en": "top", "hi": "टॉप", "bn": "টপ", "es": "blusa"},
+    "jewellery_bracelet": {"en": "bracelet", "hi": "कंगन", "bn": "ব্রেসলেট", "es": "pulsera"},
+    "jewellery_earrings": {"en": "earrings", "hi": "झुमके", "bn": "কানের দুল", "es": "pendientes"},
+    "jewellery_ring": {"en": "ring", "hi": "अंगूठी", "bn": "আংটি", "es": "anillo"},
+    "electronics_hard_drive": {"en": "hard drive", "hi": "हार्ड ड्राइव", "bn": "হার্ড ড্রাইভ", "es": "disco duro"},
+    "electronics_secondary_storage": {"en": "storage", "hi": "स्टोरेज", "bn": "স্টোরেজ", "es": "almacenamiento"},
+    "electronics_screen": {"en": "screen", "hi": "स्क्रीन", "bn": "স্ক্রিন", "es": "pantalla"},
+}
+PHRASES = {
+    "en": "I am looking for a {term}",
+    "hi": "मुझे एक {term} चाहिए",
+    "bn": "আমাকে একটি {term} দেখান",
+    "es": "Busco {term} para regalar",
+}
+NOT_SOLD = {
+    "en": ["laptop", "refrigerator", "sofa", "lipstick"],
+    "hi": ["बर्तन", "खिलौने"],
+    "bn": ["খেলনা", "বাসন"],
+    "es": ["bicicleta", "nevera"],
+}
+
+DEFAULT_CLASSES = {
+    "search_keyword": 3,
+    "search_native": 2,
+    "search_phrase": 2,
+    "search_miss": 1,
+    "product": 4,
+    "product_localized": 2,
+    "product_missing": 0.5,
+}
+CLASSES = tuple(DEFAULT_CLASSES) + ("cart_add",)
+
+
+@dataclass
+class CatalogRequest:
+    query_class: str
+    method: str
+    path: str
+    language: str = "en"
+    json: dict = None
+    params: dict = None
+    rank: int = None
+    expect: int = 200
+
+
+@dataclass
+class Sample:
+    query_class: str
+    language: str
+    elapsed: float
+    status_code: int
+    ok: bool
+    results: int = None
+    rank: int = None
+
+
+class Popularity:
+    """Zipfian choice over the catalogue: the k-th most popular product has weight 1/k^s"""
+
+    def __init__(self, products, exponent=1.1, seed=None):
+        self.ids = sorted(products, key=lambda key: int(key) if key.isdigit() else key)
+        random.Random(seed).shuffle(self.ids)
+        self.products = products
+        self.cumulative = list(accumulate(1 / rank ** exponent for rank in range(1, len(self.ids) + 1)))
+
+    def pick(self, rng):
+        """Return (product_id, popularity rank starting at 1)"""
+        index = rng.choices(range(len(self.ids)), cum_weights=self.cumulative)[0]
+        return self.ids[index], index + 1
+
+    def head(self):
+        return max(1, round(len(self.ids) * HEAD_SHARE))
+
+
+def term_for(product, language):
+    category = (product.get("categories") or [""])[0]
+    terms = CATEGORY_TERMS.get(category)
+    if terms:
+        return terms[language]
+    return product["name"].split()[-1].lower()
+
+
+def misspell(word, rng):
+    if len(word) < 4:
+        return word + word[-1]
+    index = rng.randrange(1, len(word) - 1)
+    return word[:index] + word[index + 1:]
+
+
+def build_request(query_class, popularity, rng, user_id=None):
+    """One concrete request of a query class, drawing products by popularity"""
+    product_id, rank = popularity.pick(rng)
+    product = popularity.products[product_id]
+    language = rng.choice(LANGUAGES)
+    if query_class == "search_keyword":
+        return CatalogRequest(query_class, "POST", "/api/search",
+                              json={"query": term_for(product, "en"), "language": "en"}, rank=rank)
+    if query_class == "search_native":
+        return CatalogRequest(query_class, "POST", "/api/search", language,
+                              json={"query": term_for(product, language), "language": language}, rank=rank)
+    if query_class == "search_phrase":
+        language = rng.choice(("en",) + LANGUAGES)
+        query = PHRASES[language].format(term=term_for(product, language))
+        return CatalogRequest(query_class, "POST", "/api/search", language,
+                              json={"query": query, "language": language}, rank=rank)
+    if query_class == "search_miss":
+        language = rng.choice(("en",) + LANGUAGES)
+        query = rng.choice(NOT_SOLD[language]) if rng.random() < 0.5 else misspell(term_for(product, "en"), rng)
+        return CatalogRequest(query_class, "POST", "/api/search", language,
+                              json={"query": query, "language": language})
+    if query_class == "product":
+        return CatalogRequest(query_class, "GET", f"/api/products/{product_id}", rank=rank)
+    if query_class == "product_localized":
+        return CatalogRequest(query_class, "GET", f"/api/products/{product_id}", language,
+                              params={"language": language}, rank=rank)
+    if query_class == "product_missing":
+        return CatalogRequest(query_class, "GET", f"/api/products/{10000 + rng.randrange(1000)}", expect=404)
+    if query_class == "cart_add":
+        return CatalogRequest(query_class, "POST", "/api/cart/add", rank=rank,
+                              json={"userId": user_id, "productId": product_id, "quantity": rng.randint(1, 3)})
+    raise ValueError(f"Unknown query class '{query_class}'")
+
+
+@dataclass
+class CatalogReport:
+    browsers: int
+    buyers: int
+    catalogue: int
+    head: int
+    samples: list = field(default_factory=list)
+    duration: float = 0.0
+    started_at: str = None
+
+    def _section(self, samples):
+        section = summarize(sample.elapsed for sample in samples)
+        errors = sum(1 for sample in samples if not sample.ok)
+        section["errors"] = errors
+        section["error_rate"] = round(errors / len(samples), 4) if samples else 0.0
+        section["throughput_rps"] = round(len(samples) / self.duration, 2) if self.duration else 0.0
+        return section
+
+    def to_dict(self):
+        by_class = {}
+        for sample in self.samples:
+            by_class.setdefault(sample.query_class, []).append(sample)
+        classes = {}
+        for name in CLASSES:
+            samples = by_class.get(name)
+            if not samples:
+                continue
+            section = self._section(samples)
+            searched = [sample for sample in samples if sample.results is not None]
+            if searched:
+                section["zero_result_rate"] = round(
+                    sum(1 for sample in searched if not sample.results) / len(searched), 4)
+            languages = {}
+            for sample in samples:
+                languages.setdefault(sample.language, []).append(sample.elapsed)
+            if len(languages) > 1:
+                section["languages"] = {language: summarize(values) for language, values in sorted(languages.items())}
+            ranked = [sample for sample in samples if sample.rank is not None]
+            if ranked and not name.startswith("search"):
+                section["head"] = summarize(sample.elapsed for sample in ranked if sample.rank <= self.head)
+                section["tail"] = summarize(sample.elapsed for sample in ranked if sample.rank > self.head)
+            classes[name] = section
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "started_at": self.started_at,
+            "browsers": self.browsers,
+            "buyers": self.buyers,
+            "catalogue": self.catalogue,
+            "head_products": self.head,
+            "duration_s": round(self.duration, 2),
+            "overall": self._section(self.samples),
+            "classes": classes,
+        }
+
+    def format(self):
+        data = self.to_dict()
+        overall = data["overall"]
+        lines = [f"{overall['count']} requests from {data['browsers']} browsers and {data['buyers']} buyers in "
+                 f"{data['duration_s']:.0f}s ({overall['throughput_rps']:.1f} req/s, "
+                 f"errors {overall['error_rate'] * 100:.1f}%)"]
+        lines.append(f"  {'CLASS':<18} {'N':>6} {'REQ/S':>7} {'P50':>9} {'P90':>9} {'P99':>9} {'ERRORS':>7} {'ZERO':>6}")
+        for name, section in data["classes"].items():
+            zero = f"{section['zero_result_rate'] * 100:5.1f}%" if "zero_result_rate" in section else ""
+            lines.append(f"  {name:<18} {section['count']:>6} {section['throughput_rps']:>7.1f} "
+                         f"{section['p50_ms']:>7.1f}ms {section['p90_ms']:>7.1f}ms {section['p99_ms']:>7.1f}ms "
+                         f"{section['errors']:>7} {zero:>6}")
+            for language, summary in section.get("languages", {}).items():
+                lines.append(f"    {language:<16} {summary['count']:>6} {'':>7} "
+                             f"{summary['p50_ms']:>7.1f}ms {summary['p90_ms']:>7.1f}ms {summary['p99_ms']:>7.1f}ms")
+            if section.get("head", {}).get("count") and section.get("tail", {}).get("count"):
+                lines.append(f"    top {data['head_products']} products p50 {section['head']['p50_ms']:.1f} ms, "
+                             f"the rest p50 {section['tail']['p50_ms']:.1f} ms")
+        return lines
+
+
+def validate_users(browsers, buyers):
+    """Raise ValueError unless both counts are non-negative and at least one user runs"""
+    if browsers < 0 or buyers < 0:
+        raise ValueError(f"--browsers and --buyers must not be negative, got {browsers} and {buyers}")
+    if browsers + buyers < 1:
+        raise ValueError("--browsers and --buyers must add up to at least 1")
+
+
+class CatalogRunner:
+    """Browsers and buyers hitting the catalogue endpoints at the same time"""
+
+    def __init__(self, base_url, products, classes=None, browsers=20, buyers=5, duration=30.0, think=0.0,
+                 zipf=1.1, timeout=10.0, seed=None):
+        validate_users(browsers, buyers)
+        self.base_url = base_url.rstrip("/")
+        self.classes = classes or DEFAULT_CLASSES
+        self.browsers = browsers
+        self.buyers = buyers
+        self.duration = duration
+        self.think = think
+        self.timeout = timeout
+        self.seed = seed
+        self.popularity = Popularity(products, zipf, seed)
+        self.client = Client(pool_size=browsers + buyers, retries=0)
+        self.report = CatalogReport(browsers, buyers, len(products), self.popularity.head())
+
+    async def _send(self, request):
+        response = await arequest(request.method, self.base_url + request.path, json=request.json,
+                                  params=request.params, deadline=self.timeout, client=self.client)
+        results = None
+        if request.path == "/api/search" and response.ok:
+            try:
+                results = len(response.json().get("products") or [])
+            except (ValueError, AttributeError):
+                results = 0
+        self.report.samples.append(Sample(request.query_class, request.language, response.elapsed,
+                                          response.status_code, response.status_code == request.expect,
+                                          results, request.rank))
+
+    async def _user(self, user, deadline, buyer):
+        rng = random.Random(None if self.seed is None else self.seed * 1000 + user)
+        names, weights = list(self.classes), list(self.classes.values())
+        while time.monotonic() < deadline:
+            query_class = "cart_add" if buyer else rng.choices(names, weights)[0]
+            await self._send(build_request(query_class, self.popularity, rng, f"catalog-buyer-{user}"))
+            if self.think > 0:
+                await asyncio.sleep(rng.expovariate(1 / self.think))
+
+    async def run(self):
+        self.report.started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        users = self.browsers + self.buyers
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=users))
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.duration
+        try:
+            await asyncio.gather(*(self._user(user, deadline, user >= self.browsers) for user in range(users)))
+        finally:
+            self.client.close()
+        self.report.duration = time.perf_counter() - start
+        return self.report
+
+
+def parse_classes(text):
+    """Pick query classes, optionally re-weighted: 'product=5,search_native'"""
+    chosen = {}
+    for item in text.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in DEFAULT_CLASSES:
+            raise ValueError(f"Unknown query class '{name}' (choose from {', '.join(DEFAULT_CLASSES)})")
+        chosen[name] = float(weight) if weight else DEFAULT_CLASSES[name]
+    return chosen
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Load the catalogue search, product and cart endpoints")
+    parser.add_argument("--url", default=config.BACKEND_URL, help="backend base URL")
+    parser.add_argument("--browsers", type=int, default=20, help="users sending the search and product mix")
+    parser.add_argument("--buyers", type=int, default=5, help="users adding to their carts at the same time")
+    parser.add_argument("--duration", type=float, default=30.0, help="test length in seconds")
+    parser.add_argument("--classes", default=",".join(DEFAULT_CLASSES),
+                        help="query classes for browsers, optionally weighted, e.g. product=5,search_native=2")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of product popularity")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds each user pauses between requests")
+    parser.add_argument("--root", default=".", help="repository root, to read productsData.ts from")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request deadline in seconds")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for popularity and queries")
+    parser.add_argument("--output", default=None, help="write the JSON report to this file")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        classes = parse_classes(args.classes)
+        validate_users(args.browsers, args.buyers)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    # load_products() falls back to a synthetic catalogue for the mock; a benchmark needs the real one
+    if not os.path.isfile(os.path.join(args.root, PRODUCTS_FILE)):
+        print(f"Error: {os.path.join(args.root, PRODUCTS_FILE)} not found; run from the repository root or pass --root")
+        return 2
+    products = load_products(args.root)
+    runner = CatalogRunner(args.url, products, classes, browsers=args.browsers, buyers=args.buyers,
+                           duration=args.duration, think=args.think, zipf=args.zipf, timeout=args.timeout,
+                           seed=args.seed)
+    if not args.json:
+        print(f"Loading the catalogue ({len(products)} products) with {args.browsers} browsers and "
+              f"{args.buyers} buyers for {args.duration:g}s against {args.url}...", flush=True)
+    report = asyncio.run(runner.run())
+    data = report.to_dict()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write("\n")
+    if args.json:
+        print(json.dumps(data, indent=2, sort_keys=True, ensure_ascii=False))
+    else:
+        print("\n".join(report.format()))
+        if args.output:
+            print(f"Report written to {args.output}")
+    return 0 if data["overall"]["count"] and data["overall"]["error_rate"] < 1 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
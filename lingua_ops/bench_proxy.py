@@ -0,0 +1,381 @@
+"""
+Benchmark of the nginx proxy path in front of the backend API.
+
+In the browser, every /api/ call goes through the `location /api/` block of
+docker/nginx-k8s.conf. The benchmark runs the load test's request mix at
+the same concurrency directly against the backend (:3002) and through the
+proxy (:8080). It reports per endpoint what the extra hop costs in latency
+and throughput. It also reports the bytes each endpoint sends when the
+client accepts gzip. Targets take turns within each round, so drift in the
+backend is spread across all of them rather than landing on one.
+
+With --variants, the proxy under test is not an already-running nginx.
+Instead the benchmark generates configs from docker/nginx-k8s.conf by
+applying one or more named changes, joined with '+' (e.g.
+keepalive+gzip1):
+
+    baseline      the file as it is
+    keepalive     upstream keepalive pool, with HTTP/1.1 and no Connection header to the backend
+    buffers       larger proxy buffers, so typical responses never touch temp files
+    no-buffering  proxy_buffering off: stream responses through as they arrive
+    gzip-off      no compression
+    gzip1/5/9     gzip on at that compression level (nginx defaults to 1)
+
+Each config is rewritten to listen on the proxy port and to proxy to the
+backend under test. It is started with a local nginx binary (--nginx) or
+a container on the host network (--docker IMAGE) for the duration of each
+run. --write-configs only writes the generated files.
+
+Over loopback, compression shows up only as CPU time, never as saved
+transfer time, so judge the gzip variants on the byte column as well.
+"""
+
+import argparse
+import copy
+import functools
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from lingua_ops import config, loadtest
+from lingua_ops.manifests import ManifestError, iter_directives, parse_nginx, render_nginx
+from lingua_ops.stats import format_summary
+
+SCHEMA_VERSION = 1
+DEFAULT_CONFIG = os.path.join("docker", "nginx-k8s.conf")
+DEFAULT_VARIANTS = ("baseline", "keepalive", "buffers", "no-buffering", "gzip-off", "gzip5")
+DEFAULT_IMAGE = "nginx:1.25-alpine"
+
+# variant -> [(block, directive, args)]; block is one of upstream, api (the /api/ location), server or http
+VARIANTS = {
+    "baseline": [],
+    "keepalive": [
+        ("upstream", "keepalive", ["32"]),
+        ("api", "proxy_http_version", ["1.1"]),
+        ("api", "proxy_set_header", ["Connection", ""]),
+    ],
+    "buffers": [
+        ("api", "proxy_buffer_size", ["16k"]),
+        ("api", "proxy_buffers", ["16", "16k"]),
+        ("api", "proxy_busy_buffers_size", ["32k"]),
+    ],
+    "no-buffering": [("api", "proxy_buffering", ["off"])],
+    "gzip-off": [("server", "gzip", ["off"])],
+    "gzip1": [("server", "gzip", ["on"]), ("server", "gzip_comp_level", ["1"])],
+    "gzip5": [("server", "gzip", ["on"]), ("server", "gzip_comp_level", ["5"])],
+    "gzip9": [("server", "gzip", ["on"]), ("server", "gzip_comp_level", ["9"])],
+}
+
+
+class ProxyError(Exception):
+    """Raised when a config cannot be generated or nginx does not start"""
+
+
+def set_directive(block, name, args):
+    """Replace the directive called name in block, or append it; proxy_set_header is keyed by its header too"""
+    for directive in block:
+        if directive["name"] == name and (name != "proxy_set_header" or directive["args"][:1] == args[:1]):
+            directive["args"] = list(args)
+            return
+    block.append({"name": name, "args": list(args), "line": None, "block": None})
+
+
+def api_blocks(directives):
+    """The http, server, /api/ location and upstream blocks the proxy path goes through"""
+    for location, parents in iter_directives(directives, "location"):
+        if location["args"][-1:] != ["/api/"]:
+            continue
+        blocks = {"api": location["block"], "server": parents[-1]["block"], "http": parents[0]["block"]}
+        proxy_pass = next((d["args"][0] for d in location["block"] if d["name"] == "proxy_pass"), "")
+        upstream_name = urlsplit(proxy_pass).hostname
+        for upstream, _ in iter_directives(directives, "upstream"):
+            if upstream["args"] == [upstream_name]:
+                blocks["upstream"] = upstream["block"]
+        return blocks
+    raise ProxyError("no 'location /api/' block to benchmark")
+
+
+def generate(directives, variant, backend_url, port, workdir=None):
+    """Render one variant of the config, proxying to backend_url and listening on port"""
+    tree = copy.deepcopy(directives)
+    blocks = api_blocks(tree)
+    backend = urlsplit(backend_url)
+    target = f"{backend.hostname}:{backend.port or 80}"
+    if "upstream" in blocks:
+        blocks["upstream"][:] = [d for d in blocks["upstream"] if d["name"] != "server"]
+        blocks["upstream"].insert(0, {"name": "server", "args": [target], "line": None, "block": None})
+    else:
+        set_directive(blocks["api"], "proxy_pass", [f"http://{target}"])
+    set_directive(blocks["server"], "listen", [str(port)])
+    for name in variant.split("+"):
+        if name not in VARIANTS:
+            raise ProxyError(f"unknown variant '{name}' (choose from {', '.join(VARIANTS)})")
+        for block, directive, args in VARIANTS[name]:
+            if block not in blocks:
+                raise ProxyError(f"variant {name} needs an upstream block, and /api/ proxies without one")
+            set_directive(blocks[block], directive, args)
+    if workdir:
+        # A local, unprivileged nginx keeps its pid, logs and temp files in the work directory
+        tree = [d for d in tree if d["name"] not in ("user", "pid", "error_log")]
+        tree[:0] = [{"name": "pid", "args": [os.path.join(workdir, "nginx.pid")], "line": None, "block": None},
+                    {"name": "error_log", "args": [os.path.join(workdir, "error.log")], "line": None, "block": None}]
+        http = blocks["http"]
+        http[:] = [d for d in http if d["name"] != "include" or os.path.exists(d["args"][0])]
+        set_directive(http, "access_log", [os.path.join(workdir, "access.log")])
+        for temp in ("client_body", "proxy", "fastcgi", "uwsgi", "scgi"):
+            set_directive(http, f"{temp}_temp_path", [os.path.join(workdir, temp)])
+    return render_nginx(tree) + "\n"
+
+
+class NginxProcess:
+    """One generated config, run by a local nginx binary or a host-network container"""
+
+    def __init__(self, text, port, workdir, binary=None, image=None):
+        self.text = text
+        self.port = port
+        self.workdir = workdir
+        self.binary = binary
+        self.image = image
+        self.path = os.path.join(workdir, "nginx.conf")
+        self.process = None
+        self.container = None
+
+    def start(self, timeout=10.0):
+        with open(self.path, "w") as f:
+            f.write(self.text)
+        if self.image:
+            result = subprocess.run(["docker", "run", "-d", "--rm", "--network", "host",
+                                     "-v", f"{self.path}:/etc/nginx/nginx.conf:ro", self.image],
+                                    capture_output=True, text=True)
+            if result.returncode:
+                raise ProxyError(f"docker run failed: {result.stderr.strip()}")
+            self.container = result.stdout.strip()
+        else:
+            # nginx opens <prefix>/logs/error.log before it has read the error_log directive
+            os.makedirs(os.path.join(self.workdir, "logs"), exist_ok=True)
+            self.process = subprocess.Popen([self.binary, "-p", self.workdir, "-c", self.path, "-g", "daemon off;"],
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process and self.process.poll() is not None:
+                raise ProxyError(f"nginx exited: {self.process.stderr.read().strip()}")
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.2).close()
+                return
+            except OSError:
+                time.sleep(0.05)
+        self.stop()
+        raise ProxyError(f"nginx did not listen on port {self.port} within {timeout:g}s")
+
+    def stop(self):
+        if self.container:
+            subprocess.run(["docker", "stop", "-t", "1", self.container], capture_output=True)
+            self.container = None
+        if self.process:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+            self.process = None
+
+
+def payload_sizes(base_url, mix, timeout=10.0):
+    """Bytes on the wire per endpoint for one request that accepts gzip, and the encoding used"""
+    sizes = {}
+    rng = random.Random(0)
+    with requests.Session() as session:
+        for spec in mix:
+            path, body = spec.build(rng)
+            try:
+                response = session.request(spec.method, base_url + path, json=body, timeout=timeout, stream=True,
+                                           headers={"Accept-Encoding": "gzip"})
+                raw = response.raw.read(decode_content=False)
+            except requests.exceptions.RequestException:
+                continue
+            sizes[spec.name] = {"bytes": len(raw), "encoding": response.headers.get("Content-Encoding")}
+    return sizes
+
+
+def benchmark(targets, mix=None, concurrency=8, duration=10.0, rounds=3, warmup=1.0, timeout=10.0, seed=0,
+              on_line=print):
+    """
+    Run the mix against every (label, url, process) target in turn for `rounds` rounds.
+    The first target is the baseline the others' overhead is measured from.
+    """
+    mix = mix or loadtest.DEFAULT_MIX
+    reports = {label: loadtest.LoadReport("concurrency", concurrency) for label, _, _ in targets}
+    sizes = {}
+    for round_number in range(rounds):
+        for label, url, process in targets:
+            if process:
+                process.start()
+            try:
+                if warmup:
+                    loadtest.run(url, mix, concurrency=concurrency, duration=warmup, timeout=timeout, seed=seed)
+                report = loadtest.run(url, mix, concurrency=concurrency, duration=duration, timeout=timeout,
+                                      seed=seed + round_number)
+                if label not in sizes:
+                    sizes[label] = payload_sizes(url, mix, timeout)
+            finally:
+                if process:
+                    process.stop()
+            reports[label].samples.extend(report.samples)
+            reports[label].duration += report.duration
+            on_line(f"  round {round_number + 1}/{rounds}  {label:<24} {len(report.samples) / report.duration:8.1f} req/s")
+
+    results = {}
+    base = None
+    for label, _, _ in targets:
+        data = reports[label].to_dict()
+        data["bytes"] = sizes.get(label, {})
+        if base is None:
+            base = data
+        else:
+            base_sections = dict(base["endpoints"], overall=base["overall"])
+            data["overhead"] = {
+                name: {
+                    "p50_ms": _delta(section, base_sections.get(name), "p50_ms"),
+                    "p90_ms": _delta(section, base_sections.get(name), "p90_ms"),
+                    "throughput": _ratio(section, base_sections.get(name)),
+                }
+                for name, section in [("overall", data["overall"])] + list(data["endpoints"].items())
+            }
+        results[label] = data
+    return results
+
+
+def _delta(section, base, key):
+    if not base or section[key] is None or base[key] is None:
+        return None
+    return round(section[key] - base[key], 2)
+
+
+def _ratio(section, base):
+    if not base or not base["throughput_rps"]:
+        return None
+    return round(section["throughput_rps"] / base["throughput_rps"] - 1, 4)
+
+
+def format_results(results):
+    lines = []
+    for label, data in results.items():
+        change = data.get("overhead", {}).get("overall", {}).get("throughput")
+        lines.append(f"\n{label}: {data['overall']['throughput_rps']:.1f} req/s"
+                     + (f" ({change:+.1%} vs {next(iter(results))})" if change is not None else "")
+                     + f", errors {data['overall']['error_rate'] * 100:.1f}%")
+        rows = [("overall", data["overall"])] + list(data["endpoints"].items())
+        for name, section in rows:
+            line = f"  {name:<10} {format_summary(section)}"
+            overhead = data.get("overhead", {}).get(name)
+            if overhead and overhead["p50_ms"] is not None:
+                line += f"   overhead p50 {overhead['p50_ms']:+.1f} ms  p90 {overhead['p90_ms']:+.1f} ms"
+            size = data["bytes"].get(name)
+            if size:
+                line += f"   {size['bytes']} B{' ' + size['encoding'] if size['encoding'] else ''}"
+            lines.append(line)
+    return lines
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Measure what the nginx /api/ proxy adds per request")
+    parser.add_argument("--direct", default=config.BACKEND_URL, help="backend base URL, without the proxy")
+    parser.add_argument("--proxy", default=config.FRONTEND_URL, help="nginx base URL in front of it")
+    parser.add_argument("--variants", default=None,
+                        help=f"generate and run these configs instead of using --proxy as it is, "
+                             f"e.g. {','.join(DEFAULT_VARIANTS)}; 'all' runs every single change")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="nginx config the variants are generated from")
+    runner = parser.add_mutually_exclusive_group()
+    runner.add_argument("--nginx", default=None, help="nginx binary to run the variants with (default: from PATH)")
+    runner.add_argument("--docker", nargs="?", const=DEFAULT_IMAGE, default=None, metavar="IMAGE",
+                        help=f"run the variants in a host-network container (default image {DEFAULT_IMAGE})")
+    parser.add_argument("--write-configs", default=None, metavar="DIR",
+                        help="write the generated variant configs here and exit")
+    parser.add_argument("--mix", default=None, help="request mix, as for the load test")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests kept in flight")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per target and round")
+    parser.add_argument("--rounds", type=int, default=3, help="times each target is measured, in turns")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds of unrecorded load before each run")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request deadline in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the request mix")
+    parser.add_argument("--output", default=None, help="write the JSON report to this file")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        mix = loadtest.parse_mix(args.mix) if args.mix else None
+        loadtest.validate_load(args.concurrency)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    direct = args.direct.rstrip("/")
+    targets = [("direct", direct, None)]
+    workdirs = []
+    try:
+        if args.variants:
+            variants = list(VARIANTS) if args.variants == "all" else args.variants.split(",")
+            port = urlsplit(args.proxy).port or 80
+            binary = args.nginx or (None if args.docker else shutil.which("nginx"))
+            if not (binary or args.docker or args.write_configs):
+                print("Error: no nginx binary on PATH; pass --nginx, --docker or --write-configs")
+                return 2
+            with open(args.config) as f:
+                directives = parse_nginx(f.read())
+            for variant in variants:
+                workdir = tempfile.mkdtemp(prefix=f"bench-proxy-{variant}-")
+                workdirs.append(workdir)
+                text = generate(directives, variant, direct, port, None if args.docker or args.write_configs else workdir)
+                if args.write_configs:
+                    os.makedirs(args.write_configs, exist_ok=True)
+                    path = os.path.join(args.write_configs, f"nginx-{variant}.conf")
+                    with open(path, "w") as f:
+                        f.write(text)
+                    print(f"Wrote {path}")
+                    continue
+                targets.append((f"nginx {variant}", args.proxy.rstrip("/"),
+                                NginxProcess(text, port, workdir, binary, args.docker)))
+            if args.write_configs:
+                return 0
+        else:
+            targets.append(("nginx", args.proxy.rstrip("/"), None))
+
+        # Keep stdout a single JSON document in --json mode
+        progress = functools.partial(print, file=sys.stderr if args.json else sys.stdout)
+        progress(f"Benchmarking {len(targets)} targets at concurrency {args.concurrency}, "
+                 f"{args.rounds} x {args.duration:g}s each")
+        results = benchmark(targets, mix, args.concurrency, args.duration, args.rounds, args.warmup,
+                            args.timeout, args.seed, on_line=progress)
+    except (OSError, ManifestError, ProxyError) as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        for workdir in workdirs:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "schema_version": SCHEMA_VERSION,
+        "meta": {"direct": direct, "proxy": args.proxy, "config": args.config if args.variants else None,
+                 "concurrency": args.concurrency, "duration_s": args.duration, "rounds": args.rounds},
+        "targets": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        print("\n".join(format_results(results)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
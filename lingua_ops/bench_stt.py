@@ -0,0 +1,369 @@
+"""
+Load driver for the /api/speech-to-text upload path.
+
+Audio comes from recordings on disk (--file) or is generated once per
+duration and codec and cached in the cache directory. Generation writes a
+speech-like signal to a WAV file block by block. Codecs other than WAV are
+then encoded with ffmpeg. Each request streams its file as a chunked
+multipart/form-data body, reading the file in fixed-size chunks, so a file
+is never held in memory whole, however long the recording.
+
+Every request is timed in three parts:
+
+* upload: from the first byte sent until the last chunk has been handed to
+  the socket;
+* processing: from the end of the upload until the response headers arrive,
+  which is multer buffering the file plus the Google Speech call;
+* download: reading the (small) JSON response.
+
+Each file runs at each concurrency level in turn, so the report shows
+whether STT latency grows with the audio size on the wire or with the time
+the backend spends on it.
+"""
+
+import argparse
+import json
+import math
+import mimetypes
+import os
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+import wave
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import requests
+
+from lingua_ops import config
+from lingua_ops.http import pooled_session
+from lingua_ops.stats import summarize
+
+SCHEMA_VERSION = 1
+
+# codec -> (file extension, content type, ffmpeg encoder arguments; None for WAV written directly)
+CODECS = {
+    "webm": (".webm", "audio/webm", ["-c:a", "libopus", "-b:a", "32k"]),
+    "ogg": (".ogg", "audio/ogg", ["-c:a", "libopus", "-b:a", "32k"]),
+    "flac": (".flac", "audio/flac", ["-c:a", "flac"]),
+    "mp3": (".mp3", "audio/mpeg", ["-c:a", "libmp3lame", "-b:a", "64k"]),
+    "wav": (".wav", "audio/wav", None),
+}
+DEFAULT_DURATIONS = (2.0, 5.0, 15.0)
+DEFAULT_CONCURRENCY = (1, 4, 8)
+# speechService.speechToText configures Google Speech for 48 kHz WEBM_OPUS
+SAMPLE_RATE = 48000
+
+
+@dataclass
+class AudioFile:
+    name: str
+    path: str
+    content_type: str
+    size: int
+    duration: float = None
+
+
+@dataclass
+class SttSample:
+    status_code: int = None
+    upload: float = None
+    processing: float = None
+    download: float = None
+    total: float = 0.0
+    sent: int = 0
+    text: str = None
+    error: str = None
+
+    @property
+    def ok(self):
+        return self.error is None and self.status_code is not None and self.status_code < 400
+
+
+def write_wav(path, duration, sample_rate=SAMPLE_RATE):
+    """Write a mono 16-bit WAV of a voice-like signal one second at a time"""
+    with wave.open(path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        total = int(duration * sample_rate)
+        for start in range(0, total, sample_rate):
+            block = array("h", bytes(2 * min(sample_rate, total - start)))
+            for offset in range(len(block)):
+                t = (start + offset) / sample_rate
+                # A 140 Hz voiced tone with two formants, gated at a syllable-like 4 Hz
+                envelope = max(0.0, math.sin(2 * math.pi * 4 * t)) ** 2
+                value = (math.sin(2 * math.pi * 140 * t) + 0.5 * math.sin(2 * math.pi * 700 * t)
+                         + 0.3 * math.sin(2 * math.pi * 1200 * t))
+                block[offset] = int(9000 * envelope * value)
+            out.writeframes(block.tobytes())
+
+
+def generate_audio(duration, codec="webm", directory=None, file_option="--file"):
+    """Return an AudioFile for generated speech of the given duration, creating it on first use
+
+    file_option names the caller's flag for uploading a recording instead, for the missing-ffmpeg error.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec '{codec}'; expected one of {', '.join(CODECS)}")
+    extension, content_type, encoder = CODECS[codec]
+    directory = directory or os.path.join(config.CACHE_DIR, "stt-audio")
+    os.makedirs(directory, exist_ok=True)
+    name = f"speech-{duration:g}s{extension}"
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        if encoder is None:
+            write_wav(path + ".tmp", duration)
+        else:
+            if shutil.which("ffmpeg") is None:
+                raise ValueError(f"ffmpeg is needed to encode {codec}; install it, or use --codec wav or {file_option}")
+            source = os.path.join(directory, f"speech-{duration:g}s.source.wav")
+            write_wav(source, duration)
+            result = subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-i", source] + encoder
+                                    + ["-f", codec, path + ".tmp"], capture_output=True, text=True)
+            os.remove(source)
+            if result.returncode != 0:
+                raise ValueError(f"ffmpeg failed to encode {codec}: {result.stderr.strip()}")
+        os.replace(path + ".tmp", path)
+    return AudioFile(name, path, content_type, os.path.getsize(path), duration)
+
+
+def audio_from_disk(path):
+    """Return an AudioFile for an existing recording"""
+    if not os.path.isfile(path):
+        raise ValueError(f"No such audio file: {path}")
+    duration = None
+    if path.lower().endswith(".wav"):
+        try:
+            with wave.open(path, "rb") as f:
+                duration = f.getnframes() / f.getframerate()
+        except (wave.Error, EOFError):
+            duration = None
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return AudioFile(os.path.basename(path), path, content_type, os.path.getsize(path), duration)
+
+
+class UploadBody:
+    """
+    A multipart/form-data body streamed from disk. requests sends an iterable
+    body with chunked transfer encoding, one chunk per item, and asks for the
+    next item only after the previous one was written, so the time the
+    iterator runs out is the time the last byte reached the socket.
+    """
+
+    def __init__(self, audio, fields=None, chunk_size=64 * 1024):
+        if chunk_size < 1:
+            # f.read(0) returns b"" at once, which would upload an empty file part
+            raise ValueError(f"chunk_size must be at least 1 byte, got {chunk_size}")
+        self.audio = audio
+        self.fields = fields or {}
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex
+        self.sent = 0
+        self.finished = None
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def _parts(self):
+        for name, value in self.fields.items():
+            yield (f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                   f"{value}\r\n").encode("utf-8")
+        yield (f'--{self.boundary}\r\nContent-Disposition: form-data; name="file"; '
+               f'filename="{self.audio.name}"\r\nContent-Type: {self.audio.content_type}\r\n\r\n').encode("utf-8")
+        with open(self.audio.path, "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        yield f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+
+    def __iter__(self):
+        for part in self._parts():
+            self.sent += len(part)
+            yield part
+        self.finished = time.perf_counter()
+
+
+def upload(session, url, audio, language="en-US", timeout=60.0, chunk_size=64 * 1024):
+    """Stream one file to /api/speech-to-text and time the upload, processing and download separately"""
+    body = UploadBody(audio, {"language": language}, chunk_size)
+    sample = SttSample()
+    start = time.perf_counter()
+    try:
+        response = session.post(url, data=body, headers={"Content-Type": body.content_type},
+                                timeout=timeout, stream=True)
+        headers_at = time.perf_counter()
+        content = response.content
+    except requests.exceptions.RequestException as e:
+        sample.total = time.perf_counter() - start
+        sample.sent = body.sent
+        sample.error = str(e)
+        return sample
+    end = time.perf_counter()
+    # A server that answers before reading the whole body (e.g. 413) never finishes the upload
+    uploaded = body.finished or headers_at
+    sample.status_code = response.status_code
+    sample.upload = uploaded - start
+    sample.processing = headers_at - uploaded
+    sample.download = end - headers_at
+    sample.total = end - start
+    sample.sent = body.sent
+    if response.ok:
+        try:
+            sample.text = json.loads(content).get("text")
+        except (ValueError, AttributeError):
+            sample.error = "bad_json"
+    return sample
+
+
+class SttBench:
+    """Upload every audio file at each concurrency level and summarise where the time went"""
+
+    def __init__(self, base_url, audio, concurrency=DEFAULT_CONCURRENCY, requests_per_level=12,
+                 language="en-US", timeout=60.0, chunk_size=64 * 1024):
+        self.url = base_url.rstrip("/") + "/api/speech-to-text"
+        self.audio = list(audio)
+        self.concurrency = sorted(set(concurrency))
+        self.requests_per_level = requests_per_level
+        self.language = language
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.session = pooled_session(max(self.concurrency))
+
+    def _level(self, audio, concurrency):
+        """Send requests_per_level uploads keeping `concurrency` in flight"""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(
+                lambda _: upload(self.session, self.url, audio, self.language, self.timeout, self.chunk_size),
+                range(self.requests_per_level),
+            ))
+        elapsed = time.perf_counter() - start
+        done = [sample for sample in samples if sample.ok]
+        errors = {}
+        for sample in samples:
+            if not sample.ok:
+                reason = sample.error or f"HTTP {sample.status_code}"
+                errors[reason] = errors.get(reason, 0) + 1
+        upload_time = sum(sample.upload for sample in done)
+        total_time = sum(sample.total for sample in done)
+        return {
+            "concurrency": concurrency,
+            "upload": summarize([sample.upload for sample in done]),
+            "processing": summarize([sample.processing for sample in done]),
+            "download": summarize([sample.download for sample in done]),
+            "total": summarize([sample.total for sample in done]),
+            "upload_share": round(upload_time / total_time, 4) if total_time else None,
+            "upload_mb_per_s": round(sum(sample.sent for sample in done) / upload_time / 1e6, 2)
+            if upload_time else None,
+            "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+            "audio_s_per_s": round(len(done) * audio.duration / elapsed, 2) if elapsed and audio.duration else None,
+            "empty_transcripts": sum(1 for sample in done if not (sample.text or "").strip()),
+            "errors": errors,
+        }
+
+    def run(self, on_case=None):
+        started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        start = time.perf_counter()
+        cases = {}
+        # Levels run one after another so each measures the endpoint, not the other levels
+        for audio in self.audio:
+            for concurrency in self.concurrency:
+                case = self._level(audio, concurrency)
+                case.update(file=audio.name, content_type=audio.content_type, bytes=audio.size,
+                            duration_s=audio.duration)
+                cases[f"{audio.name}/c{concurrency}"] = case
+                if on_case:
+                    on_case(case)
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "meta": {
+                "url": self.url,
+                "started_at": started_at,
+                "language": self.language,
+                "requests_per_level": self.requests_per_level,
+                "chunk_size": self.chunk_size,
+                "concurrency": self.concurrency,
+                "duration_s": round(time.perf_counter() - start, 2),
+            },
+            "cases": cases,
+        }
+
+
+def format_case(case):
+    head = f"{case['file']:<20} {case['bytes'] / 1024:8.1f} KB  c={case['concurrency']:<3}"
+    if not case["total"]["count"]:
+        reasons = ", ".join(f"{reason} x{count}" for reason, count in case["errors"].items())
+        return [f"{head} all requests failed ({reasons})"]
+    errors = sum(case["errors"].values())
+    lines = [f"{head} total p50 {case['total']['p50_ms']:8.1f} ms  p90 {case['total']['p90_ms']:8.1f} ms  "
+             f"{case['throughput_rps']:5.1f} req/s  errors {errors}  empty {case['empty_transcripts']}"]
+    for part in ("upload", "processing", "download"):
+        summary = case[part]
+        lines.append(f"{'':<37} {part:<10} p50 {summary['p50_ms']:8.1f} ms  p90 {summary['p90_ms']:8.1f} ms  "
+                     f"max {summary['max_ms']:8.1f} ms")
+    lines.append(f"{'':<37} upload is {case['upload_share'] * 100:.1f}% of the time "
+                 f"at {case['upload_mb_per_s'] or 0:.1f} MB/s")
+    return lines
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Load-test /api/speech-to-text with streamed uploads")
+    parser.add_argument("--url", default=config.BACKEND_URL, help="backend base URL")
+    parser.add_argument("--file", action="append", default=[], help="audio file to upload (repeatable)")
+    parser.add_argument("--durations", default=",".join(f"{d:g}" for d in DEFAULT_DURATIONS),
+                        help="comma-separated seconds of generated audio (ignored with --file)")
+    parser.add_argument("--codec", default="webm", choices=sorted(CODECS), help="codec of generated audio")
+    parser.add_argument("--language", default="en-US", help="language field sent with each upload")
+    parser.add_argument("--concurrency", default=",".join(map(str, DEFAULT_CONCURRENCY)),
+                        help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=12, help="uploads per file and concurrency level")
+    parser.add_argument("--chunk-size", type=int, default=64, help="upload chunk size in KB")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--output", default=None, help="write the JSON report to this file")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.chunk_size < 1:
+            raise ValueError(f"--chunk-size must be at least 1 KB, got {args.chunk_size}")
+        if args.file:
+            audio = [audio_from_disk(path) for path in args.file]
+        else:
+            audio = [generate_audio(float(duration), args.codec) for duration in args.durations.split(",")]
+        levels = [int(level) for level in args.concurrency.split(",")]
+        if any(level < 1 for level in levels):
+            raise ValueError(f"Concurrency levels must be at least 1, got {args.concurrency}")
+        bench = SttBench(args.url, audio, levels,
+                         requests_per_level=args.requests, language=args.language, timeout=args.timeout,
+                         chunk_size=args.chunk_size * 1024)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+
+    show = None if args.json else (lambda case: print("\n".join(format_case(case)), flush=True))
+    report = bench.run(show)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.json:
+        print(text)
+    elif args.output:
+        print(f"Report written to {args.output}")
+    failed = [key for key, case in report["cases"].items() if not case["total"]["count"]]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
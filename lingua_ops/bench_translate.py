@@ -0,0 +1,306 @@
+"""
+Benchmark suite for the /api/translate endpoint.
+
+Every case is one language pair and one text length, from a single word to
+several paragraphs, with Hindi and Bengali sources and targets alongside the
+European ones. For each case the suite records:
+
+* the cold latency: the first request for that text in this run, before any
+  warm-up, which includes client initialisation and upstream cache misses;
+* warm latency and throughput at each concurrency level, from a fixed number
+  of requests kept N in flight over a shared keep-alive pool;
+* suspicious answers: an empty translation, the input echoed back, or output
+  that is not in the target script. The free Google Translate fallback in
+  translationService.translateText produces these silently when it fails.
+
+The JSON report has sorted keys and rounded figures, so two builds' reports
+can be compared with a plain diff or with --compare.
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from lingua_ops import config
+from lingua_ops.http import arequest, pooled_session
+from lingua_ops.stats import summarize
+
+SCHEMA_VERSION = 1
+
+SENTENCES = {
+    "en": [
+        "I am looking for a cotton t-shirt for my daughter.",
+        "Do you have these running shoes in size nine?",
+        "Please add the blue backpack to my cart and show me matching water bottles.",
+        "How long does delivery take to Kolkata, and can I pay cash on delivery?",
+    ],
+    "hi": [
+        "मैं अपनी बेटी के लिए एक सूती टी-शर्ट ढूंढ रहा हूँ।",
+        "क्या ये दौड़ने वाले जूते नौ नंबर में मिलेंगे?",
+        "कृपया नीला बैग मेरी कार्ट में डालें और उससे मिलती पानी की बोतलें दिखाएँ।",
+        "कोलकाता तक डिलीवरी में कितना समय लगता है, और क्या मैं नकद भुगतान कर सकता हूँ?",
+    ],
+    "bn": [
+        "আমি আমার মেয়ের জন্য একটি সুতির টি-শার্ট খুঁজছি।",
+        "এই দৌড়ের জুতোগুলো কি নয় নম্বর সাইজে পাওয়া যাবে?",
+        "অনুগ্রহ করে নীল ব্যাগটি আমার কার্টে যোগ করুন এবং মানানসই জলের বোতল দেখান।",
+        "কলকাতায় ডেলিভারি হতে কত সময় লাগে, এবং আমি কি ক্যাশ অন ডেলিভারি দিতে পারি?",
+    ],
+    "es": [
+        "Busco una camiseta de algodón para mi hija.",
+        "¿Tienen estas zapatillas para correr en la talla nueve?",
+        "Por favor, añade la mochila azul a mi carrito y muéstrame botellas de agua a juego.",
+        "¿Cuánto tarda la entrega a Calcuta y puedo pagar contra reembolso?",
+    ],
+}
+WORDS = {"en": "t-shirt", "hi": "जूते", "bn": "টি-শার্ট", "es": "camiseta"}
+
+LENGTHS = ("word", "sentence", "paragraph", "multi_paragraph")
+DEFAULT_PAIRS = ("en-es", "en-hi", "en-bn", "hi-en", "bn-en", "hi-bn")
+DEFAULT_CONCURRENCY = (1, 4, 16)
+
+# Unicode blocks used to check that the answer is in the target script
+SCRIPTS = {"hi": (0x0900, 0x097F), "bn": (0x0980, 0x09FF)}
+
+
+def sample_text(language, length):
+    """Return the benchmark text of one length class in one language"""
+    sentences = SENTENCES[language]
+    if length == "word":
+        return WORDS[language]
+    if length == "sentence":
+        return sentences[0]
+    paragraph = " ".join(sentences)
+    if length == "paragraph":
+        return paragraph
+    return "\n\n".join([paragraph] * 3)
+
+
+def parse_pair(text):
+    source, _, target = text.partition("-")
+    if source not in SENTENCES or not target:
+        raise ValueError(f"Unsupported pair '{text}'; sources are {', '.join(SENTENCES)}")
+    return source, target
+
+
+def check_translation(source, target, text, translated):
+    """Return why a translation looks wrong, or None if it looks plausible"""
+    if not translated or not translated.strip():
+        return "empty"
+    if source != target and translated.strip() == text.strip():
+        return "untranslated"
+    if target in SCRIPTS:
+        low, high = SCRIPTS[target]
+        letters = [ch for ch in translated if ch.isalpha()]
+        in_script = sum(1 for ch in letters if low <= ord(ch) <= high)
+        if letters and in_script / len(letters) < 0.5:
+            return "wrong_script"
+    return None
+
+
+class TranslateBench:
+    """Run the cold request and each concurrency level for every case"""
+
+    def __init__(self, base_url, pairs=DEFAULT_PAIRS, lengths=LENGTHS, concurrency=DEFAULT_CONCURRENCY,
+                 requests_per_level=20, timeout=30.0):
+        self.url = base_url.rstrip("/") + "/api/translate"
+        self.pairs = [parse_pair(pair) for pair in pairs]
+        self.lengths = list(lengths)
+        self.concurrency = sorted(set(concurrency))
+        self.requests_per_level = requests_per_level
+        self.timeout = timeout
+        self.session = pooled_session(max(self.concurrency))
+
+    async def _translate(self, source, target, text):
+        body = {"text": text, "from": source, "to": target}
+        response = await arequest("POST", self.url, json=body, deadline=self.timeout, session=self.session)
+        problem = None
+        if response.ok:
+            try:
+                problem = check_translation(source, target, text, response.json().get("translatedText"))
+            except (ValueError, AttributeError):
+                problem = "bad_json"
+        return response, problem
+
+    async def _level(self, source, target, text, concurrency):
+        """Send requests_per_level requests keeping `concurrency` in flight"""
+        remaining = iter(range(self.requests_per_level))
+        latencies, errors, problems = [], 0, {}
+
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                response, problem = await self._translate(source, target, text)
+                if response.ok:
+                    latencies.append(response.elapsed)
+                else:
+                    errors += 1
+                if problem:
+                    problems[problem] = problems.get(problem, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        section = summarize(latencies)
+        section["errors"] = errors
+        section["suspect"] = problems
+        section["throughput_rps"] = round(self.requests_per_level / elapsed, 2) if elapsed else None
+        section["chars_per_s"] = round(self.requests_per_level * len(text) / elapsed, 1) if elapsed else None
+        return section
+
+    async def run_case(self, source, target, length):
+        text = sample_text(source, length)
+        cold, problem = await self._translate(source, target, text)
+        case = {
+            "pair": f"{source}-{target}",
+            "length": length,
+            "chars": len(text),
+            "cold": {
+                "elapsed_ms": round(cold.elapsed * 1000, 2),
+                "status_code": cold.status_code,
+                "error": cold.error or (None if cold.ok else f"HTTP {cold.status_code}"),
+                "suspect": problem,
+            },
+            "warm": {},
+        }
+        for concurrency in self.concurrency:
+            case["warm"][str(concurrency)] = await self._level(source, target, text, concurrency)
+        return case
+
+    async def run(self, on_case=None):
+        started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        start = time.perf_counter()
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max(self.concurrency)))
+        cases = {}
+        # Cases run one after another so the concurrency levels measure the endpoint, not each other
+        for source, target in self.pairs:
+            for length in self.lengths:
+                case = await self.run_case(source, target, length)
+                cases[f"{case['pair']}/{length}"] = case
+                if on_case:
+                    on_case(case)
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "meta": {
+                "url": self.url,
+                "started_at": started_at,
+                "git_commit": _git_commit(),
+                "requests_per_level": self.requests_per_level,
+                "concurrency": self.concurrency,
+                "duration_s": round(time.perf_counter() - start, 2),
+            },
+            "cases": cases,
+        }
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def format_case(case):
+    cold = case["cold"]
+    flag = f" [{cold['suspect'] or cold['error']}]" if cold["suspect"] or cold["error"] else ""
+    lines = [f"{case['pair']:<6} {case['length']:<16} {case['chars']:>5} chars  cold {cold['elapsed_ms']:8.1f} ms{flag}"]
+    for concurrency, section in case["warm"].items():
+        if not section["count"]:
+            lines.append(f"       c={concurrency:<3} all {section['errors']} requests failed")
+            continue
+        suspect = sum(section["suspect"].values())
+        lines.append(
+            f"       c={concurrency:<3} p50 {section['p50_ms']:7.1f} ms  p90 {section['p90_ms']:7.1f} ms  "
+            f"p99 {section['p99_ms']:7.1f} ms  {section['throughput_rps']:6.1f} req/s  "
+            f"errors {section['errors']}  suspect {suspect}"
+        )
+    return lines
+
+
+def compare_reports(old, new, threshold=0.10):
+    """Return lines describing p50/p90 changes larger than threshold between two reports"""
+    lines = []
+    for key in sorted(set(old["cases"]) | set(new["cases"])):
+        if key not in old["cases"] or key not in new["cases"]:
+            lines.append(f"{key:<26} only in the {'new' if key in new['cases'] else 'old'} report")
+            continue
+        old_case, new_case = old["cases"][key], new["cases"][key]
+        for concurrency, section in new_case["warm"].items():
+            before = old_case["warm"].get(concurrency)
+            if not before:
+                continue
+            for metric in ("p50_ms", "p90_ms"):
+                if not before.get(metric) or section.get(metric) is None:
+                    continue
+                change = section[metric] / before[metric] - 1
+                if abs(change) >= threshold:
+                    lines.append(f"{key:<26} c={concurrency:<3} {metric} {before[metric]:8.1f} -> "
+                                 f"{section[metric]:8.1f} ms ({change * 100:+.0f}%)")
+        before, after = old_case["cold"]["elapsed_ms"], new_case["cold"]["elapsed_ms"]
+        if before and abs(after / before - 1) >= threshold:
+            lines.append(f"{key:<26} cold   {before:8.1f} -> {after:8.1f} ms ({(after / before - 1) * 100:+.0f}%)")
+    return lines
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Benchmark /api/translate across languages and loads")
+    parser.add_argument("--url", default=config.BACKEND_URL, help="backend base URL")
+    parser.add_argument("--pairs", default=",".join(DEFAULT_PAIRS), help="comma-separated source-target pairs")
+    parser.add_argument("--lengths", default=",".join(LENGTHS), help=f"comma-separated subset of {', '.join(LENGTHS)}")
+    parser.add_argument("--concurrency", default=",".join(map(str, DEFAULT_CONCURRENCY)),
+                        help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=20, help="requests per case and concurrency level")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request deadline in seconds")
+    parser.add_argument("--output", default=None, help="write the JSON report to this file")
+    parser.add_argument("--compare", default=None, help="earlier JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change --compare reports")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        lengths = [length.strip() for length in args.lengths.split(",")]
+        unknown = [length for length in lengths if length not in LENGTHS]
+        if unknown:
+            raise ValueError(f"Unknown length(s) {', '.join(unknown)}")
+        levels = [int(level) for level in args.concurrency.split(",")]
+        if any(level < 1 for level in levels):
+            raise ValueError(f"Concurrency levels must be at least 1, got {args.concurrency}")
+        bench = TranslateBench(args.url, [pair.strip() for pair in args.pairs.split(",")], lengths, levels,
+                               requests_per_level=args.requests, timeout=args.timeout)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+
+    show = None if args.json else (lambda case: print("\n".join(format_case(case)), flush=True))
+    report = asyncio.run(bench.run(show))
+    text = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.json:
+        print(text)
+    elif args.output:
+        print(f"Report written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            changes = compare_reports(json.load(f), report, args.threshold)
+        # Keep stdout a single JSON document in --json mode
+        stream = sys.stderr if args.json else sys.stdout
+        print(f"\nChanges against {args.compare} (threshold {args.threshold:.0%}):", file=stream)
+        print("\n".join(changes) if changes else "   none", file=stream)
+    failed = [key for key, case in report["cases"].items()
+              if case["cold"]["error"] or any(not section["count"] for section in case["warm"].values())]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""
+Latency and payload profiler for /api/tts, with a response-cache estimate.
+
+The sweep sends the benchmark sentences from bench_translate, in every
+language and text length, and sends each one several times in a row. For
+each case it records:
+
+* time to first byte and total latency, first request and repeats;
+* payload size and bytes per character, and whether the backend answered
+  with audio or the JSON of textToSpeech's mock mode;
+* whether identical requests got byte-identical audio back, which is what
+  makes the responses cacheable at all.
+
+Latency and payload size are then fitted as straight lines over the text
+length. Given a captured request log (the JSON-lines format replay-requests.py
+reads), the profiler finds the identical repeated /api/tts requests in that
+mix and simulates LRU caches of several sizes over it. With the fitted lines
+it reports the synthesis calls, billed characters, backend time and response
+bytes each cache would have saved.
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import requests
+
+from lingua_ops import config
+from lingua_ops.bench_translate import LENGTHS, sample_text
+from lingua_ops.http import pooled_session
+from lingua_ops.replay import iter_records
+from lingua_ops.stats import fit_line, summarize
+
+SCHEMA_VERSION = 1
+
+# Benchmark language -> language code sent to textToSpeech
+TTS_LANGUAGES = {"en": "en-US", "hi": "hi-IN", "bn": "bn-IN", "es": "es-ES"}
+DEFAULT_LENGTHS = ("word", "sentence", "paragraph")
+DEFAULT_CACHE_SIZES = (100, 1000, 0)
+
+
+@dataclass
+class TtsSample:
+    status_code: int = None
+    ttfb: float = None
+    total: float = 0.0
+    size: int = 0
+    content_type: str = None
+    digest: str = None
+    error: str = None
+
+    @property
+    def ok(self):
+        return self.error is None and self.status_code is not None and self.status_code < 400
+
+    @property
+    def audio(self):
+        return (self.content_type or "").startswith("audio/")
+
+
+def synthesize(session, url, text, language, timeout=30.0):
+    """Send one /api/tts request, timing the first body byte and the whole response"""
+    sample = TtsSample()
+    digest = hashlib.sha256()
+    start = time.perf_counter()
+    try:
+        response = session.post(url, json={"text": text, "language": language}, timeout=timeout, stream=True)
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            if sample.ttfb is None:
+                sample.ttfb = time.perf_counter() - start
+            sample.size += len(chunk)
+            digest.update(chunk)
+    except requests.exceptions.RequestException as e:
+        sample.total = time.perf_counter() - start
+        sample.error = str(e)
+        return sample
+    sample.total = time.perf_counter() - start
+    if sample.ttfb is None:
+        sample.ttfb = sample.total
+    sample.status_code = response.status_code
+    sample.content_type = response.headers.get("Content-Type", "").split(";")[0]
+    sample.digest = digest.hexdigest()
+    return sample
+
+
+class TtsProfiler:
+    """Sweep text length and language through /api/tts"""
+
+    def __init__(self, base_url, languages=tuple(TTS_LANGUAGES), lengths=DEFAULT_LENGTHS, repeats=3, timeout=30.0):
+        unknown = [language for language in languages if language not in TTS_LANGUAGES]
+        if unknown:
+            raise ValueError(f"Unsupported language(s) {', '.join(unknown)}; expected {', '.join(TTS_LANGUAGES)}")
+        self.url = base_url.rstrip("/") + "/api/tts"
+        self.languages = list(languages)
+        self.lengths = list(lengths)
+        self.repeats = max(1, repeats)
+        self.timeout = timeout
+        self.session = pooled_session(1)
+
+    def run_case(self, language, length):
+        text = sample_text(language, length)
+        samples = [synthesize(self.session, self.url, text, TTS_LANGUAGES[language], self.timeout)
+                   for _ in range(self.repeats)]
+        first, done = samples[0], [sample for sample in samples if sample.ok]
+        return {
+            "language": TTS_LANGUAGES[language],
+            "length": length,
+            "chars": len(text),
+            "first": {
+                "ttfb_ms": round(first.ttfb * 1000, 2) if first.ttfb is not None else None,
+                "total_ms": round(first.total * 1000, 2),
+                "status_code": first.status_code,
+                "error": first.error or (None if first.ok else f"HTTP {first.status_code}"),
+            },
+            "ttfb": summarize([sample.ttfb for sample in done]),
+            "total": summarize([sample.total for sample in done]),
+            "repeat_total": summarize([sample.total for sample in done[1:]]),
+            "bytes": done[0].size if done else None,
+            "bytes_per_char": round(done[0].size / len(text), 1) if done else None,
+            "content_type": done[0].content_type if done else None,
+            "audio": bool(done) and all(sample.audio for sample in done),
+            "identical": len({sample.digest for sample in done}) == 1 if len(done) > 1 else None,
+            "errors": len(samples) - len(done),
+            "_points": [(len(text), sample.total * 1000, sample.size) for sample in done],
+        }
+
+    def run(self, on_case=None):
+        started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        start = time.perf_counter()
+        cases, points = {}, []
+        for language in self.languages:
+            for length in self.lengths:
+                case = self.run_case(language, length)
+                points.extend(case.pop("_points"))
+                cases[f"{case['language']}/{length}"] = case
+                if on_case:
+                    on_case(case)
+        latency = fit_line([(chars, elapsed_ms) for chars, elapsed_ms, _ in points])
+        size = fit_line([(chars, size) for chars, _, size in points])
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "meta": {
+                "url": self.url,
+                "started_at": started_at,
+                "repeats": self.repeats,
+                "duration_s": round(time.perf_counter() - start, 2),
+            },
+            "cases": cases,
+            "model": {
+                "latency_ms": {"intercept": round(latency[0], 2), "per_char": round(latency[1], 4)},
+                "bytes": {"intercept": round(size[0], 1), "per_char": round(size[1], 2)},
+            },
+        }
+
+
+def tts_requests(path, skipped=None):
+    """Yield (language, text) for every /api/tts request in a replay capture, in order"""
+    for record in iter_records(path, skipped):
+        if record.method == "POST" and record.path.split("?", 1)[0] == "/api/tts":
+            body = record.json if isinstance(record.json, dict) else {}
+            yield body.get("language") or "en-US", (body.get("text") or "").strip()
+
+
+def cache_savings(requests_iter, model, cache_sizes=DEFAULT_CACHE_SIZES, top=10):
+    """
+    Simulate LRU response caches (size 0 = unbounded) over a request stream and
+    estimate what each would have saved using the fitted latency and size model.
+    """
+    latency, payload_size = model["latency_ms"], model["bytes"]
+
+    def cost(chars):
+        return (max(0.0, latency["intercept"] + latency["per_char"] * chars),
+                max(0.0, payload_size["intercept"] + payload_size["per_char"] * chars))
+
+    caches = {limit: OrderedDict() for limit in cache_sizes}
+    saved = {limit: {"hits": 0, "chars": 0, "backend_ms": 0.0, "bytes": 0.0} for limit in cache_sizes}
+    counts = Counter()
+    examples = {}
+    total = {"requests": 0, "chars": 0, "backend_ms": 0.0, "bytes": 0.0}
+    for language, text in requests_iter:
+        key = hashlib.sha1(f"{language}\0{text}".encode("utf-8")).digest()
+        elapsed_ms, payload = cost(len(text))
+        total["requests"] += 1
+        total["chars"] += len(text)
+        total["backend_ms"] += elapsed_ms
+        total["bytes"] += payload
+        counts[key] += 1
+        examples.setdefault(key, (language, text[:60]))
+        for limit, cache in caches.items():
+            if key in cache:
+                cache.move_to_end(key)
+                entry = saved[limit]
+                entry["hits"] += 1
+                entry["chars"] += len(text)
+                entry["backend_ms"] += elapsed_ms
+                entry["bytes"] += payload
+                continue
+            cache[key] = True
+            if limit and len(cache) > limit:
+                cache.popitem(last=False)
+
+    requests_total = total["requests"]
+    return {
+        "requests": requests_total,
+        "unique": len(counts),
+        "duplicate_rate": round(1 - len(counts) / requests_total, 4) if requests_total else 0.0,
+        "chars": total["chars"],
+        "backend_s": round(total["backend_ms"] / 1000, 2),
+        "bytes": int(total["bytes"]),
+        "top": [{"count": count, "language": examples[key][0], "text": examples[key][1]}
+                for key, count in counts.most_common(top) if count > 1],
+        "caches": {
+            str(limit or "unbounded"): {
+                "hits": entry["hits"],
+                "hit_rate": round(entry["hits"] / requests_total, 4) if requests_total else 0.0,
+                "chars_saved": entry["chars"],
+                "backend_s_saved": round(entry["backend_ms"] / 1000, 2),
+                "mean_ms_saved_per_request": round(entry["backend_ms"] / requests_total, 2) if requests_total else 0.0,
+                "bytes_saved": int(entry["bytes"]),
+            }
+            for limit, entry in saved.items()
+        },
+    }
+
+
+def format_case(case):
+    first = case["first"]
+    head = f"{case['language']:<6} {case['length']:<16} {case['chars']:>5} chars"
+    if not case["total"]["count"]:
+        return [f"{head}  all requests failed ({first['error']})"]
+    kind = case["content_type"] if case["audio"] else f"{case['content_type']} (no audio)"
+    identical = {True: "identical", False: "DIFFERENT", None: "-"}[case["identical"]]
+    return [
+        f"{head}  first {first['total_ms']:8.1f} ms (ttfb {first['ttfb_ms']:.1f})  "
+        f"repeat p50 {case['repeat_total']['p50_ms'] or 0:8.1f} ms  "
+        f"{case['bytes'] / 1024:7.1f} KB  {case['bytes_per_char']:6.1f} B/char  {kind}  repeats {identical}"
+    ]
+
+
+def format_savings(savings):
+    lines = [
+        f"{savings['requests']} TTS requests, {savings['unique']} distinct "
+        f"({savings['duplicate_rate'] * 100:.1f}% exact repeats), {savings['chars']} characters, "
+        f"~{savings['backend_s']:.1f}s of synthesis, ~{savings['bytes'] / 1e6:.1f} MB of audio",
+        f"  {'CACHE':<10} {'HIT RATE':>8} {'CALLS SAVED':>12} {'CHARS SAVED':>12} {'TIME SAVED':>11} {'MB SAVED':>9}",
+    ]
+    for limit, cache in savings["caches"].items():
+        lines.append(f"  {limit:<10} {cache['hit_rate'] * 100:>7.1f}% {cache['hits']:>12} {cache['chars_saved']:>12} "
+                     f"{cache['backend_s_saved']:>10.1f}s {cache['bytes_saved'] / 1e6:>9.2f}")
+    if savings["top"]:
+        lines.append("  Most repeated:")
+        for item in savings["top"]:
+            lines.append(f"    {item['count']:>6}x  {item['language']:<6} {item['text']!r}")
+    return lines
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Profile /api/tts latency and payload size, "
+                                                           "and estimate what a response cache would save")
+    parser.add_argument("--url", default=config.BACKEND_URL, help="backend base URL")
+    parser.add_argument("--languages", default=",".join(TTS_LANGUAGES), help="comma-separated subset of "
+                                                                             f"{', '.join(TTS_LANGUAGES)}")
+    parser.add_argument("--lengths", default=",".join(DEFAULT_LENGTHS), help=f"comma-separated subset of {', '.join(LENGTHS)}")
+    parser.add_argument("--repeats", type=int, default=3, help="identical requests per case")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--capture", default=None, help="request log (JSON lines, .gz ok) to estimate cache savings on")
+    parser.add_argument("--cache-sizes", default=",".join(map(str, DEFAULT_CACHE_SIZES)),
+                        help="comma-separated LRU cache sizes to simulate (0 = unbounded)")
+    parser.add_argument("--output", default=None, help="write the JSON report to this file")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        lengths = [length.strip() for length in args.lengths.split(",")]
+        unknown = [length for length in lengths if length not in LENGTHS]
+        if unknown:
+            raise ValueError(f"Unknown length(s) {', '.join(unknown)}")
+        cache_sizes = [int(size) for size in args.cache_sizes.split(",")]
+        profiler = TtsProfiler(args.url, [language.strip() for language in args.languages.split(",")], lengths,
+                               repeats=args.repeats, timeout=args.timeout)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+
+    show = None if args.json else (lambda case: print("\n".join(format_case(case)), flush=True))
+    report = profiler.run(show)
+    if not args.json:
+        model = report["model"]
+        print(f"\nModel: {model['latency_ms']['intercept']:.1f} ms + {model['latency_ms']['per_char']:.3f} ms/char, "
+              f"{model['bytes']['intercept']:.0f} B + {model['bytes']['per_char']:.1f} B/char")
+    if args.capture:
+        skipped = [0]
+        try:
+            report["cache"] = cache_savings(tts_requests(args.capture, skipped), report["model"], cache_sizes)
+        except OSError as e:
+            print(f"Error: {e}")
+            return 2
+        report["cache"]["skipped_lines"] = skipped[0]
+        if not args.json:
+            print(f"\nCache estimate for {args.capture}:")
+            print("\n".join(format_savings(report["cache"])))
+
+    text = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.json:
+        print(text)
+    elif args.output:
+        print(f"Report written to {args.output}")
+    failed = [key for key, case in report["cases"].items() if not case["total"]["count"]]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
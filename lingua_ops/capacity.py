@@ -0,0 +1,435 @@
+"""
+Capacity planning for the backend from a measured latency-vs-concurrency curve.
+
+`measure` runs the closed-loop load test against a single backend pod (e.g.
+through `kubectl port-forward pod/<name> 3002`) at increasing concurrency
+levels. Each level records throughput, latency percentiles and error rate.
+With --pod it also records the pod's CPU and memory usage from
+metrics-server, so levels should then run for a minute or more: the
+metrics API reports usage averaged over its scrape window. The curve is
+written as JSON.
+
+`plan` reads a curve and works out how many requests per second one pod
+serves before p95 latency crosses the SLO, interpolating between the two
+levels either side of it. Keeping --headroom of that in reserve gives the
+per-pod load the HPA should hold. From there it recommends:
+
+* minReplicas and maxReplicas for the target peak rate, plus one spare pod
+  for rolling updates and node loss;
+* CPU requests equal to the fitted usage at capacity, and an HPA CPU target
+  equal to the utilization at the reserved load;
+* memory requests and a limit from the peak usage. Memory only goes into
+  the HPA when it actually grows with load.
+
+It prints the reasoning and can write the values as a kustomize
+strategic-merge patch.
+"""
+
+import argparse
+import functools
+import json
+import math
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+from lingua_ops import config, loadtest
+from lingua_ops.stats import fit_line, percentile
+
+SCHEMA_VERSION = 1
+DEFAULT_LEVELS = (1, 2, 4, 8, 16, 32)
+METRICS_PATH = "/apis/metrics.k8s.io/v1beta1/namespaces/{namespace}/pods/{name}"
+
+# Rounding steps for resource requests
+CPU_STEP_M = 50
+MEMORY_STEP_MI = 64
+
+
+class PlanError(Exception):
+    """Raised when a curve cannot support a recommendation"""
+
+
+def parse_cpu(quantity):
+    """Kubernetes CPU quantity ('250m', '1', '123456789n') in millicores"""
+    units = {"n": 1e-6, "u": 1e-3, "m": 1.0}
+    if quantity[-1] in units:
+        return float(quantity[:-1]) * units[quantity[-1]]
+    return float(quantity) * 1000
+
+
+def parse_memory(quantity):
+    """Kubernetes memory quantity ('128Mi', '123456Ki', '1G') in MiB"""
+    units = {"Ki": 1 / 1024, "Mi": 1, "Gi": 1024, "K": 1000 / 1048576, "M": 1e6 / 1048576, "G": 1e9 / 1048576}
+    for suffix in sorted(units, key=len, reverse=True):
+        if quantity.endswith(suffix):
+            return float(quantity[:-len(suffix)]) * units[suffix]
+    return float(quantity) / 1048576
+
+
+def round_up(value, step):
+    return int(math.ceil(value / step) * step)
+
+
+@dataclass
+class Level:
+    concurrency: int
+    requests: int
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    error_rate: float
+    cpu_m: float = None
+    memory_mi: float = None
+
+
+class UsageSampler:
+    """Poll metrics-server for one pod's CPU and memory on a background thread"""
+
+    def __init__(self, cluster, pod, container=None, interval=5.0):
+        self.cluster = cluster
+        self.path = METRICS_PATH.format(namespace=cluster.namespace, name=pod)
+        self.container = container
+        self.interval = interval
+        self.samples = []
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        from lingua_ops.cluster import ClusterError
+
+        while not self._stop.is_set():
+            try:
+                metrics = self.cluster.request("GET", self.path)
+                containers = [item for item in metrics.get("containers", [])
+                              if self.container in (None, item["name"])]
+                self.samples.append((
+                    time.monotonic(),
+                    sum(parse_cpu(item["usage"]["cpu"]) for item in containers),
+                    sum(parse_memory(item["usage"]["memory"]) for item in containers),
+                ))
+            except (ClusterError, KeyError, ValueError) as e:
+                self.error = str(e)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def window(self, start, end):
+        """Mean CPU and peak memory sampled in [start, end], skipping the first third while load ramps up"""
+        settled = start + (end - start) / 3
+        inside = [(cpu, memory) for at, cpu, memory in self.samples if settled <= at <= end]
+        if not inside:
+            return None, None
+        return sum(cpu for cpu, _ in inside) / len(inside), max(memory for _, memory in inside)
+
+
+def measure_level(url, concurrency, duration, mix=None, timeout=10.0):
+    report = loadtest.run(url, mix, concurrency=concurrency, duration=duration, timeout=timeout)
+    latencies = sorted(sample.elapsed for sample in report.samples)
+    ok = sum(1 for sample in report.samples if sample.ok)
+    return Level(
+        concurrency=concurrency,
+        requests=len(latencies),
+        throughput_rps=round(ok / report.duration, 2) if report.duration else 0.0,
+        p50_ms=round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        p95_ms=round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        p99_ms=round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        error_rate=round(1 - ok / len(latencies), 4) if latencies else 1.0,
+    )
+
+
+def measure(url=None, levels=DEFAULT_LEVELS, duration=30.0, mix=None, pod=None, container=None,
+            timeout=10.0, on_line=print):
+    """Load one pod at each concurrency level and return the curve as a dict"""
+    url = (url or config.BACKEND_URL).rstrip("/")
+    sampler = None
+    if pod:
+        from lingua_ops.cluster import connect
+
+        sampler = UsageSampler(connect(), pod, container).start()
+    measured = []
+    try:
+        for concurrency in levels:
+            start = time.monotonic()
+            level = measure_level(url, concurrency, duration, mix, timeout)
+            if sampler:
+                level.cpu_m, level.memory_mi = sampler.window(start, time.monotonic())
+            measured.append(level)
+            on_line(format_level(level))
+    finally:
+        if sampler:
+            sampler.stop()
+    if sampler and sampler.error and not any(level.cpu_m is not None for level in measured):
+        on_line(f"No pod metrics collected: {sampler.error}")
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "meta": {
+            "url": url,
+            "pod": pod,
+            "container": container,
+            "duration_s": duration,
+            "mix": mix and {spec.name: spec.weight for spec in mix},
+            "measured_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "levels": [asdict(level) for level in measured],
+    }
+
+
+def format_level(level):
+    usage = ""
+    if level.cpu_m is not None:
+        usage = f"  cpu {level.cpu_m:>6.0f}m  mem {level.memory_mi:>6.0f}Mi"
+    return (f"  c={level.concurrency:<4} {level.throughput_rps:>8.1f} req/s  p50 {level.p50_ms or 0:>7.1f} ms  "
+            f"p95 {level.p95_ms or 0:>7.1f} ms  errors {level.error_rate * 100:5.1f}%{usage}")
+
+
+@dataclass
+class Plan:
+    target_rps: float
+    slo_p95_ms: float
+    headroom: float
+    capacity_rps: float
+    safe_rps: float
+    min_replicas: int
+    max_replicas: int
+    cpu_request_m: int = None
+    cpu_target: int = None
+    memory_request_mi: int = None
+    memory_limit_mi: int = None
+    memory_target: int = None
+    notes: list = field(default_factory=list)
+
+    def to_dict(self):
+        return asdict(self)
+
+    def format(self):
+        lines = [
+            f"One pod serves {self.capacity_rps:.1f} req/s before p95 exceeds {self.slo_p95_ms:g} ms; "
+            f"holding {self.headroom:.0%} in reserve leaves {self.safe_rps:.1f} req/s per pod",
+            f"  replicas        min {self.min_replicas}, max {self.max_replicas} "
+            f"(for {self.target_rps:g} req/s at peak)",
+        ]
+        if self.cpu_request_m is not None:
+            lines.append(f"  cpu             request {self.cpu_request_m}m, HPA target {self.cpu_target}%")
+        if self.memory_request_mi is not None:
+            target = f", HPA target {self.memory_target}%" if self.memory_target else ", not in the HPA"
+            lines.append(f"  memory          request {self.memory_request_mi}Mi, "
+                         f"limit {self.memory_limit_mi}Mi{target}")
+        lines.extend(f"  note: {note}" for note in self.notes)
+        return lines
+
+
+def capacity_at_slo(levels, slo_ms, max_error_rate):
+    """Requests per second one pod sustains with p95 at the SLO; returns (rps, crossed)"""
+    usable = sorted((level for level in levels if level.p95_ms is not None), key=lambda level: level.concurrency)
+    previous = None
+    for level in usable:
+        if level.p95_ms > slo_ms or level.error_rate > max_error_rate:
+            if previous is None:
+                raise PlanError(f"p95 is already {level.p95_ms:g} ms (errors {level.error_rate:.1%}) "
+                                f"at concurrency {level.concurrency}; the SLO cannot be met by adding pods")
+            if level.error_rate > max_error_rate or level.throughput_rps <= previous.throughput_rps:
+                return previous.throughput_rps, True
+            fraction = (slo_ms - previous.p95_ms) / (level.p95_ms - previous.p95_ms)
+            return previous.throughput_rps + fraction * (level.throughput_rps - previous.throughput_rps), True
+        previous = level
+    if previous is None:
+        raise PlanError("the curve has no measured levels")
+    return max(level.throughput_rps for level in usable), False
+
+
+def plan(curve, target_rps, slo_ms, headroom=0.3, base_rps=0.0, max_error_rate=0.01):
+    """Turn a measured curve into replica, HPA and resource recommendations"""
+    levels = [Level(**level) for level in curve["levels"]]
+    capacity, crossed = capacity_at_slo(levels, slo_ms, max_error_rate)
+    safe = capacity * (1 - headroom)
+    if safe <= 0:
+        raise PlanError("no throughput measured below the SLO")
+    peak_pods = math.ceil(target_rps / safe)
+    min_replicas = max(2, math.ceil(base_rps / safe))
+    result = Plan(
+        target_rps=target_rps,
+        slo_p95_ms=slo_ms,
+        headroom=headroom,
+        capacity_rps=round(capacity, 2),
+        safe_rps=round(safe, 2),
+        min_replicas=min_replicas,
+        max_replicas=max(min_replicas, peak_pods) + 1,
+    )
+    if not crossed:
+        result.notes.append(f"p95 never reached {slo_ms:g} ms in the measured levels; capacity is at least "
+                            f"{capacity:.1f} req/s, so measure higher concurrency for a tighter plan")
+    result.notes.append(f"maxReplicas is {peak_pods} pods for the peak plus one spare for rolling updates and node loss")
+
+    measured = [level for level in levels if level.cpu_m is not None and level.throughput_rps > 0]
+    if len(measured) < 2:
+        result.notes.append("no pod metrics in the curve (measure with --pod); resource requests and HPA "
+                            "utilization targets cannot be derived, and Utilization metrics are ignored "
+                            "by the HPA while the containers have no requests")
+        return result
+
+    idle_cpu, cpu_per_rps = fit_line([(level.throughput_rps, level.cpu_m) for level in measured])
+    cpu_at_capacity = idle_cpu + cpu_per_rps * capacity
+    result.cpu_request_m = max(CPU_STEP_M, round_up(cpu_at_capacity, CPU_STEP_M))
+    utilization = (idle_cpu + cpu_per_rps * safe) / result.cpu_request_m * 100
+    result.cpu_target = int(min(90, max(30, utilization // 5 * 5)))
+    result.notes.append(f"CPU grows {cpu_per_rps:.1f}m per req/s from {max(idle_cpu, 0):.0f}m idle; "
+                        f"{cpu_at_capacity:.0f}m at capacity. No CPU limit, so bursts are not throttled")
+
+    idle_memory, memory_per_rps = fit_line([(level.throughput_rps, level.memory_mi) for level in measured])
+    peak_memory = max(level.memory_mi for level in measured)
+    result.memory_request_mi = round_up(peak_memory * 1.25, MEMORY_STEP_MI)
+    result.memory_limit_mi = round_up(result.memory_request_mi * 1.5, MEMORY_STEP_MI)
+    growth = memory_per_rps * capacity / idle_memory if idle_memory > 0 else 0
+    if growth >= 0.2:
+        result.memory_target = int(min(90, (idle_memory + memory_per_rps * safe) / result.memory_request_mi * 100))
+    else:
+        result.notes.append(f"memory grows only {growth:.0%} from idle to capacity, so it is left out of the "
+                            f"HPA; it would scale on heap size rather than load")
+    return result
+
+
+def to_yaml(value, indent=0):
+    """Render dicts, lists and scalars as block-style YAML"""
+    pad = "  " * indent
+    lines = []
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (dict, list)) and item:
+                lines.append(f"{pad}{key}:")
+                lines.append(to_yaml(item, indent + 1 if isinstance(item, dict) else indent))
+            else:
+                lines.append(f"{pad}{key}: {json.dumps(item) if isinstance(item, str) and ':' in item else item}")
+    else:
+        for item in value:
+            body = to_yaml(item, indent + 1).splitlines()
+            lines.append(f"{pad}- {body[0].lstrip()}")
+            lines.extend(body[1:])
+    return "\n".join(lines)
+
+
+def kustomize_patch(result, deployment="lingua-backend", container="lingua-backend", hpa="lingua-backend-hpa",
+                    comment=None):
+    """Strategic-merge patch for the Deployment and its HPA"""
+    documents = []
+    deployment_spec = {"replicas": result.min_replicas}
+    if result.cpu_request_m is not None:
+        resources = {"requests": {"cpu": f"{result.cpu_request_m}m", "memory": f"{result.memory_request_mi}Mi"},
+                     "limits": {"memory": f"{result.memory_limit_mi}Mi"}}
+        deployment_spec["template"] = {"spec": {"containers": [{"name": container, "resources": resources}]}}
+    documents.append({"apiVersion": "apps/v1", "kind": "Deployment", "metadata": {"name": deployment},
+                      "spec": deployment_spec})
+    hpa_spec = {"minReplicas": result.min_replicas, "maxReplicas": result.max_replicas}
+    metrics = []
+    for name, target in (("cpu", result.cpu_target), ("memory", result.memory_target)):
+        if target:
+            metrics.append({"type": "Resource", "resource": {
+                "name": name, "target": {"type": "Utilization", "averageUtilization": target}}})
+    if metrics:
+        hpa_spec["metrics"] = metrics
+    documents.append({"apiVersion": "autoscaling/v2", "kind": "HorizontalPodAutoscaler", "metadata": {"name": hpa},
+                      "spec": hpa_spec})
+    header = f"# {comment}\n" if comment else ""
+    return header + "\n---\n".join(to_yaml(document) for document in documents) + "\n"
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Size replicas, HPA targets and resource requests from a load curve")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_plan_options(command, required):
+        command.add_argument("--target-rps", type=float, required=required, help="peak requests per second to serve")
+        command.add_argument("--slo-p95", type=float, default=1000.0, help="p95 latency objective in ms")
+        command.add_argument("--headroom", type=float, default=0.3,
+                             help="share of per-pod capacity kept in reserve for bursts and scale-up lag")
+        command.add_argument("--base-rps", type=float, default=0.0,
+                             help="off-peak rate minReplicas must absorb without scaling")
+        command.add_argument("--max-error-rate", type=float, default=0.01, help="levels above this do not count")
+        command.add_argument("--deployment", default="lingua-backend", help="Deployment to patch")
+        command.add_argument("--container", default="lingua-backend", help="container to size")
+        command.add_argument("--hpa", default="lingua-backend-hpa", help="HorizontalPodAutoscaler to patch")
+        command.add_argument("--patch", default=None, help="write a kustomize patch here, e.g. k8s/capacity-patch.yaml")
+        command.add_argument("--json", action="store_true", help="print the plan as JSON")
+
+    measure_command = commands.add_parser("measure", help="load one pod at increasing concurrency")
+    measure_command.add_argument("--url", default=config.BACKEND_URL, help="base URL of a single backend pod")
+    measure_command.add_argument("--levels", default=",".join(map(str, DEFAULT_LEVELS)),
+                                 help="comma-separated concurrency levels")
+    measure_command.add_argument("--duration", type=float, default=30.0, help="seconds per level")
+    measure_command.add_argument("--mix", default=None, help="request mix, as for the load test")
+    measure_command.add_argument("--timeout", type=float, default=10.0, help="per-request deadline in seconds")
+    measure_command.add_argument("--pod", default=None, help="pod to read CPU and memory usage from")
+    measure_command.add_argument("--output", default="capacity-curve.json", help="where to write the curve")
+    add_plan_options(measure_command, required=False)
+
+    plan_command = commands.add_parser("plan", help="recommend settings from a measured curve")
+    plan_command.add_argument("curve", help="curve JSON written by measure")
+    add_plan_options(plan_command, required=True)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "measure":
+        try:
+            levels = [int(item) for item in args.levels.split(",")]
+            for level in levels:
+                loadtest.validate_load(level)
+            mix = loadtest.parse_mix(args.mix) if args.mix else None
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 2
+        # Keep stdout a single JSON document in --json mode
+        progress = functools.partial(print, file=sys.stderr if args.json else sys.stdout)
+        progress(f"Measuring {args.url} at concurrency {', '.join(map(str, levels))} ({args.duration:g}s each)")
+        curve = measure(args.url, levels, args.duration, mix, args.pod, args.container, args.timeout,
+                        on_line=progress)
+        with open(args.output, "w") as f:
+            json.dump(curve, f, indent=2)
+        progress(f"Curve written to {args.output}")
+        if args.target_rps is None:
+            return 0
+        source = args.output
+    else:
+        with open(args.curve) as f:
+            curve = json.load(f)
+        if curve.get("schema_version") != SCHEMA_VERSION:
+            print(f"Error: {args.curve} has schema version {curve.get('schema_version')}, expected {SCHEMA_VERSION}")
+            return 2
+        source = args.curve
+
+    try:
+        result = plan(curve, args.target_rps, args.slo_p95, args.headroom, args.base_rps, args.max_error_rate)
+    except PlanError as e:
+        print(f"Error: {e}")
+        return 1
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        if args.command == "plan":
+            for level in curve["levels"]:
+                print(format_level(Level(**level)))
+        print("\n".join(result.format()))
+    if args.patch:
+        comment = (f"Generated by plan-capacity.py from {source}: {args.target_rps:g} req/s peak, "
+                   f"p95 SLO {args.slo_p95:g} ms, {args.headroom:.0%} headroom")
+        with open(args.patch, "w") as f:
+            f.write(kustomize_patch(result, args.deployment, args.container, args.hpa, comment))
+        if not args.json:
+            print(f"\nPatch written to {args.patch}; apply it with these k8s/kustomization.yaml entries "
+                  f"(the HPA must be one of the resources for its patch to match):")
+            print("resources:\n- hpa.yaml\npatches:\n- path: " + args.patch.split("/")[-1])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Single entry point for the Lingua Phone operations tooling.
+
+    python lingua-ops.py status --json-lines
+    python lingua-ops.py logs --follow --level warn
+    python lingua-ops.py bench translate --concurrency 1,8
+    python -m lingua_ops probe --json
+
+Subcommands are named in COMMANDS and only imported when they run, so
+`lingua-ops status` does not pay for the benchmark modules. Until the first
+API call goes out it does not pay for requests either. A subcommand is
+either a lingua_ops module's main(argv) or one of the scripts in the
+repository root, run as if it had been started directly. Both run inside
+this one process, so everything a subcommand does shares the cluster client
+from cluster.connect(): one keep-alive session, with credentials read once
+from the on-disk cache.
+"""
+
+import os
+import sys
+from dataclasses import dataclass, field
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class Command:
+    target: str
+    help: str
+    subcommands: dict = field(default_factory=dict)
+    # Flags a root script reads from sys.argv itself. Those scripts have no
+    # parser, so anything else must be refused here before they start work.
+    options: tuple = ()
+
+    def run(self, prog, argv):
+        if self.subcommands:
+            return dispatch(prog, self.subcommands, argv, self.target)
+        if self.target.endswith(".py"):
+            if "-h" in argv or "--help" in argv:
+                print(self.usage(prog))
+                return 0
+            unknown = [arg for arg in argv if arg not in self.options]
+            if unknown:
+                print(f"{prog}: unrecognized arguments: {' '.join(unknown)}\n", file=sys.stderr)
+                print(self.usage(prog), file=sys.stderr)
+                return 2
+        # Subcommand parsers take their usage line from sys.argv[0]
+        sys.argv = [prog] + list(argv)
+        if self.target.endswith(".py"):
+            import runpy
+
+            runpy.run_path(os.path.join(ROOT, self.target), run_name="__main__")
+            return 0
+        module, _, function = self.target.partition(":")
+        import importlib
+
+        return getattr(importlib.import_module(module), function)(list(argv))
+
+    def usage(self, prog):
+        options = "".join(f" [{option}]" for option in self.options)
+        return f"usage: {prog}{options}\n\n{self.help[0].upper()}{self.help[1:]}.\nRuns {self.target}."
+
+
+BENCH = {
+    "load": Command("lingua_ops.loadtest:main", "closed- or open-loop load test of the API mix"),
+    "translate": Command("lingua_ops.bench_translate:main", "/api/translate across language pairs and loads"),
+    "stt": Command("lingua_ops.bench_stt:main", "streaming uploads to /api/speech-to-text"),
+    "tts": Command("lingua_ops.bench_tts:main", "/api/tts latency, payload size and cache savings"),
+    "proxy": Command("lingua_ops.bench_proxy:main", "overhead of the nginx /api/ proxy, and A/B of config variants"),
+    "catalog": Command("lingua_ops.bench_catalog:main", "search, product and cart load with Zipfian popularity"),
+    "journey": Command("lingua_ops.journey:main", "end-to-end voice shopping journeys"),
+    "replay": Command("lingua_ops.replay:main", "replay a captured request log"),
+    "baseline": Command("lingua_ops.baseline:main", "record latency baselines and gate on regressions"),
+}
+
+COMMANDS = {
+    "deploy": Command(
+        "deploy_gke.py", "create the namespace and secret, build the images and deploy", options=("--skip-build",)
+    ),
+    "redeploy": Command("redeploy-application.py", "rebuild changed images, apply the manifests and wait for the rollout"),
+    "status": Command("check-deployment-status.py", "pods and services in the namespace", options=("--json-lines",)),
+    "logs": Command("lingua_ops.logs:main", "tail or follow logs from every matching pod"),
+    "diagnose": Command(
+        "diagnose-frontend.py",
+        "pod details, logs, events and services for a crashing frontend",
+        options=("--json-lines",),
+    ),
+    "crashloop": Command("lingua_ops.crashloop:main", "explain crash-looping pods from their events and previous logs"),
+    "verify": Command(
+        "VERIFY_FRONTEND_FIX.py", "check that the frontend pod is running and ready", options=("--json-lines",)
+    ),
+    "manifests": Command("lingua_ops.manifests:main", "cross-check the k8s manifests, nginx configs and Dockerfiles"),
+    "probe": Command("lingua_ops.probe:main", "probe the frontend and every API route once"),
+    "monitor": Command("lingua_ops.monitor:main", "probe continuously and serve rolling latency stats"),
+    "capacity": Command("lingua_ops.capacity:main", "size replicas, HPA targets and resource requests from a load curve"),
+    "bench": Command("benchmarks", f"benchmarks: {', '.join(BENCH)}", BENCH),
+}
+
+
+def usage(prog, commands, title):
+    width = max(len(name) for name in commands)
+    lines = [f"usage: {prog} <command> [options]", "", f"{title}:"]
+    lines.extend(f"  {name:<{width}}  {command.help}" for name, command in commands.items())
+    lines.extend(["", f"Run '{prog} <command> --help' for the options of one command."])
+    return "\n".join(lines)
+
+
+def dispatch(prog, commands, argv, title):
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        print(usage(prog, commands, title))
+        return 0 if argv else 2
+    name, rest = argv[0], argv[1:]
+    if name not in commands:
+        print(f"{prog}: unknown command '{name}'\n", file=sys.stderr)
+        print(usage(prog, commands, title), file=sys.stderr)
+        return 2
+    return commands[name].run(f"{prog} {name}", rest)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    return dispatch("lingua-ops", COMMANDS, argv, "commands") or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
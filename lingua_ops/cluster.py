@@ -0,0 +1,566 @@
+"""
+Direct Kubernetes API access for the Lingua Phone cluster.
+
+Instead of spawning `gcloud container clusters get-credentials` and `kubectl`
+for every step, the cluster endpoint, CA certificate and an access token are
+fetched from gcloud once and cached on disk until the token expires. All
+further calls go straight to the API server over one keep-alive session.
+
+Set LINGUA_K8S_API to talk to another API server instead (for example
+`kubectl proxy` on http://127.0.0.1:8001). LocalCluster is an in-memory
+stand-in with the same interface for tests and dry runs.
+"""
+
+import base64
+import copy
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+
+from lingua_ops import config
+from lingua_ops.shell import run_command
+
+# kind -> (API group prefix, namespaced)
+RESOURCES = {
+    "namespaces": ("/api/v1", False),
+    "pods": ("/api/v1", True),
+    "services": ("/api/v1", True),
+    "events": ("/api/v1", True),
+    "configmaps": ("/api/v1", True),
+    "secrets": ("/api/v1", True),
+    "deployments": ("/apis/apps/v1", True),
+    "replicasets": ("/apis/apps/v1", True),
+    "horizontalpodautoscalers": ("/apis/autoscaling/v2", True),
+}
+
+_PATH = re.compile(
+    r"^(?P<prefix>/api/v1|/apis/[^/]+/[^/]+)"
+    r"(?:/namespaces/(?P<namespace>[^/]+))?"
+    r"(?:/(?P<kind>[^/]+))?"
+    r"(?:/(?P<name>[^/]+))?"
+    r"(?:/(?P<subresource>[^/]+))?$"
+)
+
+
+class ClusterError(Exception):
+    """Raised when the Kubernetes API or gcloud reports an error"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def resource_path(kind, namespace=None, name=None, subresource=None):
+    """Build the REST path for a resource kind, e.g. /api/v1/namespaces/lingua-app/pods"""
+    prefix, namespaced = RESOURCES[kind]
+    path = prefix
+    if namespaced and namespace:
+        path += f"/namespaces/{namespace}"
+    path += f"/{kind}"
+    if name:
+        path += f"/{name}"
+    if subresource:
+        path += f"/{subresource}"
+    return path
+
+
+def parse_resource_path(path):
+    """Split a REST path into (kind, namespace, name, subresource); the inverse of resource_path()"""
+    match = _PATH.match(path.split("?", 1)[0].rstrip("/"))
+    if not match:
+        raise ClusterError(f"Unrecognised API path: {path}", 404)
+    namespace, kind = match.group("namespace"), match.group("kind")
+    if kind is None and namespace is not None:
+        # /api/v1/namespaces/<name> addresses the namespace object itself
+        return "namespaces", None, namespace, None
+    return kind, namespace, match.group("name"), match.group("subresource")
+
+
+def match_labels(labels, selector):
+    """Return True if a labels dict satisfies an equality-based label selector string"""
+    if not selector:
+        return True
+    labels = labels or {}
+    for term in selector.split(","):
+        term = term.strip()
+        if "!=" in term:
+            key, value = term.split("!=", 1)
+            if labels.get(key.strip()) == value.strip():
+                return False
+        elif "=" in term:
+            key, value = term.replace("==", "=").split("=", 1)
+            if labels.get(key.strip()) != value.strip():
+                return False
+        elif term.startswith("!"):
+            if term[1:] in labels:
+                return False
+        elif term not in labels:
+            return False
+    return True
+
+
+def match_fields(obj, selector):
+    """Return True if an object satisfies an equality-based field selector such as involvedObject.name=x"""
+    if not selector:
+        return True
+    for term in selector.split(","):
+        negate = "!=" in term
+        key, value = term.replace("!=", "=").replace("==", "=").split("=", 1)
+        current = obj
+        for part in key.strip().split("."):
+            current = current.get(part) if isinstance(current, dict) else None
+        if (str(current) == value.strip()) == negate:
+            return False
+    return True
+
+
+@dataclass
+class Credentials:
+    endpoint: str
+    token: str
+    ca_file: str
+    expires_at: float
+
+    def valid(self, margin=300):
+        return bool(self.token) and time.time() < self.expires_at - margin
+
+
+def _cache_file(name):
+    os.makedirs(config.CACHE_DIR, exist_ok=True)
+    return os.path.join(config.CACHE_DIR, name)
+
+
+def _gcloud_json(args):
+    stdout, stderr, returncode = run_command(["gcloud"] + args + ["--format=json"], verbose=False)
+    if returncode != 0:
+        raise ClusterError(f"gcloud {' '.join(args)} failed: {stderr.strip()}")
+    return json.loads(stdout)
+
+
+def load_credentials(cluster=None, zone=None, project=None, refresh=False):
+    """Return cached cluster credentials, asking gcloud only when the token has expired"""
+    cluster = cluster or config.CLUSTER
+    zone = zone or config.ZONE
+    project = project or config.PROJECT_ID
+    path = _cache_file(f"{project}-{zone}-{cluster}.json")
+
+    cached = None
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                cached = Credentials(**json.load(f))
+        except (ValueError, TypeError):
+            cached = None
+    if cached and not refresh and cached.valid() and os.path.exists(cached.ca_file):
+        return cached
+
+    # The endpoint and CA only change when the cluster is recreated, so they
+    # are reused across token refreshes unless a full refresh was asked for.
+    if cached and not refresh and os.path.exists(cached.ca_file):
+        endpoint, ca_file = cached.endpoint, cached.ca_file
+    else:
+        info = _gcloud_json(["container", "clusters", "describe", cluster,
+                             f"--zone={zone}", f"--project={project}"])
+        endpoint = f"https://{info['endpoint']}"
+        ca_file = _cache_file(f"{project}-{zone}-{cluster}-ca.crt")
+        with open(ca_file, "wb") as f:
+            f.write(base64.b64decode(info["masterAuth"]["clusterCaCertificate"]))
+
+    helper = _gcloud_json(["config", "config-helper"])["credential"]
+    expiry = datetime.fromisoformat(helper["token_expiry"].replace("Z", "+00:00"))
+    credentials = Credentials(endpoint, helper["access_token"], ca_file, expiry.timestamp())
+
+    with open(path, "w") as f:
+        json.dump(asdict(credentials), f)
+    os.chmod(path, 0o600)
+    return credentials
+
+
+def ensure_kubeconfig(cluster=None, zone=None, project=None):
+    """Run get-credentials only if kubeconfig has no context for the cluster yet (for kubectl steps)"""
+    cluster = cluster or config.CLUSTER
+    zone = zone or config.ZONE
+    project = project or config.PROJECT_ID
+    context = f"gke_{project}_{zone}_{cluster}"
+    default = os.path.join(os.path.expanduser("~"), ".kube", "config")
+    for path in os.environ.get("KUBECONFIG", default).split(os.pathsep):
+        try:
+            with open(path) as f:
+                if context in f.read():
+                    return True
+        except OSError:
+            continue
+    _, stderr, returncode = run_command(
+        ["gcloud", "container", "clusters", "get-credentials", cluster, f"--zone={zone}", f"--project={project}"],
+        verbose=False,
+    )
+    if returncode != 0:
+        print(f"Failed to get cluster credentials: {stderr.strip()}")
+    return returncode == 0
+
+
+class ClusterClient:
+    """Minimal Kubernetes REST client bound to one namespace"""
+
+    def __init__(self, base_url, credentials=None, namespace=None, credentials_loader=None):
+        self.base_url = base_url.rstrip("/")
+        self.credentials = credentials
+        self.namespace = namespace or config.NAMESPACE
+        self._credentials_loader = credentials_loader
+        self._session = None
+
+    @property
+    def session(self):
+        # requests takes ~70 ms to import; load it with the first API call rather than at startup
+        import requests
+
+        if self._session is None:
+            self._session = requests.Session()
+            if self.credentials:
+                self._session.verify = self.credentials.ca_file
+        return self._session
+
+    def _headers(self):
+        if self.credentials is None:
+            return {}
+        if not self.credentials.valid(margin=60) and self._credentials_loader:
+            self.credentials = self._credentials_loader()
+            self.session.verify = self.credentials.ca_file
+        return {"Authorization": f"Bearer {self.credentials.token}"}
+
+    def request(self, method, path, params=None, body=None, stream=False, timeout=30):
+        """Send one API request; returns parsed JSON, text, or the raw response when streaming"""
+        import requests
+
+        headers, payload = self._headers(), {"json": body}
+        if method == "PATCH":
+            # The API rejects application/json patches; send a JSON merge patch like `kubectl patch --type merge`
+            headers = dict(headers, **{"Content-Type": "application/merge-patch+json"})
+            payload = {"data": json.dumps(body)}
+        try:
+            response = self.session.request(
+                method, self.base_url + path, params=params, headers=headers,
+                stream=stream, timeout=timeout, **payload,
+            )
+        except requests.exceptions.RequestException as e:
+            raise ClusterError(f"{method} {path} failed: {e}")
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise ClusterError(f"{method} {path}: {message}", response.status_code)
+        if stream:
+            return response
+        if response.headers.get("Content-Type", "").startswith("application/json"):
+            return response.json()
+        return response.text
+
+    def list(self, kind, namespace=None, label_selector=None, field_selector=None):
+        """List objects of one kind, returning the items array"""
+        params = {}
+        if label_selector:
+            params["labelSelector"] = label_selector
+        if field_selector:
+            params["fieldSelector"] = field_selector
+        path = resource_path(kind, namespace or self.namespace)
+        return self.request("GET", path, params=params or None).get("items", [])
+
+    def list_versioned(self, kind, namespace=None, label_selector=None):
+        """List objects and also return the collection resourceVersion to start a watch from"""
+        params = {"labelSelector": label_selector} if label_selector else None
+        data = self.request("GET", resource_path(kind, namespace or self.namespace), params=params)
+        return data.get("items", []), data.get("metadata", {}).get("resourceVersion")
+
+    def watch(self, kind, resource_version=None, label_selector=None, timeout_seconds=60, namespace=None):
+        """Yield (event type, object) pairs as objects of one kind change"""
+        params = {"watch": "true", "timeoutSeconds": str(timeout_seconds), "allowWatchBookmarks": "false"}
+        if resource_version:
+            params["resourceVersion"] = resource_version
+        if label_selector:
+            params["labelSelector"] = label_selector
+        response = self.request("GET", resource_path(kind, namespace or self.namespace), params=params,
+                                stream=True, timeout=timeout_seconds + 10)
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get("type") == "ERROR":
+                    status = event.get("object", {})
+                    raise ClusterError(status.get("message", "watch failed"), status.get("code"))
+                yield event["type"], event["object"]
+        finally:
+            response.close()
+
+    def get(self, kind, name, namespace=None):
+        return self.request("GET", resource_path(kind, namespace or self.namespace, name))
+
+    def create(self, kind, body, namespace=None):
+        return self.request("POST", resource_path(kind, namespace or self.namespace), body=body)
+
+    def replace(self, kind, name, body, namespace=None):
+        return self.request("PUT", resource_path(kind, namespace or self.namespace, name), body=body)
+
+    def patch(self, kind, name, body, namespace=None):
+        """Merge body into an existing object (JSON merge patch: null removes a field)"""
+        return self.request("PATCH", resource_path(kind, namespace or self.namespace, name), body=body)
+
+    def delete(self, kind, name=None, namespace=None, label_selector=None):
+        """Delete one object by name, or every object matching label_selector"""
+        params = {"labelSelector": label_selector} if label_selector else None
+        return self.request("DELETE", resource_path(kind, namespace or self.namespace, name), params=params)
+
+    def pods(self, label_selector=None):
+        return self.list("pods", label_selector=label_selector)
+
+    def services(self):
+        return self.list("services")
+
+    def deployments(self):
+        return self.list("deployments")
+
+    def events(self, field_selector=None):
+        return self.list("events", field_selector=field_selector)
+
+    def hpas(self):
+        return self.list("horizontalpodautoscalers")
+
+    def set_image(self, deployment, container, image):
+        """Point one container of a deployment at a new image, triggering a rollout if it changed"""
+        body = self.get("deployments", deployment)
+        for spec in body["spec"]["template"]["spec"]["containers"]:
+            if spec["name"] == container:
+                if spec.get("image") == image:
+                    return body
+                spec["image"] = image
+                return self.replace("deployments", deployment, body)
+        raise ClusterError(f'container "{container}" not found in deployment "{deployment}"', 404)
+
+    def namespace_exists(self, name=None):
+        try:
+            self.get("namespaces", name or self.namespace)
+            return True
+        except ClusterError as e:
+            if e.status_code == 404:
+                return False
+            raise
+
+    def pod_log(self, name, container=None, previous=False, tail_lines=None, since_time=None):
+        """Return a pod's log as text"""
+        params = {}
+        if container:
+            params["container"] = container
+        if previous:
+            params["previous"] = "true"
+        if tail_lines is not None:
+            params["tailLines"] = str(tail_lines)
+        if since_time:
+            params["sinceTime"] = since_time
+        return self.request("GET", resource_path("pods", self.namespace, name, "log"), params=params)
+
+    def stream_log(self, name, container=None, follow=False, since_time=None, tail_lines=None,
+                   previous=False, timestamps=True, timeout=60):
+        """Yield a pod's log line by line as the API server sends it, without buffering the whole log"""
+        import requests
+
+        params = {"timestamps": "true"} if timestamps else {}
+        if container:
+            params["container"] = container
+        if follow:
+            params["follow"] = "true"
+        if previous:
+            params["previous"] = "true"
+        if tail_lines is not None:
+            params["tailLines"] = str(tail_lines)
+        if since_time:
+            params["sinceTime"] = since_time
+        response = self.request("GET", resource_path("pods", self.namespace, name, "log"), params=params,
+                                stream=True, timeout=(10, timeout))
+        try:
+            for line in response.iter_lines(chunk_size=4096):
+                yield line.decode("utf-8", errors="replace")
+        except requests.exceptions.RequestException as e:
+            raise ClusterError(f"Log stream for {name} interrupted: {e}")
+        finally:
+            response.close()
+
+
+class LocalCluster(ClusterClient):
+    """In-memory stand-in for the Kubernetes API with the same interface as ClusterClient"""
+
+    def __init__(self, namespace=None):
+        super().__init__("local://cluster", namespace=namespace)
+        self.objects = {}
+        self.logs = {}
+        self.version = 0
+        self.history = deque(maxlen=1000)
+        self._watchers = []
+        self._lock = threading.Lock()
+        self.add("namespaces", {"metadata": {"name": self.namespace}})
+
+    def add(self, kind, obj, namespace=None):
+        """Store (or overwrite) an object, filling in the metadata the API server would add"""
+        metadata = obj.setdefault("metadata", {})
+        if RESOURCES[kind][1]:
+            metadata.setdefault("namespace", namespace or self.namespace)
+        metadata.setdefault("creationTimestamp", now_iso())
+        metadata.setdefault("uid", f"{kind}-{metadata['name']}")
+        bucket = self._bucket(kind, metadata.get("namespace"))
+        event = "MODIFIED" if metadata["name"] in bucket else "ADDED"
+        bucket[metadata["name"]] = obj
+        self._notify(kind, event, obj)
+        return obj
+
+    def remove(self, kind, name, namespace=None):
+        obj = self._bucket(kind, namespace or self.namespace).pop(name)
+        self._notify(kind, "DELETED", obj)
+        return obj
+
+    def _notify(self, kind, event, obj):
+        with self._lock:
+            self.version += 1
+            obj["metadata"]["resourceVersion"] = str(self.version)
+            snapshot = copy.deepcopy(obj)
+            self.history.append((self.version, kind, event, snapshot))
+            for watched, events in self._watchers:
+                if watched == kind:
+                    events.put((event, snapshot))
+
+    def watch(self, kind, resource_version=None, label_selector=None, timeout_seconds=60, namespace=None):
+        events = queue.Queue()
+        with self._lock:
+            since = int(resource_version or self.version)
+            for version, watched, event, obj in self.history:
+                if watched == kind and version > since:
+                    events.put((event, obj))
+            self._watchers.append((kind, events))
+        deadline = time.monotonic() + timeout_seconds
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    event, obj = events.get(timeout=remaining)
+                except queue.Empty:
+                    return
+                if match_labels(obj["metadata"].get("labels"), label_selector):
+                    yield event, obj
+        finally:
+            with self._lock:
+                self._watchers.remove((kind, events))
+
+    def set_log(self, pod, text, previous=False, container=None):
+        self.logs[(pod, container, previous)] = text
+
+    def stream_log(self, name, container=None, follow=False, since_time=None, tail_lines=None,
+                   previous=False, timestamps=True, timeout=60):
+        params = {"container": container, "previous": "true" if previous else None, "tailLines": tail_lines}
+        text = self.request("GET", resource_path("pods", self.namespace, name, "log"), params=params)
+        yield from text.splitlines()
+
+    def _bucket(self, kind, namespace):
+        return self.objects.setdefault((kind, namespace if RESOURCES[kind][1] else None), {})
+
+    def request(self, method, path, params=None, body=None, stream=False, timeout=None):
+        params = params or {}
+        kind, namespace, name, subresource = parse_resource_path(path)
+        if kind not in RESOURCES:
+            raise ClusterError(f"Unknown resource kind: {kind}", 404)
+        bucket = self._bucket(kind, namespace)
+
+        if subresource == "log":
+            if name not in bucket:
+                raise ClusterError(f'pods "{name}" not found', 404)
+            text = self.logs.get((name, params.get("container"), params.get("previous") == "true"))
+            if text is None:
+                text = self.logs.get((name, None, params.get("previous") == "true"), "")
+            if params.get("tailLines"):
+                text = "\n".join(text.splitlines()[-int(params["tailLines"]):])
+            return text
+
+        if method == "GET" and name:
+            if name not in bucket:
+                raise ClusterError(f'{kind} "{name}" not found', 404)
+            return bucket[name]
+        if method == "GET":
+            items = [obj for obj in bucket.values()
+                     if match_labels(obj["metadata"].get("labels"), params.get("labelSelector"))
+                     and match_fields(obj, params.get("fieldSelector"))]
+            return {"kind": "List", "metadata": {"resourceVersion": str(self.version)}, "items": items}
+        if method == "POST":
+            return self.add(kind, body, namespace)
+        if method == "PUT":
+            if name not in bucket:
+                raise ClusterError(f'{kind} "{name}" not found', 404)
+            return self.add(kind, body, namespace)
+        if method == "DELETE":
+            names = [name] if name else [
+                key for key, obj in bucket.items()
+                if match_labels(obj["metadata"].get("labels"), params.get("labelSelector"))
+            ]
+            for key in names:
+                if key not in bucket:
+                    raise ClusterError(f'{kind} "{key}" not found', 404)
+                self.remove(kind, key, namespace)
+            return {"kind": "Status", "status": "Success"}
+        raise ClusterError(f"Unsupported method {method}", 405)
+
+
+_client = None
+
+
+def connect():
+    """Return the process-wide client, creating it on first use"""
+    global _client
+    if _client is None:
+        if config.K8S_API:
+            _client = ClusterClient(config.K8S_API)
+        else:
+            credentials = load_credentials()
+            _client = ClusterClient(credentials.endpoint, credentials, credentials_loader=load_credentials)
+    return _client
+
+
+def now_iso():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_time(value):
+    """Parse a Kubernetes RFC 3339 timestamp into an aware datetime"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def age(timestamp):
+    """Format the time since a Kubernetes timestamp the way kubectl does (e.g. 5m, 3h, 2d)"""
+    moment = parse_time(timestamp)
+    if moment is None:
+        return "<unknown>"
+    seconds = max(0, int((datetime.now(timezone.utc) - moment).total_seconds()))
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+def pod_status(pod):
+    """Return the STATUS column kubectl would show for a pod"""
+    if pod["metadata"].get("deletionTimestamp"):
+        return "Terminating"
+    for status in pod.get("status", {}).get("containerStatuses", []):
+        state = status.get("state", {})
+        if "waiting" in state and state["waiting"].get("reason"):
+            return state["waiting"]["reason"]
+        if "terminated" in state and state["terminated"].get("reason"):
+            return state["terminated"]["reason"]
+    return pod.get("status", {}).get("phase", "Unknown")
+
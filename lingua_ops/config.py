@@ -0,0 +1,28 @@
+"""
+Default endpoints and cluster names used by the Lingua Phone tooling.
+
+Every value can be overridden through the environment so the same scripts
+work against a local docker-compose setup, a port-forward or the GKE cluster.
+"""
+
+import os
+
+FRONTEND_URL = os.environ.get("LINGUA_FRONTEND_URL", "http://localhost:8080")
+BACKEND_URL = os.environ.get("LINGUA_BACKEND_URL", "http://localhost:3002")
+
+PROJECT_ID = os.environ.get("LINGUA_PROJECT_ID", "lingua-phone")
+CLUSTER = os.environ.get("LINGUA_CLUSTER", "lingua-cluster")
+ZONE = os.environ.get("LINGUA_ZONE", "us-central1-a")
+NAMESPACE = os.environ.get("LINGUA_NAMESPACE", "lingua-app")
+REGISTRY = os.environ.get("LINGUA_REGISTRY", f"gcr.io/{PROJECT_ID}")
+
+# Point the cluster client at another API server (e.g. kubectl proxy) instead of GKE
+K8S_API = os.environ.get("LINGUA_K8S_API")
+
+# "jsonl" switches the status and diagnosis scripts to JSON-lines output (see lingua_ops.output)
+OUTPUT = os.environ.get("LINGUA_OUTPUT", "text")
+
+CACHE_DIR = os.environ.get(
+    "LINGUA_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "lingua-ops"),
+)
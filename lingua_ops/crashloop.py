@@ -0,0 +1,430 @@
+"""
+Root-cause analysis for crash-looping pods.
+
+One parallel round trip fetches the pods, events and services of the
+namespace. A container counts as failing when it is stuck waiting (crash
+loop back-off, image pull errors), has restarted and is not ready, or last
+exited less than --recent minutes ago. For every failing container the log
+of its previous instance is fetched concurrently with the others. Events,
+log lines and container terminations are merged into one timeline per pod,
+ordered by timestamp. A small rule set reads the timeline and names the
+most likely cause:
+
+    oom            the container was OOMKilled
+    image-pull     ErrImagePull / ImagePullBackOff, or "Failed to pull image" events
+    upstream-dns   nginx "host not found in upstream", or getaddrinfo ENOTFOUND/EAI_AGAIN
+    port-bind      EADDRINUSE, "address already in use", "bind() ... failed"
+    nginx-config   any other nginx [emerg] or a failed configuration test
+
+Containers that match no rule are still reported, with their exit code and
+last log lines. Containers that restarted longer ago and are running and
+ready again are listed as notes; they do not make the run fail.
+
+The log of a terminated instance never changes once it has exited, so
+previous logs are cached in CACHE_DIR/crashloop-cache.json, keyed by pod,
+container and restart count. Repeated runs during an incident only fetch
+logs for restarts that happened since the last run. Events are merged into
+the same cache. The API server expires events after an hour, but the
+timeline keeps them for EVENT_RETENTION.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from lingua_ops import config
+from lingua_ops.cluster import ClusterError, connect, parse_time
+from lingua_ops.logs import parse_line, timestamp_key
+from lingua_ops.output import Output
+from lingua_ops.snapshot import Event, take_snapshot
+
+EVENT_RETENTION = timedelta(hours=24)
+# A ready container whose last exit is older than this has recovered rather than crash-looping
+RECENT_RESTART = timedelta(hours=1)
+# Waiting reasons that mean the container cannot start, as opposed to ContainerCreating
+FAILING_REASONS = {"CrashLoopBackOff", "ErrImagePull", "ImagePullBackOff", "InvalidImageName",
+                   "CreateContainerConfigError", "CreateContainerError", "RunContainerError"}
+
+
+@dataclass
+class Rule:
+    name: str
+    title: str
+    hint: str
+    reasons: frozenset = frozenset()
+    events: str = None
+    logs: str = None
+
+    def match(self, container, timeline):
+        """Return the timeline entries (or container reasons) that trigger this rule"""
+        evidence = [reason for reason in (container.reason, container.last_reason) if reason in self.reasons]
+        for entry in timeline:
+            pattern = self.logs if entry.source == "log" else self.events if entry.source == "event" else None
+            if pattern and (entry.container in (None, container.name)) and re.search(pattern, entry.text):
+                evidence.append(entry)
+        return evidence
+
+
+# First match wins, so the specific nginx rules come before the generic one
+RULES = [
+    Rule("oom", "OOMKilled",
+         "The container used more memory than its limit and was killed. Raise resources.limits.memory "
+         "(plan-capacity.py sizes it from a measured load curve) or look for a leak in the log before the kill.",
+         reasons=frozenset({"OOMKilled"}), events=r"OOMKilling|out of memory",
+         logs=r"JavaScript heap out of memory|Allocation failed"),
+    Rule("image-pull", "image pull failure",
+         "The kubelet cannot pull {target}. Check that the tag was pushed (redeploy-application.py builds and "
+         "pushes it), that the registry path is right, and that the node service account can read it.",
+         reasons=frozenset({"ErrImagePull", "ImagePullBackOff", "InvalidImageName", "ErrImageNeverPull"}),
+         events=r'Failed to pull image "?([^":\s]+(?::[^"\s]+)?)|Back-off pulling image "([^"]+)"'),
+    Rule("upstream-dns", "upstream DNS",
+         "{target} did not resolve when the process started. nginx resolves upstreams once at startup, so a "
+         "missing or not-yet-ready Service crash-loops the frontend.",
+         logs=r'host not found in upstream "?([^"\s]+)|getaddrinfo (?:ENOTFOUND|EAI_AGAIN) (\S+)'),
+    Rule("port-bind", "port bind",
+         "The process could not listen on {target}. Another process in the pod already holds the port, or "
+         "the port differs from the containerPort (ports below 1024 also need root).",
+         logs=r"EADDRINUSE.*?(:::\d+|[\d.]+:\d+)|bind\(\) to (\S+) failed|address already in use|"
+              r"EACCES: permission denied"),
+    Rule("nginx-config", "nginx configuration error",
+         "nginx rejected its configuration. Run `lingua-ops manifests --check nginx` against the config "
+         "baked into the image.",
+         logs=r"nginx: \[emerg\]|configuration file \S+ test failed|unknown directive"),
+]
+
+
+@dataclass
+class TimelineEntry:
+    timestamp: str
+    source: str
+    pod: str
+    container: str
+    text: str
+
+    def format(self):
+        clock = (self.timestamp or "")[11:23].rstrip("Z") or "?"
+        where = f"{self.container}" if self.container else "pod"
+        return f"    {clock:<12}  {self.source:<5}  {where:<16}  {self.text}"
+
+
+@dataclass
+class Finding:
+    pod: str
+    container: str
+    status: str
+    restarts: int
+    exit_code: int
+    cause: str
+    title: str
+    detail: str
+    evidence: list = field(default_factory=list)
+    timeline: list = field(default_factory=list)
+
+    def format(self, lines=20):
+        output = [f"{self.pod}/{self.container}: {self.title} ({self.status}, {self.restarts} restarts"
+                  + (f", exit code {self.exit_code})" if self.exit_code is not None else ")")]
+        output.append(f"  {self.detail}")
+        output.extend(f"  evidence: {item}" for item in self.evidence[:3])
+        if self.timeline:
+            shown = self.timeline[-lines:]
+            output.append(f"  timeline (last {len(shown)} of {len(self.timeline)}):")
+            output.extend(entry.format() for entry in shown)
+        return output
+
+
+class ArtifactCache:
+    """Previous-instance logs and events, persisted between runs"""
+
+    def __init__(self, path=None, persist=True):
+        self.path = path or os.path.join(config.CACHE_DIR, "crashloop-cache.json")
+        self.persist = persist
+        self.hits = self.misses = 0
+        self.logs = {}
+        self.events = {}
+        if persist:
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                self.logs, self.events = data.get("logs", {}), data.get("events", {})
+            except (OSError, ValueError):
+                pass
+
+    @staticmethod
+    def log_key(namespace, pod, container):
+        """A terminated instance is identified by pod UID, container and restart count"""
+        uid = pod.raw.get("metadata", {}).get("uid") or pod.name
+        return f"{namespace}/{pod.name}/{uid}/{container.name}/{container.restarts}"
+
+    def merge_events(self, events, now=None):
+        """Fold freshly listed events into the cached ones and return all of them, oldest first"""
+        for event in events:
+            self.events[event.raw.get("metadata", {}).get("name") or f"{event.object_name}.{event.reason}"] = event.raw
+        cutoff = (now or datetime.now(timezone.utc)) - EVENT_RETENTION
+        merged = []
+        for name, raw in list(self.events.items()):
+            event = Event.from_dict(raw)
+            seen = parse_time(event.last_seen)
+            if seen is not None and seen < cutoff:
+                del self.events[name]
+            else:
+                merged.append(event)
+        return sorted(merged, key=lambda event: event.last_seen or "")
+
+    def prune(self, keys):
+        """Drop logs of instances whose pod or restart count is no longer current"""
+        self.logs = {key: text for key, text in self.logs.items() if key in keys}
+
+    def save(self):
+        if not self.persist:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump({"logs": self.logs, "events": self.events}, f)
+        os.replace(temporary, self.path)
+
+
+def last_exit(pod, container):
+    """When the container's previous instance terminated, as an aware datetime, or None"""
+    for status in pod.raw.get("status", {}).get("containerStatuses", []):
+        if status.get("name") == container.name:
+            terminated = (status.get("lastState") or {}).get("terminated") or {}
+            return parse_time(terminated.get("finishedAt"))
+    return None
+
+
+def triage(pods, recent=RECENT_RESTART, now=None):
+    """
+    Split containers into failing and recovered (pod, container) pairs.
+
+    Failing: stuck waiting for a FAILING_REASONS reason, restarted and not
+    ready, or restarted with the last exit within `recent`. Recovered:
+    restarted before that and running and ready since.
+    """
+    now = now or datetime.now(timezone.utc)
+    failing, recovered = [], []
+    for pod in pods:
+        for container in pod.containers:
+            if container.reason in FAILING_REASONS:
+                failing.append((pod, container))
+            elif container.restarts or container.last_state:
+                exited = last_exit(pod, container)
+                if not container.ready or exited is None or now - exited < recent:
+                    failing.append((pod, container))
+                else:
+                    recovered.append((pod, container))
+    return failing, recovered
+
+
+def fetch_previous_logs(cluster, targets, cache, tail_lines=200):
+    """Previous-instance logs for each (pod, container), from the cache or fetched in parallel"""
+    logs, errors, jobs = {}, {}, {}
+    for pod, container in targets:
+        if not container.restarts:
+            continue
+        key = cache.log_key(cluster.namespace, pod, container)
+        if key in cache.logs:
+            cache.hits += 1
+            logs[(pod.name, container.name)] = cache.logs[key]
+        else:
+            jobs[key] = (pod, container)
+
+    def fetch(pod, container):
+        return "\n".join(cluster.stream_log(pod.name, container.name, previous=True, tail_lines=tail_lines))
+
+    if jobs:
+        cluster.session  # create the shared session before the worker threads race to do it
+        with ThreadPoolExecutor(max_workers=min(16, len(jobs))) as pool:
+            futures = {key: pool.submit(fetch, *target) for key, target in jobs.items()}
+        for key, future in futures.items():
+            pod, container = jobs[key]
+            try:
+                text = future.result()
+            except ClusterError as e:
+                errors[f"{pod.name}/{container.name}"] = str(e)
+                continue
+            cache.misses += 1
+            cache.logs[key] = text
+            logs[(pod.name, container.name)] = text
+    return logs, errors
+
+
+def build_timeline(pod, events, logs):
+    """Events, previous-instance log lines and terminations of one pod, ordered by time"""
+    entries = []
+    for event in events:
+        repeated = f" (x{event.count})" if event.count > 1 else ""
+        entries.append(TimelineEntry(event.last_seen, "event", pod.name, None,
+                                     f"{event.type} {event.reason}: {event.message}{repeated}"))
+    for (pod_name, container), text in logs.items():
+        if pod_name != pod.name:
+            continue
+        for raw in text.splitlines():
+            line = parse_line(pod_name, container, raw)
+            entries.append(TimelineEntry(line.timestamp, "log", pod_name, container, line.text))
+    for status in pod.raw.get("status", {}).get("containerStatuses", []):
+        terminated = (status.get("lastState") or {}).get("terminated")
+        if terminated:
+            entries.append(TimelineEntry(
+                terminated.get("finishedAt"), "exit", pod.name, status["name"],
+                f"{terminated.get('reason', 'Terminated')} (exit code {terminated.get('exitCode')}), "
+                f"restart {status.get('restartCount', 0)}"))
+    # Stable sort keeps log lines without timestamps next to their neighbours
+    return sorted(entries, key=lambda entry: timestamp_key(entry.timestamp) if entry.timestamp else "")
+
+
+def classify(pod, container, timeline, services=None):
+    """Name the most likely cause of one container's failures"""
+    status = container.reason or container.state
+    for rule in RULES:
+        evidence = rule.match(container, timeline)
+        if not evidence:
+            continue
+        target = "the image"
+        for item in evidence:
+            if isinstance(item, TimelineEntry):
+                match = re.search(rule.logs if item.source == "log" else rule.events or "", item.text)
+                groups = [group for group in (match.groups() if match else ()) if group]
+                if groups:
+                    target = groups[0]
+                    break
+        if rule.name == "port-bind" and target == "the image":
+            target = "its port"
+        detail = rule.hint.format(target=target)
+        if rule.name == "upstream-dns" and services is not None:
+            host = target.split(":")[0].split(".")[0]
+            if host in {service.name for service in services}:
+                detail += f" Service {host} exists now; it was probably not ready yet, or lives in another namespace."
+            else:
+                detail += f" There is no Service named {host} in the namespace."
+        return Finding(pod.name, container.name, status, container.restarts, container.exit_code, rule.name,
+                       rule.title, detail,
+                       [item.text if isinstance(item, TimelineEntry) else f"container reason {item}"
+                        for item in evidence],
+                       [entry for entry in timeline if entry.container in (None, container.name)])
+    own = [entry for entry in timeline if entry.container in (None, container.name)]
+    last_lines = [entry.text for entry in own if entry.source == "log"][-3:]
+    return Finding(pod.name, container.name, status, container.restarts, container.exit_code, "unknown",
+                   "unclassified failure",
+                   "No rule matched; the last log lines of the previous instance are the best lead.",
+                   last_lines, own)
+
+
+def analyze(cluster, app=None, cache=None, tail_lines=200, recent=RECENT_RESTART):
+    """
+    Return (findings, stats) for every failing container, optionally only pods with app=<app>.
+
+    stats["recovered"] lists containers that restarted more than `recent` ago
+    and are ready again.
+    """
+    cache = cache or ArtifactCache()
+    start = time.perf_counter()
+    snapshot = take_snapshot(cluster, ("pods", "events", "services"))
+    if "pods" in snapshot.errors:
+        raise ClusterError(snapshot.errors["pods"])
+    pods = snapshot.pods_for(app) if app else snapshot.pods
+    events = cache.merge_events(snapshot.events)
+    targets, recovered = triage(pods, recent)
+    logs, errors = fetch_previous_logs(cluster, targets, cache, tail_lines)
+    cache.prune({cache.log_key(cluster.namespace, pod, container) for pod in snapshot.pods
+                 for container in pod.containers})
+    cache.save()
+
+    findings = []
+    timelines = {}
+    for pod, container in targets:
+        if pod.name not in timelines:
+            timelines[pod.name] = build_timeline(pod, [event for event in events if event.object_name == pod.name],
+                                                 logs)
+        services = None if "services" in snapshot.errors else snapshot.services
+        findings.append(classify(pod, container, timelines[pod.name], services))
+    stats = {
+        "pods": len(pods),
+        "failing": len(targets),
+        "recovered": [
+            {"pod": pod.name, "container": container.name, "restarts": container.restarts,
+             "last_reason": container.last_reason, "exit_code": container.exit_code,
+             "finished_at": last_exit(pod, container).strftime("%Y-%m-%dT%H:%M:%SZ")}
+            for pod, container in recovered
+        ],
+        "events": len(events),
+        "logs_fetched": cache.misses,
+        "logs_cached": cache.hits,
+        "errors": dict(snapshot.errors, **errors),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    return findings, stats
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Find out why pods are crash-looping")
+    parser.add_argument("--app", default=None, help="only pods labelled app=APP, e.g. lingua-frontend")
+    parser.add_argument("--lines", type=int, default=20, help="timeline entries to show per container")
+    parser.add_argument("--tail", type=int, default=200, help="lines of each previous log to fetch")
+    parser.add_argument("--recent", type=float, default=RECENT_RESTART.total_seconds() / 60,
+                        help="minutes since a ready container's last exit for it to still count as failing "
+                             "(default: %(default)g)")
+    parser.add_argument("--no-cache", action="store_true", help="fetch everything and do not write the cache")
+    parser.add_argument("--json-lines", action="store_true", help="write one JSON object per step")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = Output("crashloop", json_lines=args.json_lines or None)
+    out.print("Analyzing crash-looping containers...")
+    out.print("=" * 60)
+
+    with out.step("collect") as step:
+        try:
+            findings, stats = analyze(connect(), args.app, ArtifactCache(persist=not args.no_cache), args.tail,
+                                      timedelta(minutes=args.recent))
+        except ClusterError as e:
+            step.fail(f"Error: {e}")
+            findings = None
+        else:
+            step.data.update(stats)
+            step.print(f"{stats['pods']} pods, {stats['failing']} failing containers, {stats['events']} events; "
+                       f"{stats['logs_fetched']} previous logs fetched, {stats['logs_cached']} from cache "
+                       f"({stats['elapsed_ms']:.0f} ms)")
+            for source, error in stats["errors"].items():
+                step.warn(f"  ⚠ {source}: {error}")
+    if findings is None:
+        out.finish()
+        return 1
+
+    with out.step("findings") as step:
+        step.data["findings"] = [asdict(finding) for finding in findings]
+        if not findings:
+            step.print("\n✅ No container is crash-looping or failing to start")
+        else:
+            step.status, step.error = "error", f"{len(findings)} failing container(s)"
+        for finding in findings:
+            step.print()
+            step.print("\n".join(finding.format(args.lines)))
+        if stats["recovered"]:
+            step.data["recovered"] = stats["recovered"]
+            step.print(f"\nNotes: restarted more than {args.recent:g} minutes ago, running and ready since:")
+            for item in stats["recovered"]:
+                reason = f", last exit {item['last_reason']}" if item["last_reason"] else ""
+                step.print(f"  ℹ {item['pod']}/{item['container']}: {item['restarts']} restarts{reason} "
+                           f"at {item['finished_at']}")
+
+    causes = {}
+    for finding in findings:
+        causes[finding.cause] = causes.get(finding.cause, 0) + 1
+    if causes:
+        out.print("\n" + "=" * 60)
+        out.print("Causes: " + ", ".join(f"{cause} x{count}" for cause, count in sorted(causes.items())))
+    out.finish(causes=causes)
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
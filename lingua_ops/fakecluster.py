@@ -0,0 +1,828 @@
+"""
+In-process fake of the Lingua Phone cluster for exercising the ops scripts.
+
+FakeCluster extends LocalCluster with a small controller loop. Deployments
+own ReplicaSets named after a hash of their pod template, and ReplicaSets
+own pods. Pods walk through Pending -> ContainerCreating -> Running -> Ready
+on a fixed schedule and record the events and logs the kubelet would.
+Changing a deployment's template (set_image, PUT, PATCH) starts a rolling
+update: the new pods come up, and the old ones terminate once their
+replacements are ready. Meanwhile the deployment status fields move the way
+RolloutWatcher and `kubectl rollout status` expect. Failure scenarios make
+chosen containers crash-loop, with restart counts, back-off and previous
+logs, fail to pull their image, or get OOM-killed.
+
+serve() exposes the same objects through a local HTTP API server that
+handles lists, watches, log follows and writes. Any script can run against
+it with LINGUA_K8S_API=http://127.0.0.1:<port>:
+
+    python fake-cluster.py --speed 10 --crash lingua-frontend
+    LINGUA_K8S_API=http://127.0.0.1:8001 python diagnose-frontend.py
+
+--speed divides every lifecycle delay, and --latency adds a fixed delay to
+every API call to stand in for the round trip to a real API server. The
+API calls each script made are counted at /__fake/stats.
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from lingua_ops import config
+from lingua_ops.cluster import ClusterError, LocalCluster, match_labels, now_iso, parse_resource_path, parse_time
+
+# Seconds each lifecycle step takes at speed 1
+SCHEDULE_DELAY = 0.5
+PULL_DELAY = 2.0
+READY_DELAY = 1.0
+CRASH_AFTER = 1.5
+TERMINATE_DELAY = 1.0
+LOG_INTERVAL = 5.0
+MAX_BACKOFF = 300.0
+
+FAILURE_MODES = ("crashloop", "image-pull", "oom")
+
+NODES = (
+    "gke-lingua-cluster-default-pool-3f1c9a2e-7kqd",
+    "gke-lingua-cluster-default-pool-3f1c9a2e-m2xw",
+    "gke-lingua-cluster-default-pool-3f1c9a2e-zt5h",
+)
+
+# deployment -> (image, container port), as in k8s/*-deployment.yaml
+LINGUA_APPS = {
+    "lingua-backend": (f"{config.REGISTRY}/lingua-backend:latest", 3002),
+    "lingua-frontend": (f"{config.REGISTRY}/lingua-frontend:latest", 80),
+}
+
+STARTUP_LOGS = {
+    "lingua-backend": [
+        "> @lingua/backend@1.0.0 start",
+        "> node dist/index.js",
+        "Google Cloud credentials loaded from /var/secrets/google/key.json",
+        "Server running on port 3002",
+    ],
+    "lingua-frontend": [
+        "/docker-entrypoint.sh: Configuration complete; ready for start up",
+        "nginx/1.25.3",
+        "using the \"epoll\" event method",
+        "start worker processes",
+    ],
+}
+RUNNING_LOGS = {
+    "lingua-backend": "GET /api/languages 200 2.4 ms",
+    "lingua-frontend": '10.4.0.1 - - "GET / HTTP/1.1" 200 1024 "-" "kube-probe/1.29"',
+}
+CRASH_LOGS = {
+    "lingua-backend": [
+        "Error: listen EADDRINUSE: address already in use :::3002",
+        "    at Server.setupListenHandle [as _listen2] (node:net:1817:16)",
+    ],
+    "lingua-frontend": [
+        'nginx: [emerg] host not found in upstream "lingua-backend-service:3002" '
+        "in /etc/nginx/conf.d/default.conf:30",
+    ],
+}
+
+
+def log_timestamp():
+    """RFC 3339 timestamp with nanosecond digits, as the kubelet writes them"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f") + "000Z"
+
+
+def template_hash(template):
+    """Stable short hash of a pod template, used as the pod-template-hash label"""
+    digest = hashlib.sha256(json.dumps(template, sort_keys=True).encode("utf-8")).hexdigest()
+    return digest[:10]
+
+
+def deployment_manifest(name, image, port, replicas=1):
+    labels = {"app": name}
+    return {
+        "metadata": {"name": name, "labels": dict(labels)},
+        "spec": {
+            "replicas": replicas,
+            "selector": {"matchLabels": dict(labels)},
+            "template": {
+                "metadata": {"labels": dict(labels)},
+                "spec": {"containers": [{"name": name, "image": image, "ports": [{"containerPort": port}]}]},
+            },
+        },
+    }
+
+
+def service_manifest(name, app, port):
+    return {
+        "metadata": {"name": name},
+        "spec": {"type": "ClusterIP", "selector": {"app": app},
+                 "ports": [{"protocol": "TCP", "port": port, "targetPort": port}]},
+    }
+
+
+@dataclass
+class _Container:
+    name: str
+    image: str
+    stage: str = "creating"
+    since: float = 0.0
+    ready: bool = False
+    restarts: int = 0
+    pulls: int = 0
+    backoff: float = 0.0
+    reason: str = None
+    message: str = None
+    started_at: str = None
+    next_log: float = 0.0
+    last_state: dict = None
+    lines: list = field(default_factory=list)
+    previous: list = None
+
+
+@dataclass
+class _PodState:
+    deployment: str
+    hash: str
+    since: float
+    containers: dict
+    stage: str = "pending"
+    node: str = None
+    ip: str = None
+
+
+class FakeCluster(LocalCluster):
+    """LocalCluster plus a simulated deployment controller and kubelet"""
+
+    def __init__(self, namespace=None, speed=1.0, clock=time.monotonic, seed=None):
+        self._wake = threading.Event()
+        super().__init__(namespace=namespace)
+        self.speed = speed
+        self.clock = clock
+        self.failures = {}
+        self.api_calls = Counter()
+        self._pods = {}
+        self._event_names = {}
+        self._scheduled = 0
+        self._rng = random.Random(seed)
+        self._state = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Failure scenarios
+
+    def fail(self, deployment, mode="crashloop", image=None):
+        """Make a deployment's containers fail; only those running `image` if one is given"""
+        if mode not in FAILURE_MODES:
+            raise ValueError(f"Unknown failure mode {mode!r}; expected one of {', '.join(FAILURE_MODES)}")
+        with self._state:
+            self.failures[deployment] = (mode, image)
+
+    def heal(self, deployment):
+        with self._state:
+            self.failures.pop(deployment, None)
+
+    def _failure(self, state, container):
+        mode, image = self.failures.get(state.deployment, (None, None))
+        if mode and (image is None or image == container.image):
+            return mode
+        return None
+
+    # Controller loop
+
+    def start(self, interval=0.05):
+        """Run the controller on a background thread until stop()"""
+        def loop():
+            while not self._stop.is_set():
+                self.reconcile()
+                self._wake.wait(interval)
+                self._wake.clear()
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def reconcile(self):
+        """Advance every deployment and pod by one controller pass"""
+        now = self.clock()
+        with self._state:
+            deployments = [obj for (kind, _), bucket in list(self.objects.items()) if kind == "deployments"
+                           for obj in list(bucket.values())]
+            for deployment in deployments:
+                self._sync_deployment(deployment, now)
+            owners = {(obj["metadata"]["namespace"], obj["metadata"]["name"]) for obj in deployments}
+            for key, state in list(self._pods.items()):
+                if (key[0], state.deployment) not in owners and state.stage != "terminating":
+                    self._terminate(key, now)
+                self._step_pod(key, state, now)
+            for deployment in deployments:
+                self._update_status(deployment)
+
+    def _delay(self, seconds):
+        return seconds / self.speed
+
+    def _sync_deployment(self, deployment, now):
+        metadata, spec = deployment["metadata"], deployment["spec"]
+        namespace, name = metadata["namespace"], metadata["name"]
+        current_hash = template_hash(spec["template"])
+        replica_set = f"{name}-{current_hash}"
+        replicas = spec.get("replicas", 1)
+
+        replica_sets = self._bucket("replicasets", namespace)
+        if replica_set not in replica_sets:
+            for old in list(replica_sets.values()):
+                owner = old["metadata"].get("ownerReferences", [{}])[0].get("name")
+                if owner == name and old["spec"].get("replicas"):
+                    scaled = copy.deepcopy(old)
+                    scaled["spec"]["replicas"] = 0
+                    self.add("replicasets", scaled, namespace)
+            labels = dict(spec["template"].get("metadata", {}).get("labels", {}), **{"pod-template-hash": current_hash})
+            self.add("replicasets", {
+                "metadata": {"name": replica_set, "labels": labels,
+                             "ownerReferences": [{"kind": "Deployment", "name": name}]},
+                "spec": {"replicas": replicas, "template": copy.deepcopy(spec["template"])},
+            }, namespace)
+            self._event(namespace, "Deployment", name, "Normal", "ScalingReplicaSet",
+                        f"Scaled up replica set {replica_set} to {replicas}", "deployment-controller")
+
+        live = [(key, state) for key, state in self._pods.items()
+                if key[0] == namespace and state.deployment == name and state.stage != "terminating"]
+        current = [(key, state) for key, state in live if state.hash == current_hash]
+        old = [(key, state) for key, state in live if state.hash != current_hash]
+        for _ in range(replicas - len(current)):
+            self._create_pod(deployment, replica_set, current_hash, now)
+        for key, _ in current[replicas:]:
+            self._terminate(key, now)
+
+        # Old pods go once enough new ones are ready to take their place
+        ready_new = sum(1 for _, state in current[:replicas] if _all_ready(state))
+        surplus = len(old) + ready_new - replicas
+        for key, _ in old[:max(0, surplus)]:
+            self._terminate(key, now)
+
+    def _create_pod(self, deployment, replica_set, current_hash, now):
+        namespace = deployment["metadata"]["namespace"]
+        template = copy.deepcopy(deployment["spec"]["template"])
+        suffix = "".join(self._rng.choice("bcdfghjklmnpqrstvwxz2456789") for _ in range(5))
+        name = f"{replica_set}-{suffix}"
+        labels = dict(template.get("metadata", {}).get("labels", {}), **{"pod-template-hash": current_hash})
+        containers = {
+            spec["name"]: _Container(spec["name"], spec.get("image", ""), since=now)
+            for spec in template["spec"].get("containers", [])
+        }
+        self._pods[(namespace, name)] = _PodState(deployment["metadata"]["name"], current_hash, now, containers)
+        self.add("pods", {
+            "metadata": {"name": name, "labels": labels,
+                         "ownerReferences": [{"kind": "ReplicaSet", "name": replica_set}]},
+            "spec": template["spec"],
+            "status": {"phase": "Pending", "conditions": [{"type": "PodScheduled", "status": "False"}]},
+        }, namespace)
+        self._event(namespace, "ReplicaSet", replica_set, "Normal", "SuccessfulCreate",
+                    f"Created pod: {name}", "replicaset-controller")
+
+    def _terminate(self, key, now):
+        state = self._pods.get(key)
+        if state is None or state.stage == "terminating":
+            return
+        state.stage, state.since = "terminating", now
+        namespace, name = key
+        pod = self._bucket("pods", namespace).get(name)
+        if pod is not None:
+            pod = copy.deepcopy(pod)
+            pod["metadata"]["deletionTimestamp"] = now_iso()
+            self.add("pods", pod, namespace)
+        for container in state.containers.values():
+            if container.stage == "running":
+                self._event(namespace, "Pod", name, "Normal", "Killing", f"Stopping container {container.name}")
+
+    # Kubelet
+
+    def _step_pod(self, key, state, now):
+        namespace, name = key
+        elapsed = now - state.since
+        if state.stage == "terminating":
+            if elapsed >= self._delay(TERMINATE_DELAY):
+                del self._pods[key]
+                if name in self._bucket("pods", namespace):
+                    self.remove("pods", name, namespace)
+            return
+        if state.stage == "pending":
+            if elapsed < self._delay(SCHEDULE_DELAY):
+                return
+            index = self._scheduled
+            self._scheduled += 1
+            state.stage, state.since = "scheduled", now
+            state.node = NODES[index % len(NODES)]
+            state.ip = f"10.4.{index % 3}.{self._rng.randint(2, 250)}"
+            self._event(namespace, "Pod", name, "Normal", "Scheduled",
+                        f"Successfully assigned {namespace}/{name} to {state.node}", "default-scheduler")
+            for container in state.containers.values():
+                self._pull(namespace, name, container, now)
+        for container in state.containers.values():
+            self._step_container(namespace, name, state, container, now)
+        self._write_pod_status(key, state)
+
+    def _pull(self, namespace, pod, container, now):
+        container.stage, container.since = "pulling", now
+        self._event(namespace, "Pod", pod, "Normal", "Pulling", f'Pulling image "{container.image}"')
+
+    def _step_container(self, namespace, pod, state, container, now):
+        elapsed = now - container.since
+        mode = self._failure(state, container)
+        if container.stage == "pulling" and elapsed >= self._delay(PULL_DELAY):
+            if mode == "image-pull":
+                container.pulls += 1
+                container.stage, container.since = "pull-backoff", now
+                container.backoff = self._delay(min(10.0 * 2 ** (container.pulls - 1), MAX_BACKOFF))
+                container.reason = "ErrImagePull" if container.reason is None else "ImagePullBackOff"
+                container.message = (f'rpc error: code = NotFound desc = failed to pull and unpack image '
+                                     f'"{container.image}": not found')
+                self._event(namespace, "Pod", pod, "Warning", "Failed",
+                            f'Failed to pull image "{container.image}": {container.message}')
+                self._event(namespace, "Pod", pod, "Normal", "BackOff", f'Back-off pulling image "{container.image}"')
+                return
+            self._event(namespace, "Pod", pod, "Normal", "Pulled",
+                        f'Successfully pulled image "{container.image}" in {PULL_DELAY / self.speed:.3f}s')
+            self._run(namespace, pod, container, now)
+        elif container.stage == "pull-backoff" and elapsed >= container.backoff:
+            container.reason = "ImagePullBackOff"
+            self._pull(namespace, pod, container, now)
+        elif container.stage == "backoff" and elapsed >= container.backoff:
+            self._event(namespace, "Pod", pod, "Normal", "Pulled",
+                        f'Container image "{container.image}" already present on machine')
+            self._run(namespace, pod, container, now)
+        elif container.stage == "running":
+            if mode in ("crashloop", "oom") and elapsed >= self._delay(CRASH_AFTER):
+                self._crash(namespace, pod, container, mode, now)
+                return
+            if not container.ready and mode is None and elapsed >= self._delay(READY_DELAY):
+                container.ready = True
+            if now >= container.next_log:
+                container.lines.append((log_timestamp(), RUNNING_LOGS.get(container.name, "healthy")))
+                container.next_log = now + self._delay(LOG_INTERVAL)
+
+    def _run(self, namespace, pod, container, now):
+        self._event(namespace, "Pod", pod, "Normal", "Created", f"Created container {container.name}")
+        self._event(namespace, "Pod", pod, "Normal", "Started", f"Started container {container.name}")
+        container.stage, container.since = "running", now
+        container.reason = container.message = None
+        container.started_at = now_iso()
+        container.next_log = now + self._delay(LOG_INTERVAL)
+        if container.restarts:
+            container.previous = container.lines
+        container.lines = [(log_timestamp(), text) for text in STARTUP_LOGS.get(container.name, ["started"])]
+
+    def _crash(self, namespace, pod, container, mode, now):
+        oom = mode == "oom"
+        if not oom:
+            container.lines.extend((log_timestamp(), text) for text in CRASH_LOGS.get(container.name, ["fatal error"]))
+        container.last_state = {"terminated": {
+            "exitCode": 137 if oom else 1,
+            "reason": "OOMKilled" if oom else "Error",
+            "startedAt": container.started_at,
+            "finishedAt": now_iso(),
+        }}
+        container.restarts += 1
+        container.ready = False
+        container.backoff = self._delay(min(10.0 * 2 ** (container.restarts - 1), MAX_BACKOFF))
+        container.stage, container.since = "backoff", now
+        self._event(namespace, "Pod", pod, "Warning", "BackOff",
+                    f"Back-off restarting failed container {container.name} in pod {pod}_{namespace}")
+
+    def _write_pod_status(self, key, state):
+        namespace, name = key
+        pod = self._bucket("pods", namespace).get(name)
+        if pod is None:
+            return
+        statuses = []
+        for container in state.containers.values():
+            status = {"name": container.name, "image": container.image, "ready": container.ready,
+                      "restartCount": container.restarts, "started": container.stage == "running"}
+            if container.stage == "running":
+                status["state"] = {"running": {"startedAt": container.started_at}}
+            elif container.stage == "backoff":
+                status["state"] = {"waiting": {
+                    "reason": "CrashLoopBackOff",
+                    "message": (f"back-off {container.backoff * self.speed:.0f}s restarting failed "
+                                f"container={container.name} pod={name}_{namespace}"),
+                }}
+            elif container.reason:
+                status["state"] = {"waiting": {"reason": container.reason, "message": container.message}}
+            else:
+                status["state"] = {"waiting": {"reason": "ContainerCreating"}}
+            if container.last_state:
+                status["lastState"] = container.last_state
+            statuses.append(status)
+
+        ready = "True" if _all_ready(state) else "False"
+        started = any(container.started_at for container in state.containers.values())
+        status = dict(pod.get("status", {}))
+        status.update(
+            phase="Running" if started else "Pending",
+            podIP=state.ip,
+            conditions=[{"type": "PodScheduled", "status": "True"},
+                        {"type": "Initialized", "status": "True"},
+                        {"type": "ContainersReady", "status": ready},
+                        {"type": "Ready", "status": ready}],
+            containerStatuses=statuses,
+        )
+        status.setdefault("startTime", now_iso())
+        if pod.get("status") == status and pod["spec"].get("nodeName") == state.node:
+            return
+        pod = copy.deepcopy(pod)
+        pod["spec"]["nodeName"] = state.node
+        pod["status"] = status
+        self.add("pods", pod, namespace)
+
+    def _update_status(self, deployment):
+        metadata, spec = deployment["metadata"], deployment["spec"]
+        namespace, name = metadata["namespace"], metadata["name"]
+        current_hash = template_hash(spec["template"])
+        live = [state for (pod_namespace, _), state in self._pods.items()
+                if pod_namespace == namespace and state.deployment == name and state.stage != "terminating"]
+        updated = [state for state in live if state.hash == current_hash]
+        ready = sum(1 for state in live if _all_ready(state))
+        wanted = spec.get("replicas", 1)
+        complete = len(updated) == len(live) == wanted and ready >= wanted
+        status = {
+            "observedGeneration": metadata.get("generation", 1),
+            "replicas": len(live),
+            "updatedReplicas": len(updated),
+            "readyReplicas": ready,
+            "availableReplicas": ready,
+            "unavailableReplicas": max(0, wanted - ready),
+            "conditions": [
+                {"type": "Available", "status": "True" if ready >= wanted else "False",
+                 "reason": "MinimumReplicasAvailable" if ready >= wanted else "MinimumReplicasUnavailable"},
+                {"type": "Progressing", "status": "True",
+                 "reason": "NewReplicaSetAvailable" if complete else "ReplicaSetUpdated"},
+            ],
+        }
+        if deployment.get("status") != status:
+            deployment = copy.deepcopy(deployment)
+            deployment["status"] = status
+            self.add("deployments", deployment, namespace)
+
+    def _event(self, namespace, kind, name, type, reason, message, component="kubelet"):
+        """Record an event, bumping the count of an identical earlier one like the API server does"""
+        key = (namespace, kind, name, reason, message)
+        stamp = now_iso()
+        bucket = self._bucket("events", namespace)
+        existing = bucket.get(self._event_names.get(key))
+        if existing is not None:
+            event = copy.deepcopy(existing)
+            event["count"] += 1
+            event["lastTimestamp"] = stamp
+        else:
+            event = {
+                "metadata": {"name": f"{name}.{time.time_ns():x}"},
+                "involvedObject": {"kind": kind, "name": name, "namespace": namespace},
+                "type": type,
+                "reason": reason,
+                "message": message,
+                "count": 1,
+                "firstTimestamp": stamp,
+                "lastTimestamp": stamp,
+                "source": {"component": component},
+            }
+            self._event_names[key] = event["metadata"]["name"]
+        self.add("events", event, namespace)
+
+    # API surface
+
+    def add(self, kind, obj, namespace=None):
+        if kind == "deployments":
+            metadata = obj.setdefault("metadata", {})
+            existing = self._bucket(kind, metadata.get("namespace") or namespace or self.namespace).get(metadata["name"])
+            generation = existing["metadata"].get("generation", 1) if existing else 0
+            if existing is None or existing.get("spec") != obj.get("spec"):
+                generation += 1
+            metadata["generation"] = generation
+        obj = super().add(kind, obj, namespace)
+        self._wake.set()
+        return obj
+
+    def remove(self, kind, name, namespace=None):
+        if kind == "pods":
+            self._pods.pop((namespace or self.namespace, name), None)
+        return super().remove(kind, name, namespace)
+
+    def count(self, method, kind, subresource=None):
+        self.api_calls[f"{method} {kind}" + (f"/{subresource}" if subresource else "")] += 1
+
+    def stats_dict(self):
+        with self._state:
+            return {"api_calls": dict(sorted(self.api_calls.items())), "total": sum(self.api_calls.values()),
+                    "pods": len(self._pods), "resource_version": self.version}
+
+    def watch(self, kind, resource_version=None, label_selector=None, timeout_seconds=60, namespace=None):
+        oldest = self.history[0][0] if self.history else 0
+        if resource_version and int(resource_version) < oldest - 1:
+            raise ClusterError(f"too old resource version: {resource_version} ({oldest - 1})", 410)
+        yield from super().watch(kind, resource_version, label_selector, timeout_seconds, namespace)
+
+    def request(self, method, path, params=None, body=None, stream=False, timeout=None):
+        params = params or {}
+        kind, namespace, name, subresource = parse_resource_path(path)
+        with self._state:
+            self.count(method, kind, subresource)
+            if subresource == "log" and (namespace, name) in self._pods:
+                container, lines = self._log_source(namespace, name, params)
+                return "".join(line + "\n" for line in _format_log(lines, params))
+            if kind == "pods" and method == "DELETE":
+                # Pods terminate gracefully and their ReplicaSet replaces them
+                bucket = self._bucket(kind, namespace)
+                names = [name] if name else [key for key, pod in bucket.items()
+                                             if match_labels(pod["metadata"].get("labels"), params.get("labelSelector"))]
+                for key in names:
+                    if key not in bucket:
+                        raise ClusterError(f'pods "{key}" not found', 404)
+                    if (namespace, key) in self._pods:
+                        self._terminate((namespace, key), self.clock())
+                    else:
+                        self.remove(kind, key, namespace)
+                return {"kind": "Status", "status": "Success"}
+            if method == "POST" and (body or {}).get("metadata", {}).get("name") in self._bucket(kind, namespace):
+                raise ClusterError(f'{kind} "{body["metadata"]["name"]}" already exists', 409)
+            if method == "PATCH":
+                bucket = self._bucket(kind, namespace)
+                if name not in bucket:
+                    raise ClusterError(f'{kind} "{name}" not found', 404)
+                target = copy.deepcopy(bucket[name])
+                _merge(target, body or {})
+                return copy.deepcopy(self.add(kind, target, namespace))
+            if method in ("POST", "PUT"):
+                body = copy.deepcopy(body)
+            return copy.deepcopy(super().request(method, path, params, body))
+
+    def _log_source(self, namespace, pod, params):
+        state = self._pods[(namespace, pod)]
+        name = params.get("container")
+        if name is None:
+            if len(state.containers) != 1:
+                raise ClusterError(f"a container name must be specified for pod {pod}, choose one of: "
+                                   f"[{' '.join(state.containers)}]", 400)
+            name = next(iter(state.containers))
+        if name not in state.containers:
+            raise ClusterError(f"container {name} is not valid for pod {pod}", 400)
+        container = state.containers[name]
+        if params.get("previous") == "true":
+            if container.previous is None:
+                raise ClusterError(f'previous terminated container "{name}" in pod "{pod}" not found', 400)
+            return container, container.previous
+        if container.started_at is None:
+            raise ClusterError(f'container "{name}" in pod "{pod}" is waiting to start: ContainerCreating', 400)
+        return container, container.lines
+
+    def follow_log(self, namespace, pod, params, timeout=60):
+        """
+        Return a generator of log lines that keeps following the container until it exits or `timeout`
+        passes. Errors (unknown pod or container) are raised here rather than from the generator.
+        """
+        namespace = namespace or self.namespace
+        with self._state:
+            if (namespace, pod) not in self._pods:
+                raise ClusterError(f'pods "{pod}" not found', 404)
+            container, lines = self._log_source(namespace, pod, params)
+            if params.get("previous") == "true":
+                return iter(list(_format_log(lines, params)))
+            initial = list(_format_log(lines, params))
+            position = len(lines)
+
+        def follow():
+            nonlocal position
+            yield from initial
+            deadline = time.monotonic() + timeout
+            tail = dict(params, tailLines=None, sinceTime=None)
+            while time.monotonic() < deadline:
+                with self._state:
+                    fresh = lines[position:]
+                    position = len(lines)
+                    running = (container.lines is lines and container.stage == "running"
+                               and (namespace, pod) in self._pods)
+                yield from _format_log(fresh, tail)
+                if not running:
+                    return
+                time.sleep(0.1)
+
+        return follow()
+
+    def stream_log(self, name, container=None, follow=False, since_time=None, tail_lines=None,
+                   previous=False, timestamps=True, timeout=60):
+        params = {"container": container, "previous": "true" if previous else None, "tailLines": tail_lines,
+                  "sinceTime": since_time, "timestamps": "true" if timestamps else None}
+        params = {key: value for key, value in params.items() if value is not None}
+        if follow and (self.namespace, name) in self._pods:
+            yield from self.follow_log(self.namespace, name, params, timeout)
+        else:
+            yield from self.request("GET", f"/api/v1/namespaces/{self.namespace}/pods/{name}/log",
+                                    params=params).splitlines()
+
+
+def _all_ready(state):
+    return bool(state.containers) and all(container.ready for container in state.containers.values())
+
+
+def _format_log(lines, params):
+    """Apply the sinceTime, tailLines and timestamps parameters of the log endpoint"""
+    since = parse_time(params.get("sinceTime"))
+    if since is not None:
+        lines = [(stamp, text) for stamp, text in lines if parse_time(stamp[:19] + "Z") >= since]
+    if params.get("tailLines"):
+        lines = lines[-int(params["tailLines"]):]
+    timestamps = params.get("timestamps") == "true"
+    for stamp, text in lines:
+        yield f"{stamp} {text}" if timestamps else text
+
+
+def _merge(target, patch):
+    """Apply a JSON merge patch (RFC 7386) in place"""
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+def lingua_app(cluster, replicas=1):
+    """Create what `kubectl apply -k k8s/` creates: config, secret, both deployments and their services"""
+    cluster.add("configmaps", {"metadata": {"name": "lingua-config"},
+                               "data": {"NODE_ENV": "production", "PORT": "3002"}})
+    cluster.add("secrets", {"metadata": {"name": "google-cloud-key"}, "type": "Opaque", "data": {}})
+    for index, (name, (image, port)) in enumerate(LINGUA_APPS.items()):
+        cluster.add("deployments", deployment_manifest(name, image, port, replicas))
+        service = service_manifest(f"{name}-service", name, port)
+        service["spec"]["clusterIP"] = f"10.8.0.{10 + index}"
+        cluster.add("services", service)
+    return cluster
+
+
+def serve(cluster, host="127.0.0.1", port=8001, latency=0.0):
+    """Serve the fake cluster's REST API on a background thread; returns the server"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PUT(self):
+            self._dispatch("PUT")
+
+        def do_PATCH(self):
+            self._dispatch("PATCH")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+        def _dispatch(self, method):
+            url = urlsplit(self.path)
+            params = dict(parse_qsl(url.query))
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            if latency:
+                time.sleep(latency)
+            if url.path == "/__fake/stats":
+                self._send(200, cluster.stats_dict())
+                return
+            try:
+                kind, namespace, name, subresource = parse_resource_path(url.path)
+                if method == "GET" and params.get("watch") in ("true", "1"):
+                    cluster.count("WATCH", kind)
+                    self._stream(self._watch(kind, namespace, params), "application/json")
+                    return
+                if method == "GET" and subresource == "log" and params.get("follow") == "true":
+                    cluster.count("FOLLOW", kind, subresource)
+                    lines = cluster.follow_log(namespace, name, params)
+                    self._stream((line + "\n" for line in lines), "text/plain")
+                    return
+                result = cluster.request(method, url.path, params, body)
+            except ClusterError as e:
+                code = e.status_code or 500
+                self._send(code, {"kind": "Status", "apiVersion": "v1", "status": "Failure",
+                                  "message": str(e), "code": code})
+                return
+            self._send(201 if method == "POST" else 200, result)
+
+        def _watch(self, kind, namespace, params):
+            try:
+                for event, obj in cluster.watch(kind, params.get("resourceVersion"), params.get("labelSelector"),
+                                                int(params.get("timeoutSeconds", 60)), namespace):
+                    yield json.dumps({"type": event, "object": obj}) + "\n"
+            except ClusterError as e:
+                yield json.dumps({"type": "ERROR", "object": {"kind": "Status", "status": "Failure",
+                                                              "message": str(e), "code": e.status_code}}) + "\n"
+
+        def _send(self, status, result):
+            if isinstance(result, str):
+                body, content_type = result.encode("utf-8"), "text/plain"
+            else:
+                body, content_type = json.dumps(result).encode("utf-8"), "application/json"
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, chunks, content_type):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for chunk in chunks:
+                    data = chunk.encode("utf-8")
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+            finally:
+                chunks.close()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _failure_specs(values, mode):
+    specs = []
+    for value in values or []:
+        deployment, _, image = value.partition("=")
+        specs.append((deployment, mode, image or None))
+    return specs
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Run a fake Lingua Phone Kubernetes API server")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8001, help="port to listen on")
+    parser.add_argument("--namespace", default=config.NAMESPACE, help="namespace to populate")
+    parser.add_argument("--speed", type=float, default=1.0, help="run pod lifecycles this many times faster")
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds added to every API call")
+    parser.add_argument("--replicas", type=int, default=1, help="replicas per deployment")
+    parser.add_argument("--empty", action="store_true", help="start with only the namespace, as before a first deploy")
+    parser.add_argument("--crash", action="append", metavar="DEPLOYMENT[=IMAGE]",
+                        help="make a deployment crash-loop (only pods running IMAGE, if given)")
+    parser.add_argument("--oom", action="append", metavar="DEPLOYMENT[=IMAGE]",
+                        help="make a deployment's containers get OOM-killed")
+    parser.add_argument("--image-pull-error", action="append", metavar="DEPLOYMENT[=IMAGE]",
+                        help="make a deployment's image pulls fail")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cluster = FakeCluster(namespace=args.namespace, speed=args.speed)
+    for deployment, mode, image in (_failure_specs(args.crash, "crashloop") + _failure_specs(args.oom, "oom")
+                                    + _failure_specs(args.image_pull_error, "image-pull")):
+        cluster.fail(deployment, mode, image)
+    if not args.empty:
+        lingua_app(cluster, args.replicas)
+    cluster.start()
+    server = serve(cluster, args.host, args.port, args.latency / 1000)
+    url = f"http://{args.host}:{server.server_port}"
+    print(f"Fake cluster API on {url} (namespace {args.namespace}, speed x{args.speed:g})")
+    print(f"Point the scripts at it with LINGUA_K8S_API={url}; API call counts are at {url}/__fake/stats")
+    try:
+        if args.duration is None:
+            threading.Event().wait()
+        else:
+            time.sleep(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        cluster.stop()
+    stats = cluster.stats_dict()
+    print(f"\n{stats['total']} API calls")
+    for call, count in stats["api_calls"].items():
+        print(f"  {count:>6}  {call}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
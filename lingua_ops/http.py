@@ -0,0 +1,237 @@
+"""
+HTTP helpers shared by the probe and benchmark tools.
+
+Requests never raise: transport failures and missed deadlines are reported
+on the returned HttpResult so callers can aggregate them like any other
+response.
+
+Client keeps connections alive between requests so repeated probes and load
+runs measure the server rather than TCP and TLS handshakes. It caps the
+connections open to each host, retries transport failures and 502/503/504
+answers with jittered exponential backoff, and speaks HTTP/2 to https
+origins when httpx is installed with its h2 extra. A retried result keeps
+the first attempt's status, error and latency alongside the final ones, so
+callers that measure the server can ignore what the retries papered over.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import requests
+
+try:
+    import h2  # httpx only negotiates HTTP/2 when the h2 package is importable
+    import httpx
+except ImportError:
+    httpx = None
+
+RETRY_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+@dataclass
+class HttpResult:
+    method: str
+    url: str
+    status_code: int = None
+    elapsed: float = 0.0
+    headers: dict = field(default_factory=dict)
+    body: bytes = b""
+    error: str = None
+    attempts: int = 1
+    first_status_code: int = None
+    first_elapsed: float = None
+    first_error: str = None
+
+    def __post_init__(self):
+        if self.first_elapsed is None:
+            self.first_status_code, self.first_elapsed, self.first_error = self.status_code, self.elapsed, self.error
+
+    @property
+    def ok(self):
+        return self.error is None and self.status_code is not None and self.status_code < 400
+
+    @property
+    def first_ok(self):
+        """Whether the first attempt succeeded, before any retry"""
+        return self.first_error is None and self.first_status_code is not None and self.first_status_code < 400
+
+    @property
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+
+def request(method, url, json=None, params=None, timeout=5.0, session=None, **kwargs):
+    """Send one request and return an HttpResult with the wall-clock time taken"""
+    send = session.request if session is not None else requests.request
+    start = time.perf_counter()
+    try:
+        response = send(method, url, json=json, params=params, timeout=timeout, **kwargs)
+    except requests.exceptions.RequestException as e:
+        return HttpResult(method, url, elapsed=time.perf_counter() - start, error=str(e))
+    return HttpResult(
+        method,
+        url,
+        status_code=response.status_code,
+        elapsed=time.perf_counter() - start,
+        headers=dict(response.headers),
+        body=response.content,
+    )
+
+
+def pooled_session(pool_size):
+    """Return a requests.Session whose keep-alive pool holds at most pool_size connections per host"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class Client:
+    """Keep-alive HTTP client with per-host connection limits and retries
+
+    At most pool_size requests are in flight to any one host; further callers
+    wait for a connection to come back to the pool. Failed attempts are retried
+    up to retries times for methods in retry_methods (transport failures always,
+    answers only when their status is in retry_statuses), sleeping a random time
+    between 0 and backoff * 2**attempt (capped at max_backoff) so that many
+    clients retrying at once do not hit the server in lockstep.
+    """
+
+    def __init__(self, pool_size=10, retries=2, backoff=0.1, max_backoff=2.0, http2=True,
+                 retry_methods=IDEMPOTENT_METHODS, retry_statuses=RETRY_STATUSES):
+        self.pool_size = pool_size
+        self.retries = retries
+        self.retry_statuses = tuple(retry_statuses)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_methods = {method.upper() for method in retry_methods}
+        self.http2 = http2 and httpx is not None
+        self._session = pooled_session(pool_size)
+        self._h2 = None
+        self._slots = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+
+    def _slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.pool_size)
+            return self._slots[host]
+
+    def _h2_client(self):
+        with self._lock:
+            if self._h2 is None:
+                limits = httpx.Limits(max_connections=None, max_keepalive_connections=self.pool_size)
+                self._h2 = httpx.Client(http2=True, limits=limits)
+            return self._h2
+
+    def _send_h2(self, method, url, json=None, params=None, timeout=5.0, data=None, **kwargs):
+        if data is not None and not isinstance(data, dict):
+            kwargs["content"] = data
+        elif data is not None:
+            kwargs["data"] = data
+        start = time.perf_counter()
+        try:
+            response = self._h2_client().request(method, url, json=json, params=params, timeout=timeout, **kwargs)
+        except httpx.HTTPError as e:
+            return HttpResult(method, url, elapsed=time.perf_counter() - start, error=str(e))
+        return HttpResult(
+            method,
+            url,
+            status_code=response.status_code,
+            elapsed=time.perf_counter() - start,
+            headers=dict(response.headers),
+            body=response.content,
+        )
+
+    def _send(self, method, url, **kwargs):
+        with self._slot(url):
+            if self.http2 and url.startswith("https://"):
+                return self._send_h2(method, url, **kwargs)
+            return request(method, url, session=self._session, **kwargs)
+
+    def delay(self, attempt):
+        """Seconds to sleep before retry number attempt (0-based), with full jitter"""
+        return self._rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request, retrying if allowed.
+
+        elapsed covers every attempt and the waits between them; the first_*
+        fields keep what the first attempt saw.
+        """
+        retries = self.retries if method.upper() in self.retry_methods else 0
+        start = time.perf_counter()
+        for attempt in range(retries + 1):
+            result = self._send(method, url, **kwargs)
+            if attempt == 0:
+                first = result
+            if attempt == retries or (result.error is None and result.status_code not in self.retry_statuses):
+                break
+            time.sleep(self.delay(attempt))
+        result.attempts = attempt + 1
+        result.elapsed = time.perf_counter() - start
+        result.first_status_code, result.first_elapsed, result.first_error = (
+            first.status_code, first.elapsed, first.error)
+        return result
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self._session.close()
+        if self._h2 is not None:
+            self._h2.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_client():
+    """Return the process-wide Client used by the probe scripts
+
+    Only transport failures of idempotent requests are retried: POSTs such as
+    /api/chat and /api/tts are billed per call, and a 5xx answer is exactly
+    what a probe has to report.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Client(pool_size=16, retry_statuses=())
+        return _shared
+
+
+async def arequest(method, url, deadline=5.0, client=None, **kwargs):
+    """Run request() on a worker thread, giving up once deadline seconds have passed
+
+    With client, the request goes through Client.request() and its retries
+    must fit inside the same deadline.
+    """
+    start = time.perf_counter()
+    kwargs.setdefault("timeout", deadline)
+    send = client.request if client is not None else request
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(send, method, url, **kwargs), deadline)
+    except asyncio.TimeoutError:
+        return HttpResult(
+            method,
+            url,
+            elapsed=time.perf_counter() - start,
+            error=f"deadline of {deadline:.1f}s exceeded",
+        )
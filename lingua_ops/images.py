@@ -0,0 +1,344 @@
+"""
+Pipelined Docker build and push for the Lingua Phone images.
+
+Each image runs its own build -> push chain and all chains run at the same
+time, so the frontend build overlaps the backend build and each push starts
+as soon as its own build is done. Output from every step is streamed line by
+line with an image/step prefix. The first failing step cancels everything
+still running.
+
+build_changed() adds a content-hash cache on top: each image is tagged with a
+hash of its input tree (Dockerfile, package sources, nginx config) and images
+whose hash matches the last successful push are neither built nor pushed.
+The hash tag is what deployments get pinned to, so a rollout always runs
+exactly the sources that were hashed. apply_pinned() renders the tags into
+the `kubectl apply -k` itself through a temporary overlay, so a redeploy
+is a single rollout and an unchanged one is none at all.
+"""
+
+import asyncio
+import hashlib
+import json
+import glob
+import os
+import re
+import signal
+import tempfile
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+
+from lingua_ops import config
+from lingua_ops.shell import run_command
+
+# Directories that never affect an image's contents in a meaningful way
+IGNORED_DIRS = {"node_modules", "dist", ".git", "__pycache__", ".vite", "coverage"}
+
+IMAGE_LINE = re.compile(r"^\s*-?\s*image:\s*[\"']?([^\s\"']+)", re.MULTILINE)
+
+
+@dataclass
+class ImageSpec:
+    name: str
+    repository: str
+    dockerfile: str
+    tag: str = "latest"
+    context: str = "."
+    inputs: tuple = ()
+    deployment: str = None
+    container: str = None
+
+    @property
+    def reference(self):
+        return f"{self.repository}:{self.tag}"
+
+    @property
+    def latest(self):
+        return f"{self.repository}:latest"
+
+
+BACKEND_IMAGE = ImageSpec(
+    "backend", f"{config.REGISTRY}/lingua-backend", "docker/backend.Dockerfile",
+    inputs=("docker/backend.Dockerfile", "package.json", "package-lock.json", "packages/backend"),
+    deployment="lingua-backend", container="lingua-backend",
+)
+FRONTEND_IMAGE = ImageSpec(
+    "frontend", f"{config.REGISTRY}/lingua-frontend", "docker/frontend-k8s.Dockerfile",
+    inputs=("docker/frontend-k8s.Dockerfile", "docker/nginx-k8s.conf", "package.json",
+            "package-lock.json", "packages/frontend"),
+    deployment="lingua-frontend", container="lingua-frontend",
+)
+DEFAULT_IMAGES = [BACKEND_IMAGE, FRONTEND_IMAGE]
+
+
+class ImageBuildError(Exception):
+    """Raised when a docker build or push step exits non-zero"""
+
+    def __init__(self, image, step, returncode, output):
+        super().__init__(f"{step} of {image} failed with exit code {returncode}")
+        self.image = image
+        self.step = step
+        self.returncode = returncode
+        self.output = output
+
+
+@dataclass
+class StepResult:
+    image: str
+    step: str
+    returncode: int
+    elapsed: float
+
+
+@dataclass
+class PipelineResult:
+    steps: list = field(default_factory=list)
+    elapsed: float = 0.0
+    error: ImageBuildError = None
+    images: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _stop(process, sig):
+    """Signal a step's whole process group so helper processes exit with it"""
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, sig)
+        else:
+            process.terminate()
+    except ProcessLookupError:
+        pass
+
+
+async def run_step(image, step, args, on_line, tail=40):
+    """Run one docker command, streaming its output; raises ImageBuildError on failure"""
+    start = time.perf_counter()
+    output = deque(maxlen=tail)
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            start_new_session=os.name == "posix",
+        )
+    except OSError as e:
+        raise ImageBuildError(image, step, 127, [str(e)])
+    try:
+        async for raw in process.stdout:
+            line = raw.decode("utf-8", errors="replace").rstrip()
+            output.append(line)
+            on_line(f"[{image} {step}] {line}")
+        returncode = await process.wait()
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            _stop(process, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(process.wait(), 5)
+            except asyncio.TimeoutError:
+                _stop(process, signal.SIGKILL if os.name == "posix" else signal.SIGTERM)
+                await process.wait()
+        raise
+    if returncode != 0:
+        raise ImageBuildError(image, step, returncode, list(output))
+    return StepResult(image, step, returncode, time.perf_counter() - start)
+
+
+async def build_image(spec, on_line, steps, push=True):
+    """Build one image and, if asked, push it as soon as the build finishes"""
+    tags = [spec.reference] if spec.tag == "latest" else [spec.reference, spec.latest]
+    args = ["docker", "build"]
+    for tag in tags:
+        args += ["-t", tag]
+    steps.append(await run_step(spec.name, "build", args + ["-f", spec.dockerfile, spec.context], on_line))
+    if push:
+        for tag in tags:
+            steps.append(await run_step(spec.name, "push", ["docker", "push", tag], on_line))
+
+
+async def run_pipeline(images=None, push=True, on_line=print):
+    """Run every image's build/push chain concurrently, stopping all of them on the first failure"""
+    images = images if images is not None else DEFAULT_IMAGES
+    result = PipelineResult()
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(build_image(spec, on_line, result.steps, push)) for spec in images]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            await finished
+    except ImageBuildError as e:
+        result.error = e
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def build_and_push(images=None, push=True, on_line=print):
+    """Blocking wrapper around run_pipeline() for the redeploy scripts"""
+    return asyncio.run(run_pipeline(images, push=push, on_line=on_line))
+
+
+def content_hash(spec, root="."):
+    """Hash the file names and contents of an image's inputs into a stable hex digest"""
+    digest = hashlib.sha256()
+    paths = []
+    for item in spec.inputs:
+        full = os.path.join(root, item)
+        if os.path.isdir(full):
+            for directory, dirs, files in os.walk(full):
+                dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+                paths.extend(os.path.join(directory, name) for name in files)
+        elif os.path.exists(full):
+            paths.append(full)
+    for path in sorted(paths):
+        digest.update(os.path.relpath(path, root).replace(os.sep, "/").encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """Remembers the content hash of the last successful push of each image repository"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(config.CACHE_DIR, "build-cache.json")
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def last_pushed(self, spec):
+        return self.entries.get(spec.repository, {}).get("hash")
+
+    def record(self, spec, digest):
+        self.entries[spec.repository] = {
+            "hash": digest,
+            "tag": spec.tag,
+            "pushed_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.entries, f, indent=2)
+
+
+def build_changed(images=None, on_line=print, force=False, cache=None, root="."):
+    """
+    Build and push only the images whose inputs changed since their last push.
+
+    Every image, built or not, comes back in result.images tagged with its
+    content hash, ready to be applied with apply_pinned().
+    """
+    cache = cache or BuildCache()
+    images = images if images is not None else DEFAULT_IMAGES
+    tagged, pending = [], []
+    for spec in images:
+        digest = content_hash(spec, root)
+        spec = replace(spec, tag=digest[:12])
+        tagged.append(spec)
+        if not force and cache.last_pushed(spec) == digest:
+            on_line(f"[{spec.name}] inputs unchanged since last push, reusing {spec.reference}")
+        else:
+            pending.append((spec, digest))
+
+    result = build_and_push([spec for spec, _ in pending], on_line=on_line)
+    result.images = tagged
+    rebuilt = {spec.name for spec, _ in pending}
+    result.skipped = [spec.name for spec in tagged if spec.name not in rebuilt]
+    # The hash tag is pushed first, so one push step means the pinned tag exists
+    pushed = {step.image for step in result.steps if step.step == "push"}
+    for spec, digest in pending:
+        if spec.name in pushed:
+            cache.record(spec, digest)
+    cache.save()
+    return result
+
+
+def _image_name(reference):
+    """Strip the tag from an image reference, leaving registry ports alone"""
+    name, _, tag = reference.rpartition(":")
+    return name if name and "/" not in tag else reference
+
+
+def kustomize_images(images, base="k8s"):
+    """
+    Return kustomize `images:` entries that retag each image to its content hash.
+
+    The manifests may name an image under another registry than the one it
+    is pushed to, so every image in base whose last path segment matches is
+    rewritten to the pushed repository.
+    """
+    found = set()
+    for path in sorted(glob.glob(os.path.join(base, "*.yaml")) + glob.glob(os.path.join(base, "*.yml"))):
+        with open(path, encoding="utf-8") as f:
+            found.update(_image_name(reference) for reference in IMAGE_LINE.findall(f.read()))
+    entries = []
+    for spec in images:
+        basename = spec.repository.rsplit("/", 1)[-1]
+        names = sorted(name for name in found if name.rsplit("/", 1)[-1] == basename) or [spec.repository]
+        entries.extend({"name": name, "newName": spec.repository, "newTag": spec.tag} for name in names)
+    return entries
+
+
+@contextmanager
+def pinned_overlay(images, base="k8s"):
+    """Yield a temporary kustomize overlay of base with every image at its content-hash tag"""
+    with tempfile.TemporaryDirectory(prefix="lingua-pinned-") as overlay:
+        # JSON strings are valid YAML scalars, so no YAML library is needed to write this
+        lines = ["apiVersion: kustomize.config.k8s.io/v1beta1", "kind: Kustomization", "resources:",
+                 f"- {json.dumps(os.path.relpath(os.path.abspath(base), overlay))}"]
+        entries = kustomize_images(images, base)
+        if entries:
+            lines.append("images:")
+            for entry in entries:
+                lines += [f"- name: {json.dumps(entry['name'])}",
+                          f"  newName: {json.dumps(entry['newName'])}",
+                          f"  newTag: {json.dumps(entry['newTag'])}"]
+        with open(os.path.join(overlay, "kustomization.yaml"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        yield overlay
+
+
+def apply_pinned(images, base="k8s", verbose=True):
+    """
+    `kubectl apply -k base` with the images rendered at their content-hash tags.
+
+    Returns run_command()'s (stdout, stderr, returncode). Applying the pinned
+    tags directly means the deployments never pass through :latest, so there
+    is one rollout per changed image and none when nothing changed.
+    """
+    with pinned_overlay(images, base) as overlay:
+        return run_command(["kubectl", "apply", "-k", overlay], verbose)
+
+
+def pin_images(client, images):
+    """
+    Point each image's deployment at its content-hash tag.
+
+    For redeploys that do not re-apply the manifests; anything that runs
+    `kubectl apply -k` should use apply_pinned() instead.
+    """
+    for spec in images:
+        if spec.deployment and spec.container:
+            client.set_image(spec.deployment, spec.container, spec.reference)
+
+
+def report_pipeline(result):
+    """Print a per-step timing summary, plus the failing step's last output lines"""
+    for name in result.skipped:
+        print(f"   {name:<10} skipped (unchanged)")
+    for step in result.steps:
+        print(f"   {step.image:<10} {step.step:<6} {step.elapsed:6.1f}s")
+    print(f"   Total wall-clock time: {result.elapsed:.1f}s")
+    if result.error:
+        print(f"Error: {result.error}")
+        for line in result.error.output[-10:]:
+            print(f"   {line}")
@@ -0,0 +1,379 @@
+"""
+End-to-end voice shopping journeys against the Lingua Phone backend.
+
+A journey is what one user does in one conversation with the assistant:
+speak (/api/speech-to-text), have the words translated to English
+(/api/translate), ask the Gemini assistant (/api/chat, which runs
+geminiShoppingService.processShoppingQuery), search (/api/search), open a
+product (/api/products/:id), add it to the cart (/api/cart/add) and listen
+to the reply (/api/tts). Scenarios script which of those steps a journey
+takes, in which language and with which utterances. Each step feeds the
+next one: the assistant's recommendations and the search results pick the
+product, and the assistant's reply is what gets spoken.
+
+Many simulated users run journeys at the same time. Their starts are
+spread over a ramp-up, and they pause for a lognormal think time between
+steps. Every step is timed on its own. The report attributes each
+journey's service time (the time spent waiting on the backend, without
+the think time) to its steps. It also counts how often each step was the
+slowest one in its journey, which shows the hop that dominates end-to-end
+response time.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from lingua_ops import config
+from lingua_ops.bench_stt import CODECS, UploadBody, audio_from_disk, generate_audio
+from lingua_ops.bench_tts import TTS_LANGUAGES
+from lingua_ops.http import Client, arequest
+from lingua_ops.loadtest import PRODUCT_IDS
+from lingua_ops.stats import summarize
+
+STEPS = ("stt", "translate", "chat", "search", "product", "cart", "tts")
+FULL_JOURNEY = STEPS
+
+# Median seconds a user pauses after each step (reading results, listening to the reply)
+THINK_TIME = {"stt": 0.5, "translate": 0.2, "chat": 2.0, "search": 3.0, "product": 4.0, "cart": 1.5, "tts": 3.0}
+
+
+@dataclass
+class Scenario:
+    name: str
+    language: str
+    utterances: list
+    steps: tuple = FULL_JOURNEY
+    weight: float = 1.0
+
+
+SCENARIOS = [
+    Scenario("buy_tshirt_hi", "hi", [
+        "मुझे अपनी बेटी के लिए एक सूती टी-शर्ट चाहिए",
+        "महिलाओं के लिए नीली टी-शर्ट दिखाइए",
+    ], weight=3),
+    Scenario("browse_shoes_bn", "bn", [
+        "আমাকে দৌড়ের জুতো দেখান",
+        "নয় নম্বর সাইজের জুতো আছে?",
+    ], ("stt", "translate", "chat", "search", "product", "product", "tts"), weight=2),
+    Scenario("gift_es", "es", [
+        "Busco un regalo para mi madre",
+        "Quiero una mochila azul",
+    ], weight=1),
+    Scenario("quick_add_en", "en", [
+        "Add a women's t-shirt to my cart",
+        "I need a water bottle",
+    ], ("stt", "chat", "product", "cart", "tts"), weight=2),
+]
+
+
+@dataclass
+class StepResult:
+    step: str
+    elapsed: float
+    status_code: int = None
+    ok: bool = False
+    error: str = None
+
+
+@dataclass
+class JourneyResult:
+    scenario: str
+    user: int
+    steps: list = field(default_factory=list)
+    wall: float = 0.0
+
+    @property
+    def service(self):
+        return sum(step.elapsed for step in self.steps)
+
+    @property
+    def ok(self):
+        return all(step.ok for step in self.steps)
+
+
+@dataclass
+class JourneyReport:
+    users: int
+    journeys: list = field(default_factory=list)
+    duration: float = 0.0
+    started_at: str = None
+
+    def to_dict(self):
+        by_step, by_scenario, dominant = {}, {}, {}
+        for journey in self.journeys:
+            by_scenario.setdefault(journey.scenario, []).append(journey)
+            for step in journey.steps:
+                by_step.setdefault(step.step, []).append(step)
+            if journey.steps:
+                slowest = max(journey.steps, key=lambda step: step.elapsed).step
+                dominant[slowest] = dominant.get(slowest, 0) + 1
+        service_total = sum(journey.service for journey in self.journeys)
+        steps = {}
+        for name in STEPS:
+            results = by_step.get(name)
+            if not results:
+                continue
+            section = summarize([result.elapsed for result in results if result.ok])
+            section["errors"] = sum(1 for result in results if not result.ok)
+            section["share"] = round(sum(result.elapsed for result in results) / service_total, 4) \
+                if service_total else None
+            section["slowest_in"] = dominant.get(name, 0)
+            steps[name] = section
+        return {
+            "started_at": self.started_at,
+            "users": self.users,
+            "duration_s": round(self.duration, 2),
+            "journeys": len(self.journeys),
+            "journeys_ok": sum(1 for journey in self.journeys if journey.ok),
+            "journeys_per_min": round(len(self.journeys) / self.duration * 60, 2) if self.duration else None,
+            "service": summarize([journey.service for journey in self.journeys]),
+            "wall": summarize([journey.wall for journey in self.journeys]),
+            "steps": steps,
+            "scenarios": {
+                name: {
+                    "journeys": len(journeys),
+                    "ok": sum(1 for journey in journeys if journey.ok),
+                    "service": summarize([journey.service for journey in journeys]),
+                }
+                for name, journeys in sorted(by_scenario.items())
+            },
+        }
+
+    def format(self):
+        data = self.to_dict()
+        lines = [f"{data['journeys']} journeys by {data['users']} users in {data['duration_s']:.0f}s "
+                 f"({data['journeys_ok']} without errors, {data['journeys_per_min'] or 0:.1f}/min)"]
+        if not data["journeys"]:
+            return lines
+        lines.append(f"  service time p50 {data['service']['p50_ms']:.0f} ms  p90 {data['service']['p90_ms']:.0f} ms  "
+                     f"(wall time with think time p50 {data['wall']['p50_ms'] / 1000:.1f}s)")
+        lines.append(f"  {'STEP':<10} {'SHARE':>6} {'SLOWEST':>8} {'P50':>9} {'P90':>9} {'P99':>9} {'ERRORS':>7}")
+        for name, section in sorted(data["steps"].items(), key=lambda item: -(item[1]["share"] or 0)):
+            if not section["count"]:
+                lines.append(f"  {name:<10} {section['share'] * 100:>5.1f}% {section['slowest_in']:>8} "
+                             f"{'':>9} {'':>9} {'':>9} {section['errors']:>7}")
+                continue
+            lines.append(f"  {name:<10} {section['share'] * 100:>5.1f}% {section['slowest_in']:>8} "
+                         f"{section['p50_ms']:>7.0f}ms {section['p90_ms']:>7.0f}ms {section['p99_ms']:>7.0f}ms "
+                         f"{section['errors']:>7}")
+        for name, scenario in data["scenarios"].items():
+            lines.append(f"  scenario {name:<18} {scenario['journeys']:>5} journeys  "
+                         f"service p50 {scenario['service']['p50_ms'] or 0:.0f} ms  "
+                         f"p90 {scenario['service']['p90_ms'] or 0:.0f} ms")
+        return lines
+
+
+def parse_scenarios(text):
+    """Pick scenarios by name, optionally re-weighted: 'buy_tshirt_hi=3,quick_add_en'"""
+    known = {scenario.name: scenario for scenario in SCENARIOS}
+    chosen = []
+    for item in text.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in known:
+            raise ValueError(f"Unknown scenario '{name}' (choose from {', '.join(known)})")
+        scenario = known[name]
+        chosen.append(Scenario(scenario.name, scenario.language, scenario.utterances, scenario.steps,
+                               float(weight) if weight else scenario.weight))
+    return chosen
+
+
+class JourneyRunner:
+    """Run scripted journeys for many concurrent users and time every step"""
+
+    def __init__(self, base_url, audio, scenarios=None, users=10, duration=60.0, journeys_per_user=None,
+                 think_scale=1.0, ramp=5.0, timeout=30.0, seed=None):
+        self.base_url = base_url.rstrip("/")
+        self.audio = audio
+        self.scenarios = scenarios or SCENARIOS
+        self.users = users
+        self.duration = duration
+        self.journeys_per_user = journeys_per_user
+        self.think_scale = think_scale
+        self.ramp = ramp
+        self.timeout = timeout
+        self.seed = seed
+        self.client = Client(pool_size=users, retries=0)
+        self.report = JourneyReport(users)
+
+    async def _call(self, step, method, path, **kwargs):
+        response = await arequest(method, self.base_url + path, deadline=self.timeout,
+                                  client=self.client, **kwargs)
+        result = StepResult(step, response.elapsed, response.status_code, response.ok,
+                            response.error or (None if response.ok else f"HTTP {response.status_code}"))
+        data = {}
+        if response.ok:
+            try:
+                data = response.json()
+            except ValueError:
+                data = {}
+        return result, data if isinstance(data, dict) else {}
+
+    async def _step(self, name, context):
+        """Run one step, updating the journey context from its response; returns a StepResult or None if skipped"""
+        language, code = context["language"], TTS_LANGUAGES[context["language"]]
+        if name == "stt":
+            body = UploadBody(self.audio, {"language": code})
+            result, data = await self._call(name, "POST", "/api/speech-to-text", data=body,
+                                            headers={"Content-Type": body.content_type})
+            # Generated audio has no words in it, so the scripted utterance stands in for the transcript
+            context["heard"] = (data.get("text") or "").strip() or context["utterance"]
+            return result
+        if name == "translate":
+            if language == "en":
+                return None
+            result, data = await self._call(name, "POST", "/api/translate",
+                                            json={"text": context["heard"], "from": language, "to": "en"})
+            context["query"] = data.get("translatedText") or context["heard"]
+            return result
+        if name == "chat":
+            result, data = await self._call(name, "POST", "/api/chat", json={
+                "message": context.get("query") or context["heard"], "language": language,
+                "userId": context["user_id"]})
+            context["reply"] = data.get("translatedResponse") or data.get("response")
+            context["candidates"].extend(_product_ids(data.get("productRecommendations")))
+            context["candidates"].extend(_product_ids(data.get("searchResults")))
+            return result
+        if name == "search":
+            result, data = await self._call(name, "POST", "/api/search",
+                                            json={"query": context.get("query") or context["heard"],
+                                                  "language": language})
+            context["candidates"].extend(_product_ids(data.get("products")))
+            return result
+        if name == "product":
+            seen = context["viewed"]
+            product_id = next((candidate for candidate in context["candidates"] if candidate not in seen),
+                              None) or context["rng"].choice(PRODUCT_IDS)
+            seen.add(product_id)
+            result, _ = await self._call(name, "GET", f"/api/products/{product_id}", params={"language": language})
+            if result.ok:
+                context["product_id"] = product_id
+            return result
+        if name == "cart":
+            product_id = context.get("product_id") or context["rng"].choice(PRODUCT_IDS)
+            result, _ = await self._call(name, "POST", "/api/cart/add", json={
+                "userId": context["user_id"], "productId": product_id, "quantity": 1})
+            return result
+        if name == "tts":
+            text = context.get("reply") or context["utterance"]
+            result, _ = await self._call(name, "POST", "/api/tts", json={"text": text, "language": code})
+            return result
+        raise ValueError(f"Unknown step '{name}'")
+
+    async def _think(self, step, rng):
+        if self.think_scale <= 0:
+            return
+        median = THINK_TIME.get(step, 1.0) * self.think_scale
+        await asyncio.sleep(rng.lognormvariate(math.log(median), 0.5))
+
+    async def _journey(self, user, scenario, rng):
+        context = {"language": scenario.language, "utterance": rng.choice(scenario.utterances),
+                   "user_id": f"journey-user-{user}", "candidates": [], "viewed": set(), "rng": rng}
+        journey = JourneyResult(scenario.name, user)
+        start = time.perf_counter()
+        for index, name in enumerate(scenario.steps):
+            result = await self._step(name, context)
+            if result is None:
+                continue
+            journey.steps.append(result)
+            if index < len(scenario.steps) - 1:
+                await self._think(name, rng)
+        journey.wall = time.perf_counter() - start
+        return journey
+
+    async def _user(self, user, deadline):
+        rng = random.Random(None if self.seed is None else self.seed * 1000 + user)
+        if self.ramp > 0:
+            await asyncio.sleep(self.ramp * user / self.users)
+        weights = [scenario.weight for scenario in self.scenarios]
+        done = 0
+        while time.monotonic() < deadline:
+            if self.journeys_per_user is not None and done >= self.journeys_per_user:
+                return
+            scenario = rng.choices(self.scenarios, weights)[0]
+            self.report.journeys.append(await self._journey(user, scenario, rng))
+            done += 1
+
+    async def run(self):
+        self.report.started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.users))
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.duration
+        try:
+            await asyncio.gather(*(self._user(user, deadline) for user in range(self.users)))
+        finally:
+            self.client.close()
+        self.report.duration = time.perf_counter() - start
+        return self.report
+
+
+def _product_ids(items):
+    ids = []
+    for item in items or []:
+        if isinstance(item, dict) and item.get("id") is not None:
+            ids.append(str(item["id"]))
+    return ids
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Run concurrent end-to-end voice shopping journeys "
+                                                           "and attribute latency to each step")
+    parser.add_argument("--url", default=config.BACKEND_URL, help="backend base URL")
+    parser.add_argument("--users", type=int, default=10, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds during which users start journeys")
+    parser.add_argument("--journeys", type=int, default=None, help="stop each user after this many journeys")
+    parser.add_argument("--scenarios", default=",".join(scenario.name for scenario in SCENARIOS),
+                        help="comma-separated scenarios, optionally weighted (name=weight)")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="multiply think times (0 disables them)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which users start")
+    parser.add_argument("--audio", default=None, help="recording to upload for the speech-to-text step")
+    parser.add_argument("--audio-seconds", type=float, default=3.0, help="length of the generated recording")
+    parser.add_argument("--codec", default="wav", choices=sorted(CODECS),
+                        help="codec of the generated recording (all but wav need ffmpeg)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request deadline in seconds")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for repeatable journeys")
+    parser.add_argument("--output", default=None, help="write the JSON report to this file")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        scenarios = parse_scenarios(args.scenarios)
+        if args.users < 1:
+            raise ValueError(f"--users must be at least 1, got {args.users}")
+        audio = (audio_from_disk(args.audio) if args.audio
+                 else generate_audio(args.audio_seconds, args.codec, file_option="--audio"))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    runner = JourneyRunner(args.url, audio, scenarios, users=args.users, duration=args.duration,
+                           journeys_per_user=args.journeys, think_scale=args.think_scale, ramp=args.ramp,
+                           timeout=args.timeout, seed=args.seed)
+    if not args.json:
+        print(f"Running journeys with {args.users} users for {args.duration:g}s against {args.url}...", flush=True)
+    report = asyncio.run(runner.run())
+    data = report.to_dict()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write("\n")
+    if args.json:
+        print(json.dumps(data, indent=2, sort_keys=True))
+    else:
+        print("\n".join(report.format()))
+        if args.output:
+            print(f"Report written to {args.output}")
+    return 0 if data["journeys"] and data["journeys_ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
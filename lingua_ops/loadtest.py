@@ -0,0 +1,255 @@
+"""
+Load generator and latency benchmark for the Lingua Phone backend API.
+
+Two modes are supported:
+
+* closed loop (--concurrency N): N workers each send the next request as soon
+  as the previous one finishes, which measures capacity at a fixed load level;
+* open loop (--rps R): requests are started on a fixed schedule regardless of
+  how quickly the server answers. Latency is measured from the scheduled start
+  time so a saturated server shows up as growing latency instead of silently
+  lowering the offered rate.
+
+The report gives p50/p90/p99/max latency, throughput and error rate, overall
+and per endpoint, which is what the lingua-backend-hpa thresholds in
+k8s/hpa.yaml should be sized from.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from lingua_ops import config
+from lingua_ops.http import Client, arequest
+from lingua_ops.stats import format_summary, summarize
+
+PRODUCT_IDS = [str(i) for i in range(1, 21)]
+
+
+@dataclass
+class RequestSpec:
+    name: str
+    method: str
+    path: str
+    json: dict = None
+    weight: float = 1.0
+
+    def build(self, rng):
+        """Return the concrete (path, body) for one request of this kind"""
+        path = self.path.format(product_id=rng.choice(PRODUCT_IDS))
+        return path, self.json
+
+
+DEFAULT_MIX = [
+    RequestSpec("chat", "POST", "/api/chat",
+                {"message": "I am looking for a women's t-shirt", "language": "en"}, weight=1),
+    RequestSpec("translate", "POST", "/api/translate",
+                {"text": "Hello, how are you?", "from": "en", "to": "es"}, weight=3),
+    RequestSpec("tts", "POST", "/api/tts",
+                {"text": "Hello, how are you?", "language": "en-US"}, weight=1),
+    RequestSpec("search", "POST", "/api/search",
+                {"query": "t-shirt", "language": "en"}, weight=2),
+    RequestSpec("product", "GET", "/api/products/{product_id}", weight=3),
+]
+
+
+@dataclass
+class Sample:
+    name: str
+    elapsed: float
+    status_code: int
+    ok: bool
+
+
+@dataclass
+class LoadReport:
+    mode: str
+    target: float
+    samples: list = field(default_factory=list)
+    duration: float = 0.0
+
+    def _section(self, samples):
+        errors = sum(1 for sample in samples if not sample.ok)
+        section = summarize(sample.elapsed for sample in samples)
+        section["errors"] = errors
+        section["error_rate"] = round(errors / len(samples), 4) if samples else 0.0
+        section["throughput_rps"] = round(len(samples) / self.duration, 2) if self.duration else 0.0
+        return section
+
+    def to_dict(self):
+        by_name = {}
+        for sample in self.samples:
+            by_name.setdefault(sample.name, []).append(sample)
+        return {
+            "mode": self.mode,
+            "target": self.target,
+            "duration_s": round(self.duration, 3),
+            "overall": self._section(self.samples),
+            "endpoints": {name: self._section(samples) for name, samples in sorted(by_name.items())},
+        }
+
+    def format(self):
+        """Render the report as text lines"""
+        data = self.to_dict()
+        unit = "workers" if self.mode == "concurrency" else "req/s"
+        lines = [f"Load test: {self.mode} {self.target:g} {unit} for {data['duration_s']:.1f}s"]
+        rows = [("overall", data["overall"])] + list(data["endpoints"].items())
+        for name, section in rows:
+            lines.append(
+                f"  {name:<10} n={section['count']:<6} {section['throughput_rps']:>7.1f} req/s  "
+                f"errors {section['error_rate'] * 100:5.1f}%  {format_summary(section)}"
+            )
+        return lines
+
+
+def parse_mix(text, base=None):
+    """Parse 'chat=1,translate=3' into a request mix, re-weighting the default specs"""
+    base = {spec.name: spec for spec in (base or DEFAULT_MIX)}
+    mix = []
+    for item in text.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in base:
+            raise ValueError(f"Unknown request type '{name}' (choose from {', '.join(base)})")
+        spec = base[name]
+        mix.append(RequestSpec(spec.name, spec.method, spec.path, spec.json, float(weight or 1)))
+    return mix
+
+
+class _Picker:
+    """Weighted random choice over a request mix"""
+
+    def __init__(self, mix, seed=None):
+        self.mix = list(mix)
+        self.weights = [spec.weight for spec in self.mix]
+        self.rng = random.Random(seed)
+
+    def next(self):
+        return self.rng.choices(self.mix, self.weights)[0]
+
+
+async def _send(base_url, spec, rng, timeout, client=None):
+    path, body = spec.build(rng)
+    return await arequest(spec.method, base_url + path, json=body, deadline=timeout, client=client)
+
+
+async def run_closed_loop(base_url, mix, concurrency, duration, timeout=10.0, seed=None, client=None):
+    """Keep `concurrency` requests in flight for `duration` seconds"""
+    picker = _Picker(mix, seed)
+    report = LoadReport("concurrency", concurrency)
+    start = time.perf_counter()
+    stop_at = start + duration
+
+    async def worker():
+        while time.perf_counter() < stop_at:
+            spec = picker.next()
+            response = await _send(base_url, spec, picker.rng, timeout, client)
+            report.samples.append(Sample(spec.name, response.elapsed, response.status_code, response.ok))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    report.duration = time.perf_counter() - start
+    return report
+
+
+async def run_open_loop(base_url, mix, rps, duration, max_in_flight=256, timeout=10.0, seed=None,
+                        client=None):
+    """Start requests at a fixed rate of `rps` for `duration` seconds"""
+    picker = _Picker(mix, seed)
+    report = LoadReport("rps", rps)
+    slots = asyncio.Semaphore(max_in_flight)
+    interval = 1.0 / rps
+    total = int(rps * duration)
+    start = time.perf_counter()
+
+    async def fire(scheduled, spec):
+        async with slots:
+            response = await _send(base_url, spec, picker.rng, timeout, client)
+        # Measure from the scheduled start so queueing delay is not hidden
+        elapsed = time.perf_counter() - scheduled
+        report.samples.append(Sample(spec.name, elapsed, response.status_code, response.ok))
+
+    tasks = []
+    for i in range(total):
+        scheduled = start + i * interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(scheduled, picker.next())))
+    await asyncio.gather(*tasks)
+    report.duration = time.perf_counter() - start
+    return report
+
+
+def validate_load(concurrency=None, rps=None):
+    """Raise ValueError unless the load is an open loop with rps > 0 or a closed loop with concurrency >= 1"""
+    if rps is not None:
+        if not (rps > 0 and math.isfinite(rps)):
+            raise ValueError(f"--rps must be a finite number greater than 0, got {rps:g}")
+    elif concurrency is None or concurrency < 1:
+        raise ValueError(f"--concurrency must be at least 1, got {concurrency}")
+
+
+def run(base_url=None, mix=None, concurrency=None, rps=None, duration=10.0, timeout=10.0, seed=None):
+    """Blocking entry point: run one load test and return its LoadReport"""
+    validate_load(concurrency, rps)
+    base_url = (base_url or config.BACKEND_URL).rstrip("/")
+    mix = mix or DEFAULT_MIX
+    workers = concurrency if rps is None else min(256, max(8, int(rps * timeout)))
+    # Keep-alive connections, one per worker; no retries so errors are counted as they happen
+    client = Client(pool_size=workers, retries=0)
+
+    async def main():
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=workers))
+        if rps is not None:
+            return await run_open_loop(base_url, mix, rps, duration, max_in_flight=workers,
+                                       timeout=timeout, seed=seed, client=client)
+        return await run_closed_loop(base_url, mix, concurrency, duration, timeout=timeout, seed=seed,
+                                     client=client)
+
+    try:
+        return asyncio.run(main())
+    finally:
+        client.close()
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Load test the Lingua Phone backend API")
+    parser.add_argument("--url", default=config.BACKEND_URL, help="backend base URL")
+    parser.add_argument("--mix", default=None,
+                        help="request mix, e.g. chat=1,translate=3,tts=1,search=2,product=3")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=None, help="closed loop with N workers")
+    load.add_argument("--rps", type=float, default=None, help="open loop at R requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="test length in seconds")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request deadline in seconds")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the request mix")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    concurrency = 10 if args.concurrency is None and args.rps is None else args.concurrency
+    try:
+        mix = parse_mix(args.mix) if args.mix else None
+        validate_load(concurrency, args.rps)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    report = run(args.url, mix, concurrency=concurrency, rps=args.rps,
+                 duration=args.duration, timeout=args.timeout, seed=args.seed)
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        for line in report.format():
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+"""
+Streaming, filtered log tail for the Lingua Phone pods.
+
+Every container of every pod matching a label selector is followed on its
+own thread and lines are handed to the printer through a bounded queue as
+they arrive, so a busy pod's log is never held in memory. Lines can be
+filtered by regex and minimum level before they are printed, and the
+timestamp of the last line seen per container is saved under the cache
+directory so the next run picks up where this one stopped.
+
+With --follow the pod list is watched as well, so replacement pods created
+by a rollout or crash-loop are picked up without restarting the tail.
+
+A container that is waiting to restart (CrashLoopBackOff) has no current
+log, so its previous run's log is read instead; those lines are tagged
+"/previous". Containers with no log at all yet are listed as skipped, with
+the reason, at the end of the run.
+"""
+
+import argparse
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+from lingua_ops import config
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.output import Output
+
+LEVELS = {"debug": 10, "info": 20, "notice": 25, "warn": 30, "warning": 30,
+          "error": 40, "crit": 50, "critical": 50, "fatal": 50, "alert": 50, "emerg": 50}
+LEVEL_RE = re.compile(r"\b(debug|info|notice|warn(?:ing)?|error|crit(?:ical)?|fatal|alert|emerg)\b", re.IGNORECASE)
+TIMESTAMP_RE = re.compile(r"^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(\.\d+)?Z ")
+
+
+@dataclass
+class LogLine:
+    pod: str
+    container: str
+    timestamp: str
+    text: str
+
+    @property
+    def level(self):
+        """Severity guessed from the first level word in the line (nginx, node and JSON logs all match)"""
+        match = LEVEL_RE.search(self.text)
+        return match.group(1).lower() if match else None
+
+    def format(self, timestamps=False):
+        prefix = f"[{self.pod} {self.container}]"
+        if timestamps and self.timestamp:
+            prefix += f" {self.timestamp}"
+        return f"{prefix} {self.text}"
+
+
+def parse_line(pod, container, raw):
+    """Split the RFC 3339 timestamp the API server prefixes onto each line when timestamps=true"""
+    match = TIMESTAMP_RE.match(raw)
+    if not match:
+        return LogLine(pod, container, None, raw)
+    return LogLine(pod, container, raw[:match.end() - 1], raw[match.end():])
+
+
+def timestamp_key(timestamp):
+    """Comparable form of a timestamp; the API trims trailing zeros from the fraction"""
+    match = TIMESTAMP_RE.match(timestamp + " ")
+    if not match:
+        return timestamp
+    return match.group(1) + (match.group(2) or ".").ljust(10, "0")
+
+
+class LogFilter:
+    """Keep lines matching a regex and at or above a minimum level"""
+
+    def __init__(self, pattern=None, level=None, ignore_case=False):
+        self.pattern = re.compile(pattern, re.IGNORECASE if ignore_case else 0) if pattern else None
+        if level and level.lower() not in LEVELS:
+            raise ValueError(f"Unknown level {level!r}; expected one of {', '.join(sorted(LEVELS))}")
+        self.min_level = LEVELS[level.lower()] if level else None
+
+    def __call__(self, line):
+        if self.pattern and not self.pattern.search(line.text):
+            return False
+        if self.min_level is not None:
+            level = line.level
+            if level is None or LEVELS[level] < self.min_level:
+                return False
+        return True
+
+
+class LogPositions:
+    """Last timestamp seen per namespace/pod/container, persisted between runs"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(config.CACHE_DIR, "log-positions.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self.positions = json.load(f)
+        except (OSError, ValueError):
+            self.positions = {}
+
+    @staticmethod
+    def key(namespace, pod, container):
+        return f"{namespace}/{pod}/{container}"
+
+    def get(self, key):
+        return self.positions.get(key)
+
+    def update(self, key, timestamp):
+        with self._lock:
+            current = self.positions.get(key)
+            if current is None or timestamp_key(timestamp) > timestamp_key(current):
+                self.positions[key] = timestamp
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock:
+            data = json.dumps(self.positions, indent=2, sort_keys=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as f:
+            f.write(data)
+        os.replace(temporary, self.path)
+
+
+class LogTailer:
+    """Follow the logs of every pod matching a label selector at the same time"""
+
+    def __init__(self, client, selector, container=None, line_filter=None, positions=None,
+                 follow=False, tail_lines=None, since_time=None, previous=False, queue_size=1000):
+        self.client = client
+        self.selector = selector
+        self.container = container
+        self.filter = line_filter or LogFilter()
+        self.positions = positions
+        self.follow = follow
+        self.tail_lines = tail_lines
+        self.since_time = since_time
+        self.previous = previous
+        self.lines = queue.Queue(maxsize=queue_size)
+        self.errors = []
+        self.skipped = {}
+        self.matched = 0
+        self.seen = 0
+        self._streams = {}
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _containers(self, pod):
+        """
+        Return (container, previous) for each container with a log to read.
+
+        Containers without one are recorded in self.skipped with the reason.
+        """
+        name = pod["metadata"]["name"]
+        statuses = {status["name"]: status for status in pod.get("status", {}).get("containerStatuses", [])}
+        names = [container["name"] for container in pod.get("spec", {}).get("containers", [])]
+        if self.container:
+            names = [container for container in names if container == self.container]
+        selected = []
+        for container in names:
+            status = statuses.get(container)
+            state = (status or {}).get("state", {})
+            restarted = status is not None and (status.get("restartCount", 0) > 0
+                                                or "terminated" in status.get("lastState", {}))
+            if status is None:
+                reason = "not started yet"
+            elif self.previous:
+                reason = None if restarted else "no previous container"
+            elif "running" in state or "terminated" in state:
+                reason = None
+            elif restarted:
+                # Crash-looping: the current container has no log, the one that just died does
+                selected.append((container, True))
+                self.skipped.pop((name, container), None)
+                continue
+            else:
+                reason = f"waiting ({state.get('waiting', {}).get('reason') or 'unknown'}), no previous run"
+            if reason:
+                self.skipped[(name, container)] = reason
+            else:
+                selected.append((container, self.previous))
+                self.skipped.pop((name, container), None)
+        return selected
+
+    def _start(self, pod):
+        """Start a stream thread for each container of the pod with a log that is not already followed"""
+        name = pod["metadata"]["name"]
+        for container, previous in self._containers(pod):
+            with self._lock:
+                if (name, container) in self._streams:
+                    continue
+                thread = threading.Thread(target=self._stream, args=(name, container, previous), daemon=True)
+                self._streams[(name, container)] = thread
+            thread.start()
+
+    def _stream(self, pod, container, previous=False):
+        key = LogPositions.key(self.client.namespace, pod, container)
+        last = self.positions.get(key) if self.positions else None
+        last = last or self.since_time
+        tail = None if last else self.tail_lines
+        # A fallback read of a crashed container's log is one-shot: it never grows, and the
+        # pod watch starts a normal stream once the container is running again
+        fallback = previous and not self.previous
+        follow = self.follow and not fallback
+        label = f"{container}/previous" if fallback else container
+        while not self._stop.is_set():
+            try:
+                for raw in self.client.stream_log(pod, container, follow=follow, since_time=last,
+                                                  tail_lines=tail, previous=previous):
+                    line = parse_line(pod, label, raw)
+                    if line.timestamp:
+                        # sinceTime has one-second resolution, so skip lines already printed
+                        if last and timestamp_key(line.timestamp) <= timestamp_key(last):
+                            continue
+                        last = line.timestamp
+                        if self.positions:
+                            self.positions.update(key, last)
+                    self._put(("line", line))
+                    if self._stop.is_set():
+                        return
+            except ClusterError as e:
+                if e.status_code == 404 and follow:
+                    break  # the pod was deleted; the pod watch picks up its replacement
+                if e.status_code == 404 or not follow:
+                    self._put(("error", f"{pod}/{label}: {e}"))
+                    break
+            if not follow:
+                break
+            # The stream closed (pod restarted or idle timeout): reconnect from the last line seen
+            tail = None
+            self._stop.wait(2)
+        with self._lock:
+            self._streams.pop((pod, container), None)
+        self._put(("done", (pod, container)))
+
+    def _watch_pods(self, resource_version):
+        while not self._stop.is_set():
+            try:
+                for event, pod in self.client.watch("pods", resource_version=resource_version,
+                                                    label_selector=self.selector, timeout_seconds=30):
+                    resource_version = pod["metadata"].get("resourceVersion", resource_version)
+                    if event != "DELETED":
+                        self._start(pod)
+                    if self._stop.is_set():
+                        return
+            except ClusterError as e:
+                if e.status_code != 410:
+                    self._put(("error", f"Watching pods failed: {e}"))
+                    return
+                pods, resource_version = self.client.list_versioned("pods", label_selector=self.selector)
+                for pod in pods:
+                    self._start(pod)
+
+    def _put(self, item):
+        # Blocks while the printer is behind, which throttles the streams instead of buffering
+        while not self._stop.is_set():
+            try:
+                self.lines.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, on_line=print, duration=None, on_idle=None):
+        """Hand each matching line to on_line until every stream ends, duration passes or stop() is called"""
+        pods, resource_version = self.client.list_versioned("pods", label_selector=self.selector)
+        for pod in pods:
+            self._start(pod)
+        if self.follow:
+            threading.Thread(target=self._watch_pods, args=(resource_version,), daemon=True).start()
+        deadline = time.monotonic() + duration if duration else None
+        try:
+            while not self._stop.is_set():
+                if not self.follow and not self._streams and self.lines.empty():
+                    break
+                timeout = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+                try:
+                    kind, item = self.lines.get(timeout=timeout)
+                except queue.Empty:
+                    if on_idle:
+                        on_idle()
+                    continue
+                if kind == "line":
+                    self.seen += 1
+                    if self.filter(item):
+                        self.matched += 1
+                        on_line(item)
+                elif kind == "error":
+                    self.errors.append(item)
+        finally:
+            self._stop.set()
+        return self
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Stream and filter logs from the Lingua Phone pods")
+    parser.add_argument("-l", "--selector", default="app=lingua-frontend",
+                        help="label selector of the pods to follow (default: %(default)s)")
+    parser.add_argument("-c", "--container", default=None, help="only follow this container")
+    parser.add_argument("-f", "--follow", action="store_true", help="keep streaming new lines and pods")
+    parser.add_argument("-e", "--grep", default=None, help="only show lines matching this regex")
+    parser.add_argument("-i", "--ignore-case", action="store_true", help="case-insensitive --grep")
+    parser.add_argument("--level", default=None, help="only show lines at or above this level (e.g. warn)")
+    parser.add_argument("--tail", type=int, default=200,
+                        help="lines to start from when there is no saved position (default: %(default)s)")
+    parser.add_argument("--since-time", default=None, help="start from this RFC 3339 timestamp")
+    parser.add_argument("--previous", action="store_true", help="logs of the previous (crashed) containers")
+    parser.add_argument("--no-resume", action="store_true", help="ignore and do not update saved positions")
+    parser.add_argument("--timestamps", action="store_true", help="prefix lines with their timestamp")
+    parser.add_argument("--duration", type=float, default=None, help="stop following after this many seconds")
+    parser.add_argument("--json-lines", action="store_true",
+                        help="write one JSON object per log line and per step (also LINGUA_OUTPUT=jsonl)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = Output("get-pod-logs", json_lines=args.json_lines or None)
+    try:
+        line_filter = LogFilter(args.grep, args.level, args.ignore_case)
+    except (ValueError, re.error) as e:
+        print(f"Error: {e}")
+        return 2
+    # Previous-container logs never grow, so there is nothing to resume from
+    positions = None if args.no_resume or args.previous else LogPositions()
+    with out.step("credentials") as step:
+        try:
+            client = connect()
+        except ClusterError as e:
+            step.fail(f"Failed to get cluster credentials: {e}")
+    if step.status == "error":
+        out.finish()
+        return 1
+
+    tailer = LogTailer(client, args.selector, container=args.container, line_filter=line_filter,
+                       positions=positions, follow=args.follow, tail_lines=args.tail,
+                       since_time=args.since_time, previous=args.previous)
+    last_save = [time.monotonic()]
+
+    def checkpoint():
+        if positions and time.monotonic() - last_save[0] > 5:
+            positions.save()
+            last_save[0] = time.monotonic()
+
+    def show(line):
+        if out.json_lines:
+            out.record("log", pod=line.pod, container=line.container, timestamp=line.timestamp,
+                       level=line.level, text=line.text)
+        else:
+            print(line.format(args.timestamps), flush=True)
+        checkpoint()
+
+    with out.step("tail") as step:
+        try:
+            tailer.run(show, duration=args.duration, on_idle=checkpoint)
+        except ClusterError as e:
+            step.status, step.error = "error", str(e)
+        except KeyboardInterrupt:
+            tailer.stop()
+        finally:
+            if positions:
+                positions.save()
+        step.data.update(
+            selector=args.selector, matched=tailer.matched, seen=tailer.seen, errors=tailer.errors,
+            skipped=[{"pod": pod, "container": container, "reason": reason}
+                     for (pod, container), reason in sorted(tailer.skipped.items())],
+        )
+        if tailer.errors and step.status == "ok":
+            step.status, step.error = "warn", tailer.errors[0]
+    if not out.json_lines:
+        if step.status == "error":
+            print(f"Error: {step.error}")
+        for error in tailer.errors:
+            print(f"Error: {error}", file=sys.stderr)
+        for (pod, container), reason in sorted(tailer.skipped.items()):
+            print(f"Skipped {pod}/{container}: {reason}", file=sys.stderr)
+        print(f"--- {tailer.matched} of {tailer.seen} lines matched", file=sys.stderr)
+    out.finish(matched=tailer.matched, seen=tailer.seen)
+    if step.status == "error":
+        return 1
+    return 1 if tailer.errors and not tailer.seen else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
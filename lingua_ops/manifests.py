@@ -0,0 +1,726 @@
+"""
+Static verification of the Kubernetes manifests, nginx configs and Dockerfiles.
+
+Every YAML document under k8s/, every nginx config under docker/ and the
+nginx configs embedded in ConfigMaps are parsed once into a Graph. The graph
+holds objects keyed by (kind, namespace, name), nginx directive trees, and
+the Dockerfiles of the images in images.DEFAULT_IMAGES. Checks then follow
+the references across it:
+
+* Service selectors match a Deployment's pod labels, and targetPorts match
+  a containerPort of the pods they select;
+* nginx upstream servers and proxy_pass hosts resolve to a Service port;
+* HPAs point at existing Deployments, and Utilization targets have resource
+  requests to be measured against;
+* Ingress backends, configMap/secret references and kustomization
+  resources exist;
+* the nginx config an image's Dockerfile copies in listens on the port its
+  Deployment exposes.
+
+Parse results are cached in CACHE_DIR/manifest-cache.json, keyed by path,
+mtime and size. Re-verifying an unchanged tree only costs a stat per file.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import shlex
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+
+from lingua_ops import config
+from lingua_ops.cluster import RESOURCES, ClusterError
+from lingua_ops.images import DEFAULT_IMAGES
+from lingua_ops.output import Output
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+LEVELS = ("info", "warning", "error")
+ICONS = {"info": "ℹ", "warning": "⚠", "error": "✗"}
+CONFLICT_MARKERS = ("<<<<<<<", "=======", ">>>>>>>")
+PLACEHOLDER = re.compile(r"YOUR_[A-Z_]+")
+CLUSTER_SUFFIX = ".svc.cluster.local"
+
+DEFAULT_MANIFESTS = ("k8s/**/*.yaml", "k8s/**/*.yml")
+DEFAULT_NGINX = ("docker/**/*.conf",)
+# Kinds are applied in this order so namespaces and config exist before what uses them
+APPLY_ORDER = ("namespaces", "configmaps", "secrets", "services", "deployments", "horizontalpodautoscalers")
+
+
+class ManifestError(Exception):
+    """Raised when a manifest, nginx config or Dockerfile cannot be parsed"""
+
+
+@dataclass
+class Finding:
+    level: str
+    check: str
+    source: str
+    message: str
+
+    def format(self):
+        return f"   {ICONS[self.level]} {self.source}: {self.message}"
+
+
+def parse_nginx(text):
+    """Parse an nginx config into nested {"name", "args", "line", "block"} directives"""
+    for number, line in enumerate(text.splitlines(), 1):
+        if line.startswith(CONFLICT_MARKERS):
+            raise ManifestError(f"line {number}: unresolved merge conflict marker {line.split()[0]}")
+    root, stack = [], []
+    current, words, line, start = root, [], 1, None
+    i, length = 0, len(text)
+    while i < length:
+        char = text[i]
+        if char == "\n":
+            line += 1
+        if char.isspace():
+            i += 1
+            continue
+        if char == "#":
+            while i < length and text[i] != "\n":
+                i += 1
+            continue
+        if char in ";{}":
+            if char == "}":
+                if words:
+                    raise ManifestError(f"line {line}: directive '{words[0]}' is missing ';'")
+                if not stack:
+                    raise ManifestError(f"line {line}: unexpected '}}'")
+                current = stack.pop()
+            elif not words:
+                raise ManifestError(f"line {line}: unexpected '{char}'")
+            else:
+                directive = {"name": words[0], "args": words[1:], "line": start, "block": None}
+                current.append(directive)
+                if char == "{":
+                    directive["block"] = []
+                    stack.append(current)
+                    current = directive["block"]
+                words = []
+            i += 1
+            continue
+        if not words:
+            start = line
+        if char in "\"'":
+            end = text.find(char, i + 1)
+            if end < 0:
+                raise ManifestError(f"line {line}: unterminated quote")
+            words.append(text[i + 1:end])
+            line += text.count("\n", i, end)
+            i = end + 1
+            continue
+        word = []
+        while i < length and not text[i].isspace() and text[i] not in ";{}":
+            if text.startswith("${", i):
+                end = text.find("}", i)
+                word.append(text[i:end + 1])
+                i = end + 1
+                continue
+            word.append(text[i])
+            i += 1
+        words.append("".join(word))
+    if words:
+        raise ManifestError(f"line {line}: directive '{words[0]}' is missing ';'")
+    if stack:
+        raise ManifestError("unexpected end of file: unclosed '{'")
+    return root
+
+
+def iter_directives(directives, name=None, parents=()):
+    """Yield (directive, parents) for every directive in the tree, optionally only those called name"""
+    for directive in directives:
+        if name is None or directive["name"] == name:
+            yield directive, parents
+        if directive["block"] is not None:
+            yield from iter_directives(directive["block"], name, parents + (directive,))
+
+
+def render_nginx(directives, indent=0):
+    """Write a directive tree back out as nginx config text; the inverse of parse_nginx() up to comments"""
+    lines = []
+    for directive in directives:
+        words = [directive["name"]] + [f'"{arg}"' if not arg or re.search(r"[\s;{}#\"']", arg) else arg
+                                       for arg in directive["args"]]
+        if directive["block"] is None:
+            lines.append("    " * indent + " ".join(words) + ";")
+        else:
+            lines.append("    " * indent + " ".join(words) + " {")
+            lines.extend(render_nginx(directive["block"], indent + 1).splitlines())
+            lines.append("    " * indent + "}")
+    return "\n".join(lines)
+
+
+def parse_yaml(text):
+    if yaml is None:
+        raise ManifestError("PyYAML is needed to parse manifests (pip install pyyaml)")
+    try:
+        return [document for document in yaml.safe_load_all(text) if document]
+    except yaml.YAMLError as e:
+        raise ManifestError(str(e).replace("\n", " "))
+
+
+def parse_dockerfile(text):
+    """Return the COPY instructions (sources, destination, from stage) and EXPOSEd ports of a Dockerfile"""
+    copies, exposed = [], []
+    logical = re.sub(r"\\\n", " ", text)
+    for number, line in enumerate(logical.splitlines(), 1):
+        words = line.strip().split(None, 1)
+        if not words or words[0].startswith("#"):
+            continue
+        instruction, rest = words[0].upper(), words[1] if len(words) > 1 else ""
+        if instruction in ("COPY", "ADD"):
+            args = shlex.split(rest)
+            stage = next((arg.split("=", 1)[1] for arg in args if arg.startswith("--from=")), None)
+            paths = [arg for arg in args if not arg.startswith("--")]
+            if len(paths) >= 2:
+                copies.append({"sources": paths[:-1], "destination": paths[-1], "from": stage, "line": number})
+        elif instruction == "EXPOSE":
+            exposed.extend(int(port.split("/")[0]) for port in rest.split() if port.split("/")[0].isdigit())
+    return {"copies": copies, "exposed": exposed}
+
+
+PARSERS = {"yaml": parse_yaml, "nginx": parse_nginx, "dockerfile": parse_dockerfile}
+
+
+class ParseCache:
+    """Parse results keyed by path, mtime and size, persisted between runs"""
+
+    def __init__(self, path=None, persist=True):
+        self.path = path or os.path.join(config.CACHE_DIR, "manifest-cache.json")
+        self.persist = persist
+        self.hits = self.misses = 0
+        self.dirty = False
+        self.entries = {}
+        if persist:
+            try:
+                with open(self.path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    def parse(self, path, kind):
+        """Return the parsed contents of path, raising ManifestError if it does not parse"""
+        stat = os.stat(path)
+        key = f"{kind}:{os.path.abspath(path)}"
+        entry = self.entries.get(key)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            self.hits += 1
+        else:
+            self.misses += 1
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            try:
+                entry = {"result": PARSERS[kind](text), "error": None}
+            except ManifestError as e:
+                entry = {"result": None, "error": str(e)}
+            entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            self.entries[key] = entry
+            self.dirty = True
+        if entry["error"]:
+            raise ManifestError(entry["error"])
+        return entry["result"]
+
+    def save(self):
+        if not self.dirty or not self.persist:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.entries, f, default=str)
+        os.replace(temporary, self.path)
+        self.dirty = False
+
+
+@dataclass
+class Node:
+    kind: str
+    namespace: str
+    name: str
+    source: str
+    obj: dict
+
+    @property
+    def ref(self):
+        return f"{self.kind.lower()}/{self.name}"
+
+
+@dataclass
+class NginxConfig:
+    source: str
+    namespace: str
+    directives: list
+    owner: Node = None
+
+
+@dataclass
+class Graph:
+    root: str
+    nodes: dict = field(default_factory=dict)
+    nginx: list = field(default_factory=list)
+    dockerfiles: dict = field(default_factory=dict)
+    kustomizations: dict = field(default_factory=dict)
+    applied: set = field(default_factory=set)
+    findings: list = field(default_factory=list)
+
+    def get(self, kind, namespace, name):
+        return self.nodes.get((kind, namespace, name))
+
+    def of_kind(self, kind):
+        return [node for node in self.nodes.values() if node.kind == kind]
+
+    def add(self, node):
+        key = (node.kind, node.namespace, node.name)
+        if key in self.nodes:
+            self.findings.append(Finding("error", "duplicates", node.source,
+                                         f"{node.ref} is also defined in {self.nodes[key].source}"))
+            return
+        self.nodes[key] = node
+
+
+def _sources(root, patterns):
+    paths = set()
+    for pattern in patterns:
+        paths.update(glob.glob(os.path.join(root, pattern), recursive=True))
+    return sorted(paths)
+
+
+def build_graph(root=".", cache=None, manifests=DEFAULT_MANIFESTS, nginx=DEFAULT_NGINX, images=None):
+    """Parse everything once into a Graph; parse failures become findings on it"""
+    cache = cache or ParseCache()
+    graph = Graph(root)
+    documents = []
+    for path in _sources(root, manifests):
+        source = os.path.relpath(path, root)
+        try:
+            documents.extend((source, document) for document in cache.parse(path, "yaml"))
+        except ManifestError as e:
+            graph.findings.append(Finding("error", "parse", source, str(e)))
+
+    # Kustomizations decide which files are applied together and into which namespace
+    namespaces = {}
+    for source, document in documents:
+        if document.get("kind") != "Kustomization":
+            continue
+        directory = os.path.dirname(source)
+        resources = [os.path.normpath(os.path.join(directory, item)) for item in document.get("resources", [])]
+        graph.kustomizations[source] = {"namespace": document.get("namespace"), "resources": resources}
+        for resource in resources:
+            graph.applied.add(resource)
+            if document.get("namespace"):
+                namespaces.setdefault(resource, document["namespace"])
+
+    for source, document in documents:
+        if not isinstance(document, dict) or "kind" not in document or document["kind"] == "Kustomization":
+            continue
+        metadata = document.get("metadata") or {}
+        if document["kind"] == "Namespace":
+            namespace = None
+        else:
+            namespace = metadata.get("namespace") or namespaces.get(source) or config.NAMESPACE
+        node = Node(document["kind"], namespace, metadata.get("name", "<unnamed>"), source, document)
+        graph.add(node)
+        if node.kind == "ConfigMap":
+            for key, value in (document.get("data") or {}).items():
+                if not key.endswith(".conf") or not isinstance(value, str):
+                    continue
+                try:
+                    graph.nginx.append(NginxConfig(f"{source}#{key}", namespace, parse_nginx(value), node))
+                except ManifestError as e:
+                    graph.findings.append(Finding("error", "parse", f"{source}#{key}", str(e)))
+
+    for path in _sources(root, nginx):
+        source = os.path.relpath(path, root)
+        try:
+            graph.nginx.append(NginxConfig(source, config.NAMESPACE, cache.parse(path, "nginx")))
+        except ManifestError as e:
+            graph.findings.append(Finding("error", "parse", source, str(e)))
+
+    for spec in images if images is not None else DEFAULT_IMAGES:
+        path = os.path.join(root, spec.dockerfile)
+        try:
+            graph.dockerfiles[spec.dockerfile] = (spec, cache.parse(path, "dockerfile"))
+        except FileNotFoundError:
+            graph.findings.append(Finding("error", "dockerfiles", spec.dockerfile,
+                                          f"Dockerfile of image {spec.name} does not exist"))
+    cache.save()
+    return graph
+
+
+def render_kustomization(directory="k8s", images=()):
+    """
+    Return the (kind, namespace, object) list `kubectl apply -k directory` would send.
+
+    Covers what this repo's kustomization uses: plain file resources and a
+    namespace. Containers whose image matches one of images (by repository
+    name) are pinned to that ImageSpec's tag.
+    """
+    source = os.path.join(directory, "kustomization.yaml")
+    with open(source, encoding="utf-8") as f:
+        documents = parse_yaml(f.read())
+    kustomization = documents[0] if documents else {}
+    pinned = {spec.repository.rsplit("/", 1)[-1]: spec.reference for spec in images}
+    objects = []
+    for resource in kustomization.get("resources") or []:
+        path = os.path.join(directory, resource)
+        if os.path.isdir(path):
+            raise ManifestError(f"{source}: nested kustomization {resource} is not supported")
+        with open(path, encoding="utf-8") as f:
+            documents = parse_yaml(f.read())
+        for document in documents:
+            kind = str(document.get("kind", "")).lower() + "s"
+            if kind not in RESOURCES:
+                raise ManifestError(f"{path}: cannot apply kind {document.get('kind')!r}")
+            metadata = document.setdefault("metadata", {})
+            namespace = None
+            if RESOURCES[kind][1]:
+                namespace = kustomization.get("namespace") or metadata.get("namespace") or config.NAMESPACE
+                metadata["namespace"] = namespace
+            template = (document.get("spec") or {}).get("template") or {}
+            for container in (template.get("spec") or {}).get("containers") or []:
+                repository = str(container.get("image", "")).rsplit("/", 1)[-1].split("@")[0].split(":")[0]
+                if repository in pinned:
+                    container["image"] = pinned[repository]
+            objects.append((kind, namespace, document))
+    objects.sort(key=lambda item: APPLY_ORDER.index(item[0]) if item[0] in APPLY_ORDER else len(APPLY_ORDER))
+    return objects
+
+
+def apply_kustomization(client, directory="k8s", images=(), on_line=print):
+    """
+    Create or update everything render_kustomization() returns through the API.
+
+    Existing objects are merge-patched with the manifest. Existing Secrets
+    are left alone: the manifests only hold a placeholder, and the real key
+    is written separately.
+    """
+    for kind, namespace, obj in render_kustomization(directory, images):
+        ref = f"{obj['kind'].lower()}/{obj['metadata']['name']}"
+        try:
+            client.create(kind, obj, namespace)
+            on_line(f"   {ref} created")
+        except ClusterError as e:
+            if e.status_code != 409:
+                raise
+            if kind == "secrets":
+                on_line(f"   {ref} exists, left unchanged")
+                continue
+            client.patch(kind, obj["metadata"]["name"], obj, namespace)
+            on_line(f"   {ref} configured")
+
+
+def pod_spec(node):
+    return ((node.obj.get("spec") or {}).get("template") or {}).get("spec") or {}
+
+
+def pod_labels(node):
+    return (((node.obj.get("spec") or {}).get("template") or {}).get("metadata") or {}).get("labels") or {}
+
+
+def container_ports(node):
+    """(number, name) of every containerPort of a Deployment's pods"""
+    return [(port.get("containerPort"), port.get("name"))
+            for container in pod_spec(node).get("containers", [])
+            for port in container.get("ports") or []]
+
+
+def selected_deployments(graph, service):
+    selector = (service.obj.get("spec") or {}).get("selector") or {}
+    if not selector:
+        return []
+    return [node for node in graph.of_kind("Deployment")
+            if node.namespace == service.namespace
+            and all(pod_labels(node).get(key) == value for key, value in selector.items())]
+
+
+def service_ports(service):
+    return [port.get("port") for port in (service.obj.get("spec") or {}).get("ports") or []]
+
+
+def check_services(graph):
+    for service in graph.of_kind("Service"):
+        deployments = selected_deployments(graph, service)
+        selector = (service.obj.get("spec") or {}).get("selector") or {}
+        if not deployments:
+            yield Finding("error", "services", service.source,
+                          f"{service.ref} selector {selector} matches no Deployment in {service.namespace}")
+            continue
+        for port in (service.obj.get("spec") or {}).get("ports") or []:
+            target = port.get("targetPort", port.get("port"))
+            for deployment in deployments:
+                ports = container_ports(deployment)
+                if not any(target in (number, name) for number, name in ports):
+                    exposed = ", ".join(str(number) for number, _ in ports) or "none"
+                    yield Finding("error", "services", service.source,
+                                  f"{service.ref} targetPort {target} is not a containerPort of "
+                                  f"{deployment.ref} (exposes {exposed})")
+
+
+def resolve_host(graph, host, port, namespace):
+    """Find the Service behind an in-cluster host:port; returns (service, error)"""
+    name = host[:-len(CLUSTER_SUFFIX)] if host.endswith(CLUSTER_SUFFIX) else host
+    parts = name.split(".")
+    if len(parts) > 2:
+        return None, None  # an external hostname, not ours to resolve
+    if len(parts) == 2:
+        name, namespace = parts
+    service = graph.get("Service", namespace, name)
+    if service is None:
+        return None, f"no Service {name} in namespace {namespace}"
+    if port not in service_ports(service):
+        ports = ", ".join(str(item) for item in service_ports(service))
+        return service, f"Service {name} has no port {port} (ports: {ports})"
+    return service, None
+
+
+def split_host_port(address, default_port):
+    host, _, port = address.rpartition(":") if ":" in address else (address, "", "")
+    return host, int(port) if port.isdigit() else default_port
+
+
+def check_nginx(graph):
+    for nginx in graph.nginx:
+        upstreams = {directive["args"][0]: directive
+                     for directive, _ in iter_directives(nginx.directives, "upstream") if directive["args"]}
+        used = set()
+        for directive, parents in iter_directives(nginx.directives, "server"):
+            if not parents or parents[-1]["name"] != "upstream" or not directive["args"]:
+                continue
+            host, port = split_host_port(directive["args"][0], 80)
+            service, error = resolve_host(graph, host, port, nginx.namespace)
+            if error:
+                yield Finding("error", "nginx", f"{nginx.source}:{directive['line']}",
+                              f"upstream {parents[-1]['args'][0]} server {directive['args'][0]}: {error}")
+            elif service and graph.applied and service.source not in graph.applied:
+                yield Finding("warning", "nginx", f"{nginx.source}:{directive['line']}",
+                              f"{service.ref} is defined in {service.source}, which no kustomization applies")
+        for directive, _ in iter_directives(nginx.directives, "proxy_pass"):
+            url = directive["args"][0] if directive["args"] else ""
+            match = re.match(r"^(https?)://([^/:$]+)(?::(\d+))?", url)
+            if not match:
+                continue
+            scheme, host, port = match.groups()
+            source = f"{nginx.source}:{directive['line']}"
+            if host in upstreams:
+                used.add(host)
+                continue
+            if "." in host and not host.endswith(CLUSTER_SUFFIX):
+                yield Finding("info", "nginx", source, f"proxy_pass leaves the cluster ({url})")
+                continue
+            _, error = resolve_host(graph, host, int(port) if port else (443 if scheme == "https" else 80),
+                                    nginx.namespace)
+            if error:
+                yield Finding("error", "nginx", source, f"proxy_pass {url}: {error} and no upstream {host}")
+        for name, directive in upstreams.items():
+            if name not in used:
+                yield Finding("warning", "nginx", f"{nginx.source}:{directive['line']}",
+                              f"upstream {name} is never used by a proxy_pass")
+
+
+def check_hpas(graph):
+    for hpa in graph.of_kind("HorizontalPodAutoscaler"):
+        spec = hpa.obj.get("spec") or {}
+        target = spec.get("scaleTargetRef") or {}
+        deployment = graph.get(target.get("kind", "Deployment"), hpa.namespace, target.get("name"))
+        if deployment is None:
+            yield Finding("error", "hpas", hpa.source,
+                          f"{hpa.ref} scales {target.get('kind')}/{target.get('name')}, which does not exist "
+                          f"in {hpa.namespace}")
+            continue
+        for metric in spec.get("metrics") or []:
+            resource = metric.get("resource") or {}
+            if (resource.get("target") or {}).get("type") != "Utilization":
+                continue
+            missing = [container.get("name") for container in pod_spec(deployment).get("containers", [])
+                       if resource.get("name") not in ((container.get("resources") or {}).get("requests") or {})]
+            if missing:
+                yield Finding("error", "hpas", hpa.source,
+                              f"{hpa.ref} targets {resource.get('name')} utilization but {deployment.ref} "
+                              f"container(s) {', '.join(missing)} request no {resource.get('name')}, "
+                              f"so the HPA cannot compute it")
+        if spec.get("minReplicas", 1) > (deployment.obj.get("spec") or {}).get("replicas", 1):
+            yield Finding("info", "hpas", hpa.source,
+                          f"{hpa.ref} minReplicas {spec['minReplicas']} overrides {deployment.ref} "
+                          f"replicas {(deployment.obj.get('spec') or {}).get('replicas', 1)}")
+
+
+def check_ingresses(graph):
+    for ingress in graph.of_kind("Ingress"):
+        for rule in (ingress.obj.get("spec") or {}).get("rules") or []:
+            for path in ((rule.get("http") or {}).get("paths")) or []:
+                backend = (path.get("backend") or {}).get("service") or {}
+                port = (backend.get("port") or {}).get("number")
+                _, error = resolve_host(graph, backend.get("name", ""), port, ingress.namespace)
+                if error:
+                    yield Finding("error", "ingresses", ingress.source,
+                                  f"{ingress.ref} path {path.get('path')}: {error}")
+
+
+def check_references(graph):
+    for deployment in graph.of_kind("Deployment"):
+        spec = pod_spec(deployment)
+        references = []
+        for container in spec.get("containers", []):
+            for source in container.get("envFrom") or []:
+                for kind, key in (("ConfigMap", "configMapRef"), ("Secret", "secretRef")):
+                    if key in source:
+                        references.append((kind, source[key].get("name"), source[key].get("optional")))
+            for variable in container.get("env") or []:
+                value_from = variable.get("valueFrom") or {}
+                for kind, key in (("ConfigMap", "configMapKeyRef"), ("Secret", "secretKeyRef")):
+                    if key in value_from:
+                        references.append((kind, value_from[key].get("name"), value_from[key].get("optional")))
+            image = container.get("image", "")
+            if PLACEHOLDER.search(image):
+                yield Finding("warning", "references", deployment.source,
+                              f"{deployment.ref} image {image} still contains a placeholder")
+        for volume in spec.get("volumes") or []:
+            if "secret" in volume:
+                references.append(("Secret", volume["secret"].get("secretName"), volume["secret"].get("optional")))
+            if "configMap" in volume:
+                references.append(("ConfigMap", volume["configMap"].get("name"), volume["configMap"].get("optional")))
+        for kind, name, optional in references:
+            if not optional and graph.get(kind, deployment.namespace, name) is None:
+                yield Finding("warning", "references", deployment.source,
+                              f"{deployment.ref} uses {kind.lower()}/{name}, which no manifest defines "
+                              f"(it must be created by hand)")
+
+    # A ConfigMap nginx config only reaches nginx when it is mounted as a file
+    mounted = {(node.namespace, volume["configMap"].get("name"))
+               for node in graph.of_kind("Deployment")
+               for volume in pod_spec(node).get("volumes") or [] if "configMap" in volume}
+    for nginx in graph.nginx:
+        if nginx.owner is not None and (nginx.owner.namespace, nginx.owner.name) not in mounted:
+            yield Finding("warning", "references", nginx.source,
+                          f"{nginx.owner.ref} is never mounted as a volume, so nginx never reads this config")
+
+
+def check_kustomizations(graph):
+    for source, kustomization in graph.kustomizations.items():
+        for resource in kustomization["resources"]:
+            if not os.path.exists(os.path.join(graph.root, resource)):
+                yield Finding("error", "kustomization", source, f"resource {resource} does not exist")
+    if not graph.kustomizations:
+        return
+    for node in graph.nodes.values():
+        if node.source in graph.applied:
+            continue
+        if node.kind in ("Service", "HorizontalPodAutoscaler", "Ingress"):
+            yield Finding("info", "kustomization", node.source,
+                          f"{node.ref} is not in any kustomization and is only applied by hand")
+
+
+def check_dockerfiles(graph):
+    deployments = {node.name: node for node in graph.of_kind("Deployment")}
+    for dockerfile, (spec, parsed) in graph.dockerfiles.items():
+        for copy in parsed["copies"]:
+            if copy["from"]:
+                continue
+            for item in copy["sources"]:
+                if not glob.glob(os.path.join(graph.root, spec.context, item)):
+                    yield Finding("error", "dockerfiles", f"{dockerfile}:{copy['line']}",
+                                  f"COPY source {item} does not exist")
+        deployment = deployments.get(spec.deployment)
+        if deployment is None:
+            continue
+        ports = {number for number, _ in container_ports(deployment)}
+        for port in parsed["exposed"]:
+            if port not in ports:
+                yield Finding("warning", "dockerfiles", dockerfile,
+                              f"EXPOSE {port} is not a containerPort of {deployment.ref} "
+                              f"({', '.join(map(str, sorted(ports))) or 'none'})")
+        # The nginx config the image bakes in must listen where the Deployment says it does
+        for copy in parsed["copies"]:
+            if copy["from"] or not copy["destination"].startswith("/etc/nginx"):
+                continue
+            for item in copy["sources"]:
+                nginx = next((entry for entry in graph.nginx if entry.source == os.path.normpath(item)), None)
+                if nginx is None:
+                    continue
+                for directive, _ in iter_directives(nginx.directives, "listen"):
+                    address = directive["args"][0] if directive["args"] else ""
+                    port = address.rpartition(":")[2]
+                    if port.isdigit() and int(port) not in ports:
+                        yield Finding("error", "dockerfiles", f"{nginx.source}:{directive['line']}",
+                                      f"nginx listens on {port} but {deployment.ref} exposes "
+                                      f"{', '.join(map(str, sorted(ports))) or 'no ports'}")
+
+
+CHECKS = {
+    "services": check_services,
+    "nginx": check_nginx,
+    "hpas": check_hpas,
+    "ingresses": check_ingresses,
+    "references": check_references,
+    "kustomization": check_kustomizations,
+    "dockerfiles": check_dockerfiles,
+}
+
+
+def verify(graph, checks=None):
+    """Run the named checks (all by default) and return {check: [findings]}, parse problems first"""
+    results = {"parse": list(graph.findings)}
+    for name in checks or CHECKS:
+        results[name] = list(CHECKS[name](graph))
+    return results
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(
+        description="Check that the k8s manifests, nginx configs and Dockerfiles reference each other correctly")
+    parser.add_argument("--root", default=".", help="repository root")
+    parser.add_argument("--check", action="append", choices=sorted(CHECKS),
+                        help="run only this check (repeatable)")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings as well as errors")
+    parser.add_argument("--no-cache", action="store_true", help="parse every file again")
+    parser.add_argument("--json-lines", action="store_true", help="one JSON object per check")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = Output("verify-manifests", json_lines=args.json_lines or None)
+    out.print("Verifying manifests, nginx configs and Dockerfiles...")
+    out.print("=" * 60)
+
+    with out.step("load") as step:
+        start = time.perf_counter()
+        cache = ParseCache(persist=not args.no_cache)
+        graph = build_graph(args.root, cache)
+        step.data.update(
+            objects=len(graph.nodes), nginx_configs=len(graph.nginx), dockerfiles=len(graph.dockerfiles),
+            cache_hits=cache.hits, cache_misses=cache.misses,
+        )
+        step.print(f"Parsed {len(graph.nodes)} objects, {len(graph.nginx)} nginx configs and "
+                   f"{len(graph.dockerfiles)} Dockerfiles in {(time.perf_counter() - start) * 1000:.0f} ms "
+                   f"({cache.hits} cached, {cache.misses} parsed)")
+
+    counts = dict.fromkeys(LEVELS, 0)
+    for name, findings in verify(graph, args.check).items():
+        with out.step(name, f"\n{name}:") as step:
+            step.data["findings"] = [asdict(finding) for finding in findings]
+            if not findings:
+                step.print("   ✓ ok")
+            for finding in sorted(findings, key=lambda item: -LEVELS.index(item.level)):
+                counts[finding.level] += 1
+                step.print(finding.format())
+            worst = max((finding.level for finding in findings), key=LEVELS.index, default="info")
+            if worst == "error":
+                step.status, step.error = "error", f"{sum(f.level == 'error' for f in findings)} error(s)"
+            elif worst == "warning":
+                step.status = "warn"
+
+    out.print("\n" + "=" * 60)
+    out.print(f"{counts['error']} error(s), {counts['warning']} warning(s), {counts['info']} note(s)")
+    out.finish(**counts)
+    return 1 if counts["error"] or (args.strict and counts["warning"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
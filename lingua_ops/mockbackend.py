@@ -0,0 +1,456 @@
+"""
+Asyncio stand-in for the Lingua Phone backend API.
+
+It speaks the same request and response shapes as packages/backend/src/routes/api.ts
+for /api/chat, /api/translate, /api/tts, /api/search, /api/products/:id,
+/api/cart/add, /api/languages and /api/speech-to-text. It needs no network
+access: products come from packages/backend/src/data/productsData.ts,
+translations and speech are canned, and TTS returns deterministic fake audio
+sized by the input text.
+
+Each route's latency is drawn from a configurable distribution, optionally
+plus a per-KB cost for request bodies, and errors and hangs can be injected
+at a given rate. With a fixed --seed, a single-client run behaves the same
+every time, so probe, load-test and monitor results can be compared across
+machines. Counters are served at GET /__mock/stats.
+
+Distributions are written name:args, with times in milliseconds:
+    fixed:20  uniform:5,40  normal:50,10  lognormal:80,0.5  exponential:30
+where lognormal takes the median and sigma.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from urllib.parse import parse_qs, urlsplit
+
+from lingua_ops import config
+
+ROUTES = ("languages", "chat", "translate", "tts", "search", "product", "cart", "stt")
+
+LANGUAGES = [
+    {"code": "en-US", "name": "English (US)"}, {"code": "hi-IN", "name": "Hindi"},
+    {"code": "bn-IN", "name": "Bengali"}, {"code": "ta-IN", "name": "Tamil"},
+    {"code": "te-IN", "name": "Telugu"}, {"code": "es-ES", "name": "Spanish"},
+    {"code": "fr-FR", "name": "French"}, {"code": "de-DE", "name": "German"},
+    {"code": "zh-CN", "name": "Chinese (Simplified)"}, {"code": "ja-JP", "name": "Japanese"},
+]
+
+# One word per language so canned translations are at least in the right script
+CANNED_WORDS = {
+    "hi": "नमस्ते", "bn": "নমস্কার", "ta": "வணக்கம்", "te": "నమస్కారం", "mr": "नमस्कार",
+    "gu": "નમસ્તે", "kn": "ನಮಸ್ಕಾರ", "ml": "നമസ്കാരം", "pa": "ਸਤ ਸ੍ਰੀ ਅਕਾਲ", "ur": "سلام",
+    "zh": "你好", "ja": "こんにちは", "ko": "안녕하세요", "ar": "مرحبا", "he": "שלום",
+}
+
+PRODUCTS_FILE = os.path.join("packages", "backend", "src", "data", "productsData.ts")
+PRODUCT_RE = re.compile(
+    r'id:\s*"(?P<id>[^"]+)",\s*name:\s*"(?P<name>[^"]+)",\s*price:\s*(?P<price>[\d.]+),\s*category:\s*"(?P<category>[^"]+)"'
+)
+
+
+class Distribution:
+    """A latency distribution in seconds, parsed from e.g. 'lognormal:80,0.5' (milliseconds)"""
+
+    KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+
+    def __init__(self, spec):
+        kind, _, args = spec.partition(":")
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown distribution '{kind}' (choose from {', '.join(self.KINDS)})")
+        try:
+            values = [float(value) for value in args.split(",")] if args else []
+        except ValueError:
+            raise ValueError(f"Bad distribution arguments in '{spec}'")
+        if len(values) != self.KINDS[kind]:
+            raise ValueError(f"'{kind}' takes {self.KINDS[kind]} argument(s), got '{spec}'")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+
+    def sample(self, rng):
+        a = self.values[0]
+        if self.kind == "fixed":
+            ms = a
+        elif self.kind == "uniform":
+            ms = rng.uniform(a, self.values[1])
+        elif self.kind == "normal":
+            ms = rng.gauss(a, self.values[1])
+        elif self.kind == "lognormal":
+            ms = rng.lognormvariate(math.log(a), self.values[1])
+        else:
+            ms = rng.expovariate(1.0 / a) if a > 0 else 0.0
+        return max(0.0, ms) / 1000.0
+
+
+@dataclass
+class RouteBehaviour:
+    latency: Distribution = field(default_factory=lambda: Distribution("uniform:5,20"))
+    per_kb_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    hang_rate: float = 0.0
+
+
+DEFAULT_BEHAVIOUR = {
+    "languages": "fixed:2",
+    "chat": "lognormal:400,0.4",
+    "translate": "lognormal:80,0.35",
+    "tts": "lognormal:150,0.3",
+    "search": "uniform:5,25",
+    "product": "uniform:2,10",
+    "cart": "uniform:3,15",
+    "stt": "lognormal:300,0.3",
+}
+
+
+def load_products(root="."):
+    """Read the catalogue from productsData.ts, in the searchProducts() response shape"""
+    try:
+        with open(os.path.join(root, PRODUCTS_FILE), encoding="utf-8") as f:
+            matches = list(PRODUCT_RE.finditer(f.read()))
+    except OSError:
+        matches = []
+    if not matches:
+        matches = [{"id": str(i), "name": f"Product {i}", "price": f"{9.99 + i:.2f}", "category": "misc"}
+                   for i in range(1, 21)]
+    products = {}
+    for match in matches:
+        price = float(match["price"])
+        products[match["id"]] = {
+            "id": match["id"],
+            "name": match["name"],
+            "description": f"{match['name']} ({match['category'].replace('_', ' ')})",
+            "picture": f"https://example.invalid/img/{match['id']}.jpg",
+            "priceUsd": {"currencyCode": "USD", "units": int(price), "nanos": round(price % 1 * 1e9)},
+            "categories": [match["category"]],
+        }
+    return products
+
+
+class HttpError(Exception):
+    def __init__(self, status, body):
+        super().__init__(status)
+        self.status = status
+        self.body = body
+
+
+class MockBackend:
+    """Route handlers plus the latency and error model"""
+
+    def __init__(self, behaviours=None, seed=None, root="."):
+        self.behaviours = {route: RouteBehaviour(Distribution(spec)) for route, spec in DEFAULT_BEHAVIOUR.items()}
+        self.behaviours.update(behaviours or {})
+        self.rng = random.Random(seed)
+        self.products = load_products(root)
+        self.carts = {}
+        self.stats = {route: {"requests": 0, "errors": 0, "hangs": 0} for route in ROUTES}
+        self.started = time.time()
+
+    # --- routing -------------------------------------------------------
+
+    def route(self, method, path):
+        """Return (route name, handler, path argument) for a request, or raise HttpError(404)"""
+        if method == "GET" and path == "/api/languages":
+            return "languages", self.languages, None
+        match = re.fullmatch(r"/api/products/([^/]+)", path)
+        if method == "GET" and match:
+            return "product", self.product, match.group(1)
+        handlers = {
+            "/api/chat": ("chat", self.chat), "/api/translate": ("translate", self.translate),
+            "/api/tts": ("tts", self.tts), "/api/search": ("search", self.search),
+            "/api/cart/add": ("cart", self.cart_add), "/api/speech-to-text": ("stt", self.speech_to_text),
+        }
+        if method == "POST" and path in handlers:
+            name, handler = handlers[path]
+            return name, handler, None
+        raise HttpError(404, {"error": "not_found", "details": f"Cannot {method} {path}"})
+
+    async def handle(self, method, target, headers, body):
+        """Serve one request; returns (status, content type, payload bytes) or None to hang up"""
+        url = urlsplit(target)
+        if url.path == "/__mock/stats":
+            return 200, "application/json", json.dumps(self.stats_dict(), indent=2).encode("utf-8")
+        if method == "GET" and url.path in ("/", "/health"):
+            return 200, "application/json", b'{"status":"ok","mock":true}'
+        try:
+            name, handler, argument = self.route(method, url.path)
+        except HttpError as e:
+            return e.status, "application/json", json.dumps(e.body).encode("utf-8")
+
+        behaviour = self.behaviours[name]
+        stats = self.stats[name]
+        stats["requests"] += 1
+        delay = behaviour.latency.sample(self.rng) + behaviour.per_kb_ms * len(body) / 1024 / 1000
+        roll = self.rng.random()
+        if roll < behaviour.hang_rate:
+            stats["hangs"] += 1
+            await asyncio.sleep(max(delay, 30.0))
+            return None
+        await asyncio.sleep(delay)
+        if roll < behaviour.hang_rate + behaviour.error_rate:
+            stats["errors"] += 1
+            payload = {"error": f"{name}_error", "details": "injected failure"}
+            return behaviour.error_status, "application/json", json.dumps(payload).encode("utf-8")
+
+        try:
+            result = handler(body, headers, parse_qs(url.query), argument)
+        except HttpError as e:
+            return e.status, "application/json", json.dumps(e.body).encode("utf-8")
+        if isinstance(result, tuple):
+            return result if len(result) == 3 else (200,) + result
+        return 200, "application/json; charset=utf-8", json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+    def stats_dict(self):
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "routes": self.stats,
+            "behaviour": {
+                route: {"latency": behaviour.latency.spec, "per_kb_ms": behaviour.per_kb_ms,
+                        "error_rate": behaviour.error_rate, "error_status": behaviour.error_status,
+                        "hang_rate": behaviour.hang_rate}
+                for route, behaviour in self.behaviours.items()
+            },
+        }
+
+    # --- handlers ------------------------------------------------------
+
+    @staticmethod
+    def _json(body):
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(400, {"error": "bad_request", "details": "invalid JSON body"})
+        if not isinstance(data, dict):
+            raise HttpError(400, {"error": "bad_request", "details": "expected a JSON object"})
+        return data
+
+    def languages(self, body, headers, query, argument):
+        return {"languages": LANGUAGES}
+
+    def translate(self, body, headers, query, argument):
+        data = self._json(body)
+        text, source, target = data.get("text") or "", data.get("from") or "en", data.get("to") or "en-US"
+        base = target.split("-")[0]
+        if source.split("-")[0] == base or not text.strip():
+            return {"translatedText": text}
+        if base in CANNED_WORDS:
+            return {"translatedText": " ".join([CANNED_WORDS[base]] * max(1, len(text.split())))}
+        return {"translatedText": f"[{target}] {text}"}
+
+    def tts(self, body, headers, query, argument):
+        data = self._json(body)
+        text = data.get("text") or ""
+        # Deterministic fake MP3: an ID3 header and about 1 KB per 12 characters of text
+        seed = hashlib.sha256(f"{data.get('language')}|{text}".encode("utf-8")).digest()
+        size = 1024 * max(1, len(text) // 12)
+        audio = b"ID3\x03\x00\x00\x00\x00\x00\x00" + (seed * (size // len(seed) + 1))[:size]
+        return "audio/mpeg", audio
+
+    def chat(self, body, headers, query, argument):
+        data = self._json(body)
+        message = (data.get("message") or "").lower()
+        matches = self._search(message)[:3]
+        return {
+            "response": f"Here are some options for \"{data.get('message', '')}\".",
+            "actions": [{"type": "SEARCH_PRODUCTS", "payload": {"query": data.get("message", "")}}],
+            "productRecommendations": matches,
+        }
+
+    def _search(self, query):
+        words = [word for word in re.split(r"\W+", query.lower()) if word]
+        scored = []
+        for product in self.products.values():
+            haystack = f"{product['name']} {' '.join(product['categories'])}".lower()
+            score = sum(1 for word in words if word in haystack)
+            if score:
+                scored.append((-score, int(product["id"]) if product["id"].isdigit() else 0, product))
+        return [product for _, _, product in sorted(scored, key=lambda item: item[:2])]
+
+    def search(self, body, headers, query, argument):
+        data = self._json(body)
+        return {"products": self._search(data.get("query") or "")}
+
+    def product(self, body, headers, query, product_id):
+        product = self.products.get(product_id)
+        if product is None:
+            raise HttpError(404, {"error": "Product not found"})
+        language = (query.get("language") or ["en"])[0]
+        if language.split("-")[0] != "en":
+            translated = dict(product)
+            translated["name"] = self.translate(json.dumps(
+                {"text": product["name"], "from": "en", "to": language}).encode(), headers, {}, None)["translatedText"]
+            return translated
+        return product
+
+    def cart_add(self, body, headers, query, argument):
+        data = self._json(body)
+        product_id = str(data.get("productId", ""))
+        if product_id not in self.products:
+            return 500, "application/json", json.dumps(
+                {"success": False, "message": "Failed to add item to cart"}).encode("utf-8")
+        cart = self.carts.setdefault(data.get("userId") or "guest", {})
+        cart[product_id] = cart.get(product_id, 0) + int(data.get("quantity") or 1)
+        return {"success": True, "message": "Item added to cart"}
+
+    def speech_to_text(self, body, headers, query, argument):
+        content_type = headers.get("content-type", "")
+        if "multipart/form-data" not in content_type or b'name="file"' not in body:
+            return {"text": ""}
+        return {"text": "I am looking for a women's t-shirt"}
+
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+           500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable"}
+
+
+async def _read_body(reader, headers, limit):
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks, total = [], 0
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            total += size
+            if total > limit:
+                raise HttpError(413, {"error": "payload_too_large"})
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+    length = int(headers.get("content-length") or 0)
+    if length > limit:
+        raise HttpError(413, {"error": "payload_too_large"})
+    return await reader.readexactly(length) if length else b""
+
+
+async def serve_connection(backend, reader, writer, body_limit=50 * 1024 * 1024):
+    """Serve HTTP/1.1 requests on one keep-alive connection"""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                return
+            method, target, version = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            try:
+                body = await _read_body(reader, headers, body_limit)
+                result = await backend.handle(method, target, headers, body)
+            except HttpError as e:
+                result = e.status, "application/json", json.dumps(e.body).encode("utf-8")
+            if result is None:
+                return
+            status, content_type, payload = result
+            keep_alive = headers.get("connection", "").lower() != "close" and version.strip() == "HTTP/1.1"
+            writer.write(
+                f"{version.strip()} {status} {REASONS.get(status, 'Unknown')}\r\n"
+                f"Content-Type: {content_type}\r\nContent-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload
+            )
+            await writer.drain()
+            if not keep_alive:
+                return
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        return
+    finally:
+        writer.close()
+
+
+async def start(backend, host="127.0.0.1", port=3002):
+    """Start serving and return the asyncio server"""
+    return await asyncio.start_server(lambda r, w: serve_connection(backend, r, w), host, port,
+                                      reuse_address=True, backlog=1024)
+
+
+def parse_behaviours(latency=(), errors=(), hangs=(), per_kb=(), config_file=None):
+    """Build route behaviours from 'route=value' options and an optional JSON file"""
+    behaviours = {route: RouteBehaviour(Distribution(spec)) for route, spec in DEFAULT_BEHAVIOUR.items()}
+    if config_file:
+        # File settings come first so command-line options override them
+        with open(config_file) as f:
+            for route, options in reversed(list(json.load(f).get("routes", {}).items())):
+                latency = ((f"{route}={options['latency']}",) if "latency" in options else ()) + latency
+                errors = (f"{route}={options.get('error_rate', 0)}:{options.get('error_status', 500)}",) + errors
+                hangs = (f"{route}={options.get('hang_rate', 0)}",) + hangs
+                per_kb = (f"{route}={options.get('per_kb_ms', 0)}",) + per_kb
+
+    def items(values):
+        for item in values:
+            route, _, value = item.partition("=")
+            targets = ROUTES if route in ("all", "*") else [route]
+            for target in targets:
+                if target not in ROUTES:
+                    raise ValueError(f"Unknown route '{target}' (choose from {', '.join(ROUTES)} or all)")
+                yield behaviours[target], value
+
+    for behaviour, value in items(latency):
+        behaviour.latency = Distribution(value)
+    for behaviour, value in items(errors):
+        rate, _, status = value.partition(":")
+        behaviour.error_rate = float(rate)
+        behaviour.error_status = int(status or 500)
+    for behaviour, value in items(hangs):
+        behaviour.hang_rate = float(value)
+    for behaviour, value in items(per_kb):
+        behaviour.per_kb_ms = float(value)
+    return behaviours
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Run an offline stand-in for the Lingua Phone backend")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=urlsplit(config.BACKEND_URL).port or 3002, help="port to listen on")
+    parser.add_argument("--latency", action="append", default=[], metavar="ROUTE=DIST",
+                        help="latency distribution per route, e.g. translate=lognormal:80,0.4 or all=fixed:5")
+    parser.add_argument("--errors", action="append", default=[], metavar="ROUTE=RATE[:STATUS]",
+                        help="inject errors, e.g. chat=0.1:503")
+    parser.add_argument("--hangs", action="append", default=[], metavar="ROUTE=RATE",
+                        help="rate of requests that never get a response")
+    parser.add_argument("--per-kb", action="append", default=[], metavar="ROUTE=MS",
+                        help="extra latency per KB of request body, e.g. stt=2")
+    parser.add_argument("--config", default=None, help='JSON file: {"routes": {"tts": {"latency": ..., "error_rate": ...}}}')
+    parser.add_argument("--seed", type=int, default=None, help="seed for latency and error draws")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        behaviours = parse_behaviours(tuple(args.latency), tuple(args.errors), tuple(args.hangs),
+                                      tuple(args.per_kb), args.config)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        return 2
+    backend = MockBackend(behaviours, seed=args.seed)
+
+    async def run():
+        server = await start(backend, args.host, args.port)
+        print(f"Mock backend on http://{args.host}:{args.port} with {len(backend.products)} products "
+              f"(stats at /__mock/stats). Press Ctrl+C to stop.")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(backend.stats_dict()["routes"], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Long-running health monitor for the Lingua Phone endpoints and pods.
+
+Every interval the probes run concurrently alongside a pods and deployments
+snapshot. By default only the GET routes are probed; the POST routes bill a
+chat, translation or speech API call per request and are opt-in (--paid).
+Each probe's samples go into a fixed-size ring buffer backed by typed arrays
+(15 bytes per sample), so memory stays flat no matter how long the monitor
+runs. Rolling percentiles and error rates over the last 1, 5 and 15 minutes
+are served on a small local HTTP endpoint:
+
+    GET /          plain-text table
+    GET /json      the same figures as JSON, plus the latest pod status
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.probe import cheap_probes, default_probes, run_sweep
+from lingua_ops.snapshot import take_snapshot
+from lingua_ops.stats import percentile
+
+DEFAULT_WINDOWS = (60, 300, 900)
+
+
+class SampleRing:
+    """Fixed-capacity ring of (timestamp, latency, status code, ok) samples stored in parallel arrays"""
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.latencies = array("f", bytes(4 * capacity))
+        self.statuses = array("H", bytes(2 * capacity))
+        self.oks = array("B", bytes(capacity))
+        self.next = 0
+        self.size = 0
+
+    def append(self, timestamp, latency, status_code, ok):
+        index = self.next
+        self.timestamps[index] = timestamp
+        self.latencies[index] = latency
+        self.statuses[index] = status_code or 0
+        self.oks[index] = 1 if ok else 0
+        self.next = (index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def indexes(self, since=None):
+        """Indexes of the stored samples, newest first, stopping at the first one older than since"""
+        for offset in range(1, self.size + 1):
+            index = (self.next - offset) % self.capacity
+            if since is not None and self.timestamps[index] < since:
+                return
+            yield index
+
+    def window(self, seconds, now=None):
+        """Summarise the samples of the last `seconds` seconds"""
+        now = now if now is not None else time.time()
+        latencies, errors, statuses = [], 0, {}
+        for index in self.indexes(now - seconds):
+            latencies.append(self.latencies[index])
+            errors += 0 if self.oks[index] else 1
+            status = str(self.statuses[index] or "error")
+            statuses[status] = statuses.get(status, 0) + 1
+        latencies.sort()
+        count = len(latencies)
+        return {
+            "count": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else None,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1) if count else None,
+            "p90_ms": round(percentile(latencies, 90) * 1000, 1) if count else None,
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1) if count else None,
+            "max_ms": round(latencies[-1] * 1000, 1) if count else None,
+            "statuses": statuses,
+        }
+
+    def latest(self):
+        if not self.size:
+            return None
+        index = (self.next - 1) % self.capacity
+        return {
+            "timestamp": self.timestamps[index],
+            "elapsed_ms": round(self.latencies[index] * 1000, 1),
+            "status_code": self.statuses[index] or None,
+            "ok": bool(self.oks[index]),
+        }
+
+
+class Monitor:
+    """Probe the endpoints (and optionally the cluster) on a fixed schedule and keep the samples"""
+
+    def __init__(self, probes=None, interval=10.0, capacity=4096, client=None, windows=DEFAULT_WINDOWS):
+        self.probes = probes if probes is not None else cheap_probes()
+        self.interval = interval
+        self.client = client
+        self.windows = windows
+        self.rings = {probe.name: SampleRing(capacity) for probe in self.probes}
+        if client is not None:
+            self.rings["cluster"] = SampleRing(capacity)
+        self.pods = []
+        self.deployments = []
+        self.cluster_error = None
+        self.started = time.time()
+        self.ticks = 0
+        self._lock = threading.Lock()
+
+    async def tick(self):
+        """Run one round of probes plus the cluster snapshot, all at the same time"""
+        now = time.time()
+        sweep_task = asyncio.ensure_future(run_sweep(self.probes))
+        snapshot = None
+        if self.client is not None:
+            start = time.perf_counter()
+            snapshot = await asyncio.to_thread(take_snapshot, self.client, ("pods", "deployments"))
+            cluster_elapsed = time.perf_counter() - start
+        sweep = await sweep_task
+
+        with self._lock:
+            for result in sweep.results:
+                # First attempts only: a retried failure is still a failure, and backoff is not latency
+                response = result.response
+                self.rings[result.name].append(now, response.first_elapsed, response.first_status_code,
+                                               response.first_ok)
+            if snapshot is not None:
+                healthy = not snapshot.errors and all(
+                    deployment.ready >= deployment.replicas for deployment in snapshot.deployments)
+                self.rings["cluster"].append(now, cluster_elapsed, 0 if snapshot.errors else 200, healthy)
+                self.cluster_error = "; ".join(f"{kind}: {error}" for kind, error in snapshot.errors.items()) or None
+                if "pods" not in snapshot.errors:
+                    self.pods = [
+                        {"name": pod.name, "status": pod.status, "ready": f"{pod.ready_count}/{len(pod.containers)}",
+                         "restarts": pod.restarts}
+                        for pod in snapshot.pods
+                    ]
+                if "deployments" not in snapshot.errors:
+                    self.deployments = [
+                        {"name": deployment.name, "ready": deployment.ready, "replicas": deployment.replicas}
+                        for deployment in snapshot.deployments
+                    ]
+            self.ticks += 1
+
+    async def run(self, duration=None):
+        """Tick every interval on a fixed schedule (a slow tick does not push later ones back)"""
+        start = time.monotonic()
+        next_tick = start
+        while duration is None or time.monotonic() - start < duration:
+            await self.tick()
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                # The tick overran the interval; skip the missed slots rather than bursting
+                next_tick = time.monotonic()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def to_dict(self):
+        now = time.time()
+        with self._lock:
+            return {
+                "uptime_s": round(now - self.started, 1),
+                "ticks": self.ticks,
+                "interval_s": self.interval,
+                "probes": {
+                    name: {
+                        "latest": ring.latest(),
+                        "windows": {f"{seconds}s": ring.window(seconds, now) for seconds in self.windows},
+                    }
+                    for name, ring in self.rings.items()
+                },
+                "deployments": list(self.deployments),
+                "pods": list(self.pods),
+                "cluster_error": self.cluster_error,
+            }
+
+    def format(self):
+        data = self.to_dict()
+        lines = [f"Lingua Phone monitor: {data['ticks']} rounds every {self.interval:g}s, "
+                 f"up {data['uptime_s']:.0f}s", ""]
+        header = f"{'PROBE':<12} {'WINDOW':<7} {'COUNT':>6} {'ERR%':>6} {'P50':>8} {'P90':>8} {'P99':>8} {'MAX':>8}"
+        lines.append(header)
+        for name, probe in data["probes"].items():
+            for window, summary in probe["windows"].items():
+                if not summary["count"]:
+                    lines.append(f"{name:<12} {window:<7} {0:>6}")
+                    continue
+                lines.append(
+                    f"{name:<12} {window:<7} {summary['count']:>6} {summary['error_rate'] * 100:>5.1f}% "
+                    f"{summary['p50_ms']:>6.0f}ms {summary['p90_ms']:>6.0f}ms "
+                    f"{summary['p99_ms']:>6.0f}ms {summary['max_ms']:>6.0f}ms"
+                )
+        if data["deployments"] or data["pods"]:
+            lines.append("")
+            for deployment in data["deployments"]:
+                lines.append(f"deployment/{deployment['name']}: {deployment['ready']}/{deployment['replicas']} ready")
+            for pod in data["pods"]:
+                lines.append(f"pod/{pod['name']}: {pod['status']} {pod['ready']} restarts={pod['restarts']}")
+        if data["cluster_error"]:
+            lines.append(f"Cluster error: {data['cluster_error']}")
+        return lines
+
+
+def serve(monitor, host="127.0.0.1", port=9100):
+    """Serve the monitor's figures over HTTP on a background thread; returns the server"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] == "/json":
+                body = json.dumps(monitor.to_dict(), indent=2).encode("utf-8")
+                content_type = "application/json"
+            elif self.path.split("?")[0] == "/":
+                body = ("\n".join(monitor.format()) + "\n").encode("utf-8")
+                content_type = "text/plain; charset=utf-8"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Continuously probe Lingua Phone and serve rolling latency stats")
+    parser.add_argument("--frontend-url", default=None, help="frontend base URL")
+    parser.add_argument("--backend-url", default=None, help="backend base URL")
+    parser.add_argument("--interval", type=float, default=10.0, help="seconds between probe rounds")
+    parser.add_argument("--capacity", type=int, default=4096, help="samples kept per probe")
+    parser.add_argument("--host", default="127.0.0.1", help="address to serve the stats on")
+    parser.add_argument("--port", type=int, default=9100, help="port to serve the stats on")
+    parser.add_argument("--paid", action="store_true",
+                        help="also probe the POST routes (chat, translate, tts, search), which call billed APIs")
+    parser.add_argument("--no-cluster", action="store_true", help="do not poll pod and deployment status")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    client = None
+    if not args.no_cluster:
+        try:
+            client = connect()
+        except ClusterError as e:
+            print(f"Cluster status disabled: {e}")
+    probes = (default_probes if args.paid else cheap_probes)(args.frontend_url, args.backend_url)
+    monitor = Monitor(probes, interval=args.interval,
+                      capacity=args.capacity, client=client)
+    server = serve(monitor, args.host, args.port)
+    print(f"Monitoring every {args.interval:g}s; stats at http://{args.host}:{server.server_port}/ "
+          f"(JSON at /json). Press Ctrl+C to stop.")
+    try:
+        asyncio.run(monitor.run(args.duration))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    print("\n".join(monitor.format()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Text or JSON-lines output for the status and diagnosis scripts.
+
+Every script is a sequence of named steps. In text mode, the default, steps
+print their banners and tables the way the scripts always have. With
+--json-lines on the command line or LINGUA_OUTPUT=jsonl in the environment,
+nothing is printed for people. Instead every step writes one JSON object to
+stdout when it finishes, with its status, start time, duration, error and
+structured data. A final "summary" object closes the run. Lines are flushed
+as they are written, so a dashboard collector can tail a script while it
+runs. Runs can be told apart, and joined up again, by run_id.
+
+    {"schema_version": 1, "type": "step", "script": "check-deployment-status",
+     "run_id": "3f9c0e2a41b7", "seq": 2, "step": "pods", "status": "ok",
+     "started_at": "...", "elapsed_ms": 41.2, "error": null, "data": {...}}
+
+Scripts that stream, like the log tail, also write one object per item as
+it arrives ("type": "log"), between the step objects.
+"""
+
+import json
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from lingua_ops import config
+
+SCHEMA_VERSION = 1
+STATUSES = ("ok", "warn", "error")
+
+
+def json_lines_requested(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    return "--json-lines" in argv or config.OUTPUT == "jsonl"
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class Step:
+    def __init__(self, output, seq, name, title):
+        self.output = output
+        self.seq = seq
+        self.name = name
+        self.title = title
+        self.status = "ok"
+        self.error = None
+        self.data = {}
+        self.started_at = _now()
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+
+    def print(self, *args):
+        self.output.print(*args)
+
+    def warn(self, message):
+        """Mark the step as degraded and print message"""
+        if self.status == "ok":
+            self.status = "warn"
+        self.error = self.error or message
+        self.print(message)
+
+    def fail(self, message):
+        """Mark the step as failed and print message"""
+        self.status = "error"
+        self.error = message
+        self.print(message)
+
+    def to_dict(self):
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "type": "step",
+            "script": self.output.script,
+            "run_id": self.output.run_id,
+            "seq": self.seq,
+            "step": self.name,
+            "title": self.title,
+            "status": self.status,
+            "started_at": self.started_at,
+            "elapsed_ms": round(self.elapsed * 1000, 1),
+            "error": self.error,
+            "data": self.data,
+        }
+
+
+class Output:
+    """Step-by-step reporter that prints for people or writes JSON lines for machines"""
+
+    def __init__(self, script, json_lines=None, stream=None):
+        self.script = script
+        self.json_lines = json_lines_requested() if json_lines is None else json_lines
+        self.stream = stream or sys.stdout
+        self.run_id = uuid.uuid4().hex[:12]
+        self.steps = []
+        self.started_at = _now()
+        self.start = time.perf_counter()
+
+    def print(self, *args):
+        """Print for people; ignored in JSON-lines mode"""
+        if not self.json_lines:
+            print(*args, file=self.stream)
+
+    def emit(self, record):
+        self.stream.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def record(self, type_, **fields):
+        """Write one streamed item (e.g. a log line) in JSON-lines mode; ignored otherwise"""
+        if self.json_lines:
+            self.emit(dict({"schema_version": SCHEMA_VERSION, "type": type_, "script": self.script,
+                            "run_id": self.run_id}, **fields))
+
+    @contextmanager
+    def step(self, name, title=None):
+        """Time one step; an exception escaping the block marks it failed and is re-raised"""
+        step = Step(self, len(self.steps) + 1, name, title)
+        self.steps.append(step)
+        if title:
+            self.print(title)
+        try:
+            yield step
+        except Exception as e:
+            step.status, step.error = "error", f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            step.elapsed = time.perf_counter() - step.start
+            if self.json_lines:
+                self.emit(step.to_dict())
+
+    @property
+    def status(self):
+        return max((step.status for step in self.steps), key=STATUSES.index, default="ok")
+
+    def finish(self, **data):
+        """Write the summary line and return the run's status"""
+        if self.json_lines:
+            self.emit({
+                "schema_version": SCHEMA_VERSION,
+                "type": "summary",
+                "script": self.script,
+                "run_id": self.run_id,
+                "status": self.status,
+                "started_at": self.started_at,
+                "elapsed_ms": round((time.perf_counter() - self.start) * 1000, 1),
+                "steps": len(self.steps),
+                "failed": [step.name for step in self.steps if step.status == "error"],
+                "data": data,
+            })
+        return self.status
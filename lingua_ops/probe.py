@@ -0,0 +1,186 @@
+"""
+Concurrent health probes for the Lingua Phone frontend and backend.
+
+All probes in a sweep are started at once and each one has its own deadline,
+so a full sweep takes as long as the slowest single endpoint rather than the
+sum of all of them. Sweeps share one keep-alive client, so repeated sweeps
+(monitor-services.py) time the endpoints rather than connection setup.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+
+from lingua_ops import config
+from lingua_ops.http import arequest, shared_client
+
+
+@dataclass
+class Probe:
+    name: str
+    method: str
+    url: str
+    json: dict = None
+    deadline: float = 5.0
+
+
+@dataclass
+class ProbeResult:
+    probe: Probe
+    response: object
+
+    @property
+    def name(self):
+        return self.probe.name
+
+    @property
+    def ok(self):
+        return self.response.ok
+
+    def to_dict(self):
+        return {
+            "name": self.probe.name,
+            "method": self.probe.method,
+            "url": self.probe.url,
+            "ok": self.ok,
+            "status_code": self.response.status_code,
+            "elapsed_ms": round(self.response.elapsed * 1000, 1),
+            "error": self.response.error,
+            "attempts": self.response.attempts,
+            "first_status_code": self.response.first_status_code,
+            "first_elapsed_ms": round(self.response.first_elapsed * 1000, 1),
+            "first_error": self.response.first_error,
+        }
+
+
+@dataclass
+class SweepResult:
+    results: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self):
+        return all(result.ok for result in self.results)
+
+    @property
+    def failed(self):
+        return [result for result in self.results if not result.ok]
+
+    def get(self, name):
+        for result in self.results:
+            if result.name == name:
+                return result
+        return None
+
+    def to_dict(self):
+        return {
+            "ok": self.ok,
+            "elapsed_ms": round(self.elapsed * 1000, 1),
+            "results": [result.to_dict() for result in self.results],
+        }
+
+
+def default_probes(frontend_url=None, backend_url=None):
+    """Return the standard probe set covering the frontend and every main API route"""
+    frontend = (frontend_url or config.FRONTEND_URL).rstrip("/")
+    backend = (backend_url or config.BACKEND_URL).rstrip("/")
+    return [
+        Probe("frontend", "GET", frontend),
+        Probe("backend", "GET", backend),
+        Probe("languages", "GET", f"{backend}/api/languages"),
+        Probe(
+            "chat",
+            "POST",
+            f"{backend}/api/chat",
+            json={"message": "I am looking for a women's t-shirt", "language": "en"},
+            deadline=10.0,
+        ),
+        Probe(
+            "translate",
+            "POST",
+            f"{backend}/api/translate",
+            json={"text": "Hello, how are you?", "from": "en", "to": "es"},
+            deadline=10.0,
+        ),
+        Probe(
+            "tts",
+            "POST",
+            f"{backend}/api/tts",
+            json={"text": "Hello, how are you?", "language": "en-US"},
+            deadline=10.0,
+        ),
+        Probe(
+            "search",
+            "POST",
+            f"{backend}/api/search",
+            json={"query": "t-shirt", "language": "en"},
+        ),
+    ]
+
+
+def cheap_probes(frontend_url=None, backend_url=None):
+    """The GET probes only: the POST routes call billed APIs (chat, translation, speech) on every request"""
+    return [probe for probe in default_probes(frontend_url, backend_url) if probe.method == "GET"]
+
+
+async def run_probe(probe, client=None):
+    """Run a single probe, never taking longer than its deadline"""
+    response = await arequest(probe.method, probe.url, json=probe.json, deadline=probe.deadline,
+                              client=client or shared_client())
+    return ProbeResult(probe, response)
+
+
+async def run_sweep(probes=None, client=None):
+    """Run all probes concurrently and collect the results in probe order"""
+    probes = probes if probes is not None else default_probes()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_probe(probe, client) for probe in probes))
+    return SweepResult(list(results), time.perf_counter() - start)
+
+
+def sweep(probes=None):
+    """Blocking wrapper around run_sweep() for use from plain scripts"""
+    return asyncio.run(run_sweep(probes))
+
+
+def format_result(result, show_body=False):
+    """Render one probe result as indented report lines"""
+    lines = [f"{result.probe.method} {result.probe.url} ({result.name})"]
+    response = result.response
+    if response.error:
+        lines.append(f"   Error: {response.error}")
+    else:
+        lines.append(f"   Status code: {response.status_code}")
+        if show_body:
+            lines.append(f"   Response: {response.text[:500]}")
+    if response.attempts > 1:
+        first = "transport error" if response.first_error else f"status {response.first_status_code}"
+        lines.append(f"   Time: {response.elapsed * 1000:.0f} ms ({response.attempts} attempts; "
+                     f"first: {first} after {response.first_elapsed * 1000:.0f} ms)")
+    else:
+        lines.append(f"   Time: {response.elapsed * 1000:.0f} ms")
+    return lines
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Probe the Lingua Phone frontend and every API route once")
+    parser.add_argument("--frontend-url", default=None, help="frontend base URL")
+    parser.add_argument("--backend-url", default=None, help="backend base URL")
+    parser.add_argument("--body", action="store_true", help="show response bodies")
+    parser.add_argument("--json", action="store_true", help="print the sweep as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    result = sweep(default_probes(args.frontend_url, args.backend_url))
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        for probe_result in result.results:
+            print("\n".join(format_result(probe_result, show_body=args.body)))
+        print(f"Sweep completed in {result.elapsed * 1000:.0f} ms"
+              + (f"; failing: {', '.join(r.name for r in result.failed)}" if not result.ok else ""))
+    return 0 if result.ok else 1
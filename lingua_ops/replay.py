@@ -0,0 +1,242 @@
+"""
+Replay a captured request log (JSON lines) against a backend.
+
+Each line describes one request::
+
+    {"ts": 1718000000.125, "method": "POST", "path": "/api/translate",
+     "json": {"text": "Hello", "from": "en", "to": "es"}}
+
+``ts`` may be epoch seconds or an ISO 8601 string; ``offset`` (seconds since
+the start of the capture) may be used instead. ``url`` is accepted in place
+of ``path`` and only its path and query are kept, so captures taken in
+production replay against a local backend. Lines that do not describe a
+request are counted and skipped.
+
+The file is read lazily and at most ``pool_size`` requests are in flight, so
+memory stays constant for captures of any size. Original inter-arrival gaps
+are kept, divided by ``speed`` (speed 0 sends as fast as the pool allows).
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import math
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from lingua_ops import config
+from lingua_ops.http import pooled_session, request
+from lingua_ops.stats import LatencyHistogram, format_summary
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+@dataclass
+class Record:
+    offset: float
+    method: str
+    path: str
+    json: object = None
+    headers: dict = None
+
+    @property
+    def route(self):
+        """Path with numeric ids collapsed, used to group latencies"""
+        return f"{self.method} {_ID_SEGMENT.sub('/:id', self.path.split('?', 1)[0])}"
+
+
+@dataclass
+class ReplayReport:
+    sent: int = 0
+    skipped: int = 0
+    errors: int = 0
+    duration: float = 0.0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    lag: LatencyHistogram = field(default_factory=LatencyHistogram)
+    routes: dict = field(default_factory=dict)
+
+    def add(self, record, response, lag):
+        self.sent += 1
+        if not response.ok:
+            self.errors += 1
+        self.latency.record(response.elapsed)
+        self.lag.record(lag)
+        self.routes.setdefault(record.route, LatencyHistogram()).record(response.elapsed)
+
+    def to_dict(self):
+        return {
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.sent, 4) if self.sent else 0.0,
+            "duration_s": round(self.duration, 3),
+            "throughput_rps": round(self.sent / self.duration, 2) if self.duration else 0.0,
+            "latency": self.latency.summary(),
+            "schedule_lag": self.lag.summary(),
+            "routes": {route: hist.summary() for route, hist in sorted(self.routes.items())},
+        }
+
+    def format(self):
+        """Render the report as text lines"""
+        data = self.to_dict()
+        lines = [
+            f"Replayed {data['sent']} requests in {data['duration_s']:.1f}s "
+            f"({data['throughput_rps']:.1f} req/s), {data['skipped']} lines skipped",
+            f"  errors      {data['errors']} ({data['error_rate'] * 100:.1f}%)",
+            f"  latency     {format_summary(data['latency'])}",
+            f"  late start  {format_summary(data['schedule_lag'])}",
+        ]
+        for route, summary in data["routes"].items():
+            lines.append(f"  {route:<32} n={summary['count']:<7} {format_summary(summary)}")
+        return lines
+
+
+def _parse_time(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+def _open(path):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_records(path, skipped=None):
+    """
+    Yield Records from a JSONL capture one line at a time.
+
+    ``skipped`` may be a one-element list; its value is incremented for every
+    line that is not a usable request.
+    """
+    first = None
+    previous = 0.0
+    with _open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+                if not isinstance(data, dict) or not (data.get("path") or data.get("url")):
+                    raise ValueError("not a request record")
+                target = data.get("path") or data.get("url")
+                if "offset" in data:
+                    offset = float(data["offset"])
+                elif "ts" in data or "timestamp" in data:
+                    moment = _parse_time(data.get("ts", data.get("timestamp")))
+                    first = moment if first is None else first
+                    offset = moment - first
+                else:
+                    offset = previous
+            except (ValueError, TypeError, AttributeError):
+                if skipped is not None:
+                    skipped[0] += 1
+                continue
+            parts = urlsplit(target)
+            path = parts.path + (f"?{parts.query}" if parts.query else "")
+            previous = offset
+            yield Record(
+                offset=offset,
+                method=str(data.get("method", "GET")).upper(),
+                path=path if path.startswith("/") else "/" + path,
+                json=data.get("json", data.get("body")),
+                headers=data.get("headers"),
+            )
+
+
+def validate_replay(speed, pool_size):
+    """Raise ValueError unless speed is finite and >= 0 and pool_size is at least 1"""
+    if not (speed >= 0 and math.isfinite(speed)):
+        raise ValueError(f"--speed must be a finite number of at least 0, got {speed:g}")
+    if pool_size < 1:
+        raise ValueError(f"--pool-size must be at least 1, got {pool_size}")
+
+
+async def replay(path, base_url=None, speed=1.0, pool_size=16, timeout=10.0, limit=None):
+    """Replay the capture at `path` and return a ReplayReport"""
+    validate_replay(speed, pool_size)
+    base_url = (base_url or config.BACKEND_URL).rstrip("/")
+    report = ReplayReport()
+    skipped = [0]
+    session = pooled_session(pool_size)
+    slots = asyncio.Semaphore(pool_size)
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=pool_size)
+    pending = set()
+    start = time.perf_counter()
+
+    async def send(record, scheduled):
+        try:
+            lag = max(0.0, time.perf_counter() - scheduled)
+            response = await loop.run_in_executor(
+                executor,
+                lambda: request(record.method, base_url + record.path, json=record.json,
+                                headers=record.headers, timeout=timeout, session=session),
+            )
+            report.add(record, response, lag)
+        finally:
+            slots.release()
+
+    try:
+        for count, record in enumerate(iter_records(path, skipped)):
+            if limit is not None and count >= limit:
+                break
+            scheduled = start + (record.offset / speed if speed else 0.0)
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Back-pressure: do not read further ahead than the pool can send
+            await slots.acquire()
+            task = asyncio.create_task(send(record, scheduled))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+    finally:
+        executor.shutdown(wait=False)
+        session.close()
+    report.skipped = skipped[0]
+    report.duration = time.perf_counter() - start
+    return report
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Replay a JSONL request capture against a backend")
+    parser.add_argument("capture", help="JSONL (or .jsonl.gz) capture")
+    parser.add_argument("--url", default=config.BACKEND_URL, help="backend base URL")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="time compression factor (2 = twice as fast, 0 = no delays)")
+    parser.add_argument("--pool-size", type=int, default=16, help="maximum concurrent connections")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout in seconds")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many requests")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        validate_replay(args.speed, args.pool_size)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    report = asyncio.run(replay(args.capture, args.url, speed=args.speed, pool_size=args.pool_size,
+                                timeout=args.timeout, limit=args.limit))
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        for line in report.format():
+            print(line)
+    return 0 if report.errors == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
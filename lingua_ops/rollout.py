@@ -0,0 +1,233 @@
+"""
+Watch-based rollout monitor for the Lingua Phone deployments.
+
+Rather than sleeping and polling `kubectl get pods`, the watcher lists the
+deployments and pods once and then follows both watch streams at the same
+time. It returns as soon as every deployment has finished rolling out, or as
+soon as one of its new pods is crash-looping or cannot pull its image, and
+it records when each deployment reached each phase.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+from lingua_ops.cluster import ClusterError, match_labels
+
+DEFAULT_DEPLOYMENTS = ("lingua-backend", "lingua-frontend")
+
+# Waiting reasons that will not fix themselves without a new rollout
+FAILURE_REASONS = {
+    "CrashLoopBackOff",
+    "ImagePullBackOff",
+    "ErrImagePull",
+    "InvalidImageName",
+    "CreateContainerConfigError",
+    "RunContainerError",
+}
+
+PHASES = ("observed", "pods_created", "updated", "ready")
+
+
+@dataclass
+class DeploymentProgress:
+    name: str
+    phases: dict = field(default_factory=dict)
+    ready: bool = False
+    failure: str = None
+
+    @property
+    def done(self):
+        return self.ready or self.failure is not None
+
+
+@dataclass
+class RolloutResult:
+    deployments: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+    timed_out: bool = False
+
+    @property
+    def ok(self):
+        return all(progress.ready for progress in self.deployments.values())
+
+    def to_dict(self):
+        return {
+            "ok": self.ok,
+            "timed_out": self.timed_out,
+            "elapsed_s": round(self.elapsed, 2),
+            "deployments": {
+                name: {
+                    "ready": progress.ready,
+                    "failure": progress.failure,
+                    "phases_s": {phase: round(at, 2) for phase, at in progress.phases.items()},
+                }
+                for name, progress in self.deployments.items()
+            },
+        }
+
+    def format(self):
+        """Render the result with a per-phase timing breakdown"""
+        lines = []
+        for name, progress in self.deployments.items():
+            if progress.ready:
+                state = "ready"
+            elif progress.failure:
+                state = f"FAILED: {progress.failure}"
+            else:
+                state = "not ready (timed out)" if self.timed_out else "not ready"
+            lines.append(f"   {name}: {state}")
+            for phase in PHASES:
+                if phase in progress.phases:
+                    lines.append(f"      {phase:<13} +{progress.phases[phase]:.1f}s")
+        lines.append(f"   Total: {self.elapsed:.1f}s")
+        return lines
+
+
+class RolloutWatcher:
+    """Follow deployment and pod watch streams until the given deployments are ready or failing"""
+
+    def __init__(self, client, deployments=DEFAULT_DEPLOYMENTS, exclude_pods=(), crash_restarts=3):
+        self.client = client
+        self.names = list(deployments)
+        self.exclude_pods = set(exclude_pods)
+        self.crash_restarts = crash_restarts
+        self.deployments = {}
+        self.pods = {}
+        self.initial_pods = set()
+        self.progress = {name: DeploymentProgress(name) for name in self.names}
+        self._events = queue.Queue()
+        self._stop = threading.Event()
+
+    def _follow(self, kind, resource_version):
+        """Feed one watch stream into the shared event queue, re-listing if the stream expires"""
+        while not self._stop.is_set():
+            try:
+                for event, obj in self.client.watch(kind, resource_version=resource_version, timeout_seconds=30):
+                    resource_version = obj["metadata"].get("resourceVersion", resource_version)
+                    self._events.put((kind, event, obj))
+                    if self._stop.is_set():
+                        return
+            except ClusterError as e:
+                if e.status_code != 410:
+                    self._events.put((kind, "ERROR", str(e)))
+                    return
+                items, resource_version = self.client.list_versioned(kind)
+                for obj in items:
+                    self._events.put((kind, "MODIFIED", obj))
+
+    def _apply(self, kind, event, obj):
+        store = self.deployments if kind == "deployments" else self.pods
+        name = obj["metadata"]["name"]
+        if event == "DELETED":
+            store.pop(name, None)
+        else:
+            store[name] = obj
+
+    def _pods_for(self, deployment):
+        selector = deployment["spec"].get("selector", {}).get("matchLabels", {})
+        selector_text = ",".join(f"{key}={value}" for key, value in selector.items())
+        return [pod for pod in self.pods.values()
+                if match_labels(pod["metadata"].get("labels"), selector_text)]
+
+    def _mark(self, progress, phase, elapsed):
+        progress.phases.setdefault(phase, elapsed)
+
+    def _evaluate(self, elapsed):
+        for name, progress in self.progress.items():
+            if progress.done:
+                continue
+            deployment = self.deployments.get(name)
+            if deployment is None:
+                continue
+            spec, status = deployment["spec"], deployment.get("status", {})
+            wanted = spec.get("replicas", 1)
+            observed = status.get("observedGeneration", 0) >= deployment["metadata"].get("generation", 0)
+            updated = observed and status.get("updatedReplicas", 0) >= wanted
+            all_new = updated and status.get("replicas", 0) == status.get("updatedReplicas", 0)
+            settled = all_new and status.get("availableReplicas", 0) >= wanted
+            if observed:
+                self._mark(progress, "observed", elapsed)
+
+            pods = [pod for pod in self._pods_for(deployment)
+                    if pod["metadata"]["name"] not in self.exclude_pods
+                    and not pod["metadata"].get("deletionTimestamp")]
+            new_pods = [pod for pod in pods if pod["metadata"]["name"] not in self.initial_pods]
+            if new_pods:
+                self._mark(progress, "pods_created", elapsed)
+            if updated:
+                self._mark(progress, "updated", elapsed)
+
+            # Once every replica runs the new template the existing pods count as new too
+            current = pods if all_new else new_pods
+            for pod in current:
+                for container in pod.get("status", {}).get("containerStatuses", []):
+                    reason = container.get("state", {}).get("waiting", {}).get("reason")
+                    if reason in FAILURE_REASONS:
+                        progress.failure = f"{pod['metadata']['name']}: {reason}"
+                    elif container.get("restartCount", 0) >= self.crash_restarts and not container.get("ready"):
+                        progress.failure = (f"{pod['metadata']['name']}: restarted "
+                                            f"{container['restartCount']} times")
+            if progress.failure:
+                continue
+
+            ready_pods = [pod for pod in pods if _pod_ready(pod)]
+            if settled and len(ready_pods) >= wanted:
+                progress.ready = True
+                self._mark(progress, "ready", elapsed)
+
+    def run(self, timeout=300):
+        """Block until every deployment is ready or failed, or `timeout` seconds pass"""
+        start = time.perf_counter()
+        deployments, deployment_version = self.client.list_versioned("deployments")
+        pods, pod_version = self.client.list_versioned("pods")
+        for obj in deployments:
+            self._apply("deployments", "ADDED", obj)
+        for obj in pods:
+            self._apply("pods", "ADDED", obj)
+        self.initial_pods = set(self.pods) | self.exclude_pods
+        missing = [name for name in self.names if name not in self.deployments]
+        for name in missing:
+            self.progress[name].failure = "deployment not found"
+
+        threads = [
+            threading.Thread(target=self._follow, args=("deployments", deployment_version), daemon=True),
+            threading.Thread(target=self._follow, args=("pods", pod_version), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        result = RolloutResult(self.progress)
+        try:
+            self._evaluate(0.0)
+            while not all(progress.done for progress in self.progress.values()):
+                remaining = timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    result.timed_out = True
+                    break
+                try:
+                    kind, event, obj = self._events.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if event == "ERROR":
+                    raise ClusterError(f"Watching {kind} failed: {obj}")
+                self._apply(kind, event, obj)
+                self._evaluate(time.perf_counter() - start)
+        finally:
+            self._stop.set()
+        result.elapsed = time.perf_counter() - start
+        return result
+
+
+def _pod_ready(pod):
+    for condition in pod.get("status", {}).get("conditions", []):
+        if condition.get("type") == "Ready":
+            return condition.get("status") == "True"
+    statuses = pod.get("status", {}).get("containerStatuses", [])
+    return bool(statuses) and all(status.get("ready") for status in statuses)
+
+
+def wait_for_rollouts(client, deployments=DEFAULT_DEPLOYMENTS, exclude_pods=(), timeout=300):
+    """Convenience wrapper: watch the deployments and return a RolloutResult"""
+    return RolloutWatcher(client, deployments, exclude_pods=exclude_pods).run(timeout)
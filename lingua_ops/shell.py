@@ -0,0 +1,23 @@
+"""
+The run_command() helper the deployment scripts used to copy into every file.
+"""
+
+import subprocess
+
+
+def run_command(command, verbose=True):
+    """Run a command and return (stdout, stderr, returncode)"""
+    try:
+        if verbose:
+            print(f"Running command: {command}")
+        result = subprocess.run(command, shell=isinstance(command, str), capture_output=True, text=True)
+        if verbose:
+            print(f"STDOUT: {result.stdout}")
+            if result.stderr:
+                print(f"STDERR: {result.stderr}")
+            print(f"Return code: {result.returncode}")
+        return result.stdout, result.stderr, result.returncode
+    except Exception as e:
+        if verbose:
+            print(f"Exception occurred: {str(e)}")
+        return "", str(e), 1
@@ -0,0 +1,381 @@
+"""
+One-shot snapshot of everything the status scripts look at.
+
+take_snapshot() fetches pods, services, deployments, HPAs and events from the
+API server in parallel over the client's keep-alive session, so the whole
+snapshot costs one round trip of latency. The JSON is parsed into small typed
+records and every status script renders from the same ClusterSnapshot instead
+of running and scraping several `kubectl get` commands.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, fields, is_dataclass
+
+from lingua_ops.cluster import ClusterError, age, match_labels, pod_status
+
+ALL_KINDS = ("pods", "services", "deployments", "horizontalpodautoscalers", "events")
+
+
+@dataclass
+class Container:
+    name: str
+    image: str
+    ready: bool
+    restarts: int
+    state: str
+    reason: str = None
+    message: str = None
+    last_state: str = None
+    last_reason: str = None
+    exit_code: int = None
+
+
+@dataclass
+class Pod:
+    name: str
+    phase: str
+    status: str
+    labels: dict
+    node: str
+    created: str
+    containers: list = field(default_factory=list)
+    raw: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def ready_count(self):
+        return sum(1 for container in self.containers if container.ready)
+
+    @property
+    def restarts(self):
+        return sum(container.restarts for container in self.containers)
+
+    @classmethod
+    def from_dict(cls, obj):
+        spec, status = obj.get("spec", {}), obj.get("status", {})
+        statuses = {item["name"]: item for item in status.get("containerStatuses", [])}
+        containers = []
+        for container in spec.get("containers", []) or [{"name": name} for name in statuses]:
+            item = statuses.get(container["name"], {})
+            state_name, state = next(iter((item.get("state") or {"waiting": {}}).items()))
+            last_name, last = next(iter((item.get("lastState") or {None: {}}).items()))
+            containers.append(Container(
+                name=container["name"],
+                image=container.get("image", item.get("image", "")),
+                ready=bool(item.get("ready")),
+                restarts=item.get("restartCount", 0),
+                state=state_name,
+                reason=state.get("reason"),
+                message=state.get("message"),
+                last_state=last_name,
+                last_reason=last.get("reason"),
+                exit_code=last.get("exitCode", state.get("exitCode")),
+            ))
+        return cls(
+            name=obj["metadata"]["name"],
+            phase=status.get("phase", "Unknown"),
+            status=pod_status(obj),
+            labels=obj["metadata"].get("labels", {}),
+            node=spec.get("nodeName"),
+            created=obj["metadata"].get("creationTimestamp"),
+            containers=containers,
+            raw=obj,
+        )
+
+
+@dataclass
+class Service:
+    name: str
+    type: str
+    cluster_ip: str
+    external_ip: str
+    ports: list
+    selector: dict
+    raw: dict = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_dict(cls, obj):
+        spec = obj.get("spec", {})
+        ingress = obj.get("status", {}).get("loadBalancer", {}).get("ingress", [])
+        return cls(
+            name=obj["metadata"]["name"],
+            type=spec.get("type", "ClusterIP"),
+            cluster_ip=spec.get("clusterIP", "<none>"),
+            external_ip=",".join(item.get("ip", item.get("hostname", "")) for item in ingress) or None,
+            ports=[(port.get("port"), port.get("targetPort", port.get("port")), port.get("protocol", "TCP"))
+                   for port in spec.get("ports", [])],
+            selector=spec.get("selector", {}),
+            raw=obj,
+        )
+
+
+@dataclass
+class Deployment:
+    name: str
+    replicas: int
+    ready: int
+    updated: int
+    available: int
+    images: list
+    selector: dict
+    raw: dict = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_dict(cls, obj):
+        spec, status = obj.get("spec", {}), obj.get("status", {})
+        containers = spec.get("template", {}).get("spec", {}).get("containers", [])
+        return cls(
+            name=obj["metadata"]["name"],
+            replicas=spec.get("replicas", 1),
+            ready=status.get("readyReplicas", 0),
+            updated=status.get("updatedReplicas", 0),
+            available=status.get("availableReplicas", 0),
+            images=[container.get("image") for container in containers],
+            selector=spec.get("selector", {}).get("matchLabels", {}),
+            raw=obj,
+        )
+
+
+@dataclass
+class Hpa:
+    name: str
+    target: str
+    min_replicas: int
+    max_replicas: int
+    current_replicas: int
+    desired_replicas: int
+    metrics: list
+    raw: dict = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_dict(cls, obj):
+        spec, status = obj.get("spec", {}), obj.get("status", {})
+        current = {
+            item.get("resource", {}).get("name"): item.get("resource", {}).get("current", {}).get("averageUtilization")
+            for item in status.get("currentMetrics", []) or []
+        }
+        metrics = []
+        for item in spec.get("metrics", []):
+            resource = item.get("resource", {})
+            metrics.append((resource.get("name"), resource.get("target", {}).get("averageUtilization"),
+                            current.get(resource.get("name"))))
+        return cls(
+            name=obj["metadata"]["name"],
+            target=spec.get("scaleTargetRef", {}).get("name"),
+            min_replicas=spec.get("minReplicas", 1),
+            max_replicas=spec.get("maxReplicas"),
+            current_replicas=status.get("currentReplicas", 0),
+            desired_replicas=status.get("desiredReplicas", 0),
+            metrics=metrics,
+            raw=obj,
+        )
+
+
+@dataclass
+class Event:
+    type: str
+    reason: str
+    object_kind: str
+    object_name: str
+    message: str
+    count: int
+    last_seen: str
+    raw: dict = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_dict(cls, obj):
+        involved = obj.get("involvedObject", {})
+        return cls(
+            type=obj.get("type", ""),
+            reason=obj.get("reason", ""),
+            object_kind=involved.get("kind", ""),
+            object_name=involved.get("name", ""),
+            message=(obj.get("message") or "").strip(),
+            count=obj.get("count", 1),
+            last_seen=obj.get("lastTimestamp") or obj.get("eventTime") or obj["metadata"].get("creationTimestamp"),
+            raw=obj,
+        )
+
+
+PARSERS = {
+    "pods": Pod.from_dict,
+    "services": Service.from_dict,
+    "deployments": Deployment.from_dict,
+    "horizontalpodautoscalers": Hpa.from_dict,
+    "events": Event.from_dict,
+}
+
+
+@dataclass
+class ClusterSnapshot:
+    pods: list = field(default_factory=list)
+    services: list = field(default_factory=list)
+    deployments: list = field(default_factory=list)
+    hpas: list = field(default_factory=list)
+    events: list = field(default_factory=list)
+    errors: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def pods_for(self, app):
+        """Pods carrying the app=<app> label, e.g. pods_for("lingua-frontend")"""
+        return [pod for pod in self.pods if pod.labels.get("app") == app]
+
+    def events_for(self, name):
+        return [event for event in self.events if event.object_name == name]
+
+    def service(self, name):
+        return next((service for service in self.services if service.name == name), None)
+
+    def endpoints_for(self, service):
+        """Pods a service's selector matches"""
+        selector = ",".join(f"{key}={value}" for key, value in service.selector.items())
+        return [pod for pod in self.pods if service.selector and match_labels(pod.labels, selector)]
+
+    def to_dict(self, kinds=ALL_KINDS):
+        data = {}
+        for kind in kinds:
+            attribute = "hpas" if kind == "horizontalpodautoscalers" else kind
+            data[attribute] = [record_dict(record) for record in getattr(self, attribute)]
+        data["errors"] = dict(self.errors)
+        data["elapsed_ms"] = round(self.elapsed * 1000, 1)
+        return data
+
+
+def record_dict(record):
+    """A snapshot record as plain JSON-ready data, without the raw API object"""
+    data = {}
+    for item in fields(record):
+        if item.name == "raw":
+            continue
+        value = getattr(record, item.name)
+        if isinstance(value, list):
+            value = [asdict(element) if is_dataclass(element) else element for element in value]
+        data[item.name] = value
+    if isinstance(record, Pod):
+        data["ready"] = f"{record.ready_count}/{len(record.containers)}"
+        data["restarts"] = record.restarts
+    return data
+
+
+def take_snapshot(client, kinds=ALL_KINDS):
+    """Fetch the given kinds concurrently and return them parsed as a ClusterSnapshot"""
+    snapshot = ClusterSnapshot()
+    start = time.perf_counter()
+    client.session  # create the shared session before the worker threads race to do it
+    with ThreadPoolExecutor(max_workers=len(kinds)) as pool:
+        futures = {kind: pool.submit(client.list, kind) for kind in kinds}
+    for kind, future in futures.items():
+        attribute = "hpas" if kind == "horizontalpodautoscalers" else kind
+        try:
+            items = [PARSERS[kind](obj) for obj in future.result()]
+        except ClusterError as e:
+            snapshot.errors[kind] = str(e)
+            continue
+        if kind == "events":
+            items.sort(key=lambda event: event.last_seen or "")
+        setattr(snapshot, attribute, items)
+    snapshot.elapsed = time.perf_counter() - start
+    return snapshot
+
+
+def format_pods(pods):
+    """Render pods as a kubectl-style table"""
+    lines = [f"{'NAME':<45} {'READY':<7} {'STATUS':<20} {'RESTARTS':<9} AGE"]
+    for pod in pods:
+        ready = f"{pod.ready_count}/{len(pod.containers)}"
+        lines.append(f"{pod.name:<45} {ready:<7} {pod.status:<20} {pod.restarts:<9} {age(pod.created)}")
+    return lines
+
+
+def format_services(services):
+    """Render services as a kubectl-style table"""
+    lines = [f"{'NAME':<30} {'TYPE':<13} {'CLUSTER-IP':<16} {'EXTERNAL-IP':<16} PORT(S)"]
+    for service in services:
+        ports = ",".join(f"{port}/{protocol}" for port, _, protocol in service.ports)
+        lines.append(
+            f"{service.name:<30} {service.type:<13} {service.cluster_ip:<16} "
+            f"{service.external_ip or '<none>':<16} {ports}"
+        )
+    return lines
+
+
+def format_deployments(deployments):
+    lines = [f"{'NAME':<30} {'READY':<7} {'UP-TO-DATE':<11} {'AVAILABLE':<10} IMAGES"]
+    for deployment in deployments:
+        ready = f"{deployment.ready}/{deployment.replicas}"
+        lines.append(f"{deployment.name:<30} {ready:<7} {deployment.updated:<11} "
+                     f"{deployment.available:<10} {','.join(deployment.images)}")
+    return lines
+
+
+def format_hpas(hpas):
+    lines = [f"{'NAME':<24} {'REFERENCE':<22} {'TARGETS':<28} {'MIN':<4} {'MAX':<4} REPLICAS"]
+    for hpa in hpas:
+        targets = ", ".join(
+            f"{name} {'<unknown>' if current is None else f'{current}%'}/{target}%"
+            for name, target, current in hpa.metrics
+        )
+        lines.append(f"{hpa.name:<24} {hpa.target or '':<22} {targets:<28} "
+                     f"{hpa.min_replicas:<4} {hpa.max_replicas:<4} {hpa.current_replicas}")
+    return lines
+
+
+def format_events(events):
+    lines = [f"{'LAST SEEN':<10} {'TYPE':<8} {'REASON':<20} {'OBJECT':<45} MESSAGE"]
+    for event in events:
+        target = f"{event.object_kind.lower()}/{event.object_name}" if event.object_kind else event.object_name
+        lines.append(f"{age(event.last_seen):<10} {event.type:<8} {event.reason:<20} {target:<45} {event.message}")
+    return lines
+
+
+def format_pod_details(pod, events=()):
+    """Render the parts of `kubectl describe pod` that matter for diagnosing crashes"""
+    spec, status = pod.raw.get("spec", {}), pod.raw.get("status", {})
+    lines = [
+        f"Name:       {pod.name}",
+        f"Node:       {pod.node or '<none>'}",
+        f"Status:     {pod.status} (phase {pod.phase})",
+        f"Started:    {status.get('startTime', '<unknown>')}",
+        "Containers:",
+    ]
+    ports = {item["name"]: item.get("ports", []) for item in spec.get("containers", [])}
+    for container in pod.containers:
+        lines.append(f"  {container.name}:")
+        lines.append(f"    Image:         {container.image}")
+        container_ports = ", ".join(str(port.get("containerPort")) for port in ports.get(container.name, []))
+        lines.append(f"    Ports:         {container_ports or '<none>'}")
+        lines.append(f"    State:         {container.state.capitalize()} {container.reason or ''}".rstrip())
+        if container.last_state:
+            extra = f" (exit code {container.exit_code})" if container.exit_code is not None else ""
+            lines.append(f"    Last State:    {container.last_state.capitalize()} {container.last_reason or ''}{extra}")
+        lines.append(f"    Ready:         {container.ready}")
+        lines.append(f"    Restart Count: {container.restarts}")
+    conditions = status.get("conditions", [])
+    if conditions:
+        lines.append("Conditions:")
+        for condition in conditions:
+            lines.append(f"  {condition['type']:<16} {condition['status']}")
+    if events:
+        lines.append("Events:")
+        for event in events:
+            lines.append(f"  {event.type:<8} {event.reason:<20} {age(event.last_seen)} ago  {event.message}")
+    return lines
+
+
+def format_snapshot(snapshot):
+    """Render every section of a snapshot, like `kubectl get all,hpa,events`"""
+    lines = []
+    for title, render, items in (
+        ("Pods", format_pods, snapshot.pods),
+        ("Services", format_services, snapshot.services),
+        ("Deployments", format_deployments, snapshot.deployments),
+        ("Horizontal Pod Autoscalers", format_hpas, snapshot.hpas),
+        ("Events", format_events, snapshot.events),
+    ):
+        lines.append(f"{title}:")
+        lines.extend(render(items) if items else ["   (none)"])
+        lines.append("")
+    for kind, error in snapshot.errors.items():
+        lines.append(f"Error fetching {kind}: {error}")
+    lines.append(f"Snapshot fetched in {snapshot.elapsed * 1000:.0f} ms")
+    return lines
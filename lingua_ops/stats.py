@@ -0,0 +1,119 @@
+"""
+Latency statistics shared by the load, replay and benchmark tools.
+
+Latencies are passed in seconds and reported in milliseconds.
+"""
+
+import math
+
+
+def percentile(sorted_values, pct):
+    """Return the pct-th percentile of an already sorted sequence using linear interpolation"""
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = rank - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def summarize(latencies):
+    """Summarise a collection of latencies (seconds) as a dict of millisecond figures"""
+    values = sorted(latencies)
+    if not values:
+        return {"count": 0, "min_ms": None, "mean_ms": None, "p50_ms": None,
+                "p90_ms": None, "p99_ms": None, "max_ms": None}
+    return {
+        "count": len(values),
+        "min_ms": round(values[0] * 1000, 2),
+        "mean_ms": round(sum(values) / len(values) * 1000, 2),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p90_ms": round(percentile(values, 90) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2),
+    }
+
+
+def fit_line(points):
+    """Least-squares (intercept, slope) of y over x for a list of (x, y) points"""
+    if not points:
+        return 0.0, 0.0
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if not spread:
+        return mean_y, 0.0
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+    return mean_y - slope * mean_x, slope
+
+
+def format_summary(summary):
+    """Render a summarize() dict as a single report line"""
+    if not summary["count"]:
+        return "no samples"
+    return (
+        f"p50 {summary['p50_ms']:.1f} ms  p90 {summary['p90_ms']:.1f} ms  "
+        f"p99 {summary['p99_ms']:.1f} ms  max {summary['max_ms']:.1f} ms"
+    )
+
+
+class LatencyHistogram:
+    """
+    Fixed-memory latency histogram with logarithmic buckets.
+
+    Each bucket is about 2% wider than the previous one, so percentiles are
+    accurate to roughly 1% no matter how many samples are recorded. Use it
+    instead of summarize() when the number of samples is unbounded.
+    """
+
+    GROWTH = 1.02
+    FLOOR = 1e-5
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, seconds):
+        return int(math.log(max(seconds, self.FLOOR) / self.FLOOR, self.GROWTH))
+
+    def record(self, seconds):
+        bucket = self._bucket(seconds)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, pct):
+        """Return the approximate pct-th percentile in seconds"""
+        if not self.count:
+            return None
+        target = max(1, math.ceil(self.count * pct / 100.0))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                middle = self.FLOOR * self.GROWTH ** (bucket + 0.5)
+                return min(max(middle, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        """Return the same shape of dict as summarize()"""
+        if not self.count:
+            return summarize([])
+        return {
+            "count": self.count,
+            "min_ms": round(self.min * 1000, 2),
+            "mean_ms": round(self.total / self.count * 1000, 2),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p90_ms": round(self.percentile(90) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
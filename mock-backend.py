@@ -0,0 +1,9 @@
+import sys
+
+from lingua_ops.mockbackend import main
+
+# Offline stand-in for the backend API with tunable latency and failures, e.g.
+#   python mock-backend.py --seed 1 --latency translate=lognormal:80,0.4 --errors chat=0.05:503
+#   python test-services.py        (in another terminal)
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+import sys
+
+from lingua_ops.monitor import main
+
+# Probe the frontend, backend and pods every few seconds and serve rolling stats, e.g.
+#   python monitor-services.py --interval 5 --port 9100
+#   python monitor-services.py --paid      (also the billed POST routes: chat, translate, tts, search)
+#   curl http://127.0.0.1:9100/        (or /json)
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+import sys
+
+from lingua_ops.baseline import main
+
+# Record latency baselines after a rollout and gate on p95 regressions, e.g.
+#   python perf-baseline.py gate --label "backend:abc123"
+#   python perf-baseline.py compare --run 12 --base 9
+#   python perf-baseline.py list
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+import sys
+
+from lingua_ops.capacity import main
+
+# Size the backend from a one-pod load curve, e.g.
+#   kubectl port-forward pod/<backend pod> 3002 -n lingua-app
+#   python plan-capacity.py measure --pod <backend pod> --duration 60 --output curve.json
+#   python plan-capacity.py plan curve.json --target-rps 200 --slo-p95 800 --patch k8s/capacity-patch.yaml
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+import sys
+
+from lingua_ops.bench_tts import main
+
+# Profile /api/tts latency and audio size, and estimate response-cache savings, e.g.
+#   python profile-tts.py --languages en,hi --repeats 5
+#   python profile-tts.py --capture requests.jsonl.gz --cache-sizes 500,5000,0 --output tts-profile.json
+if __name__ == "__main__":
+    sys.exit(main())
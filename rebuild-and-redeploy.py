@@ -1,78 +1,59 @@
-import subprocess
 import sys
 
-def run_command(command):
-    """Run a command and return the output"""
-    try:
-        print(f"Running command: {command}")
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        print(f"STDOUT: {result.stdout}")
-        if result.stderr:
-            print(f"STDERR: {result.stderr}")
-        print(f"Return code: {result.returncode}")
-        return result.stdout, result.stderr, result.returncode
-    except Exception as e:
-        print(f"Exception occurred: {str(e)}")
-        return "", str(e), 1
+from lingua_ops.cluster import ClusterError, connect
+from lingua_ops.images import build_changed, pin_images, report_pipeline
+from lingua_ops.rollout import wait_for_rollouts
+from lingua_ops.snapshot import Pod, format_pods
 
 def main():
     print("Rebuilding and redeploying application to GKE cluster...")
     print("=" * 50)
     
-    # Get cluster credentials
+    # Get cluster credentials (cached until the access token expires)
     print("1. Getting cluster credentials...")
-    stdout, stderr, returncode = run_command("gcloud container clusters get-credentials lingua-cluster --zone=us-central1-a")
-    if returncode != 0:
-        print("Failed to get cluster credentials.")
+    try:
+        cluster = connect()
+    except ClusterError as e:
+        print(f"Failed to get cluster credentials: {e}")
         sys.exit(1)
     
     # Build and push Docker images
     print("\n2. Building and pushing Docker images...")
     
-    print("Building backend image...")
-    stdout, stderr, returncode = run_command("docker build -t gcr.io/lingua-phone/lingua-backend:latest -f docker/backend.Dockerfile .")
-    if returncode != 0:
-        print("Failed to build backend image.")
-        sys.exit(1)
-    
-    print("Building frontend image with Kubernetes-specific configuration...")
-    stdout, stderr, returncode = run_command("docker build -t gcr.io/lingua-phone/lingua-frontend:latest -f docker/frontend-k8s.Dockerfile .")
-    if returncode != 0:
-        print("Failed to build frontend image.")
-        sys.exit(1)
-    
-    print("Pushing backend image...")
-    stdout, stderr, returncode = run_command("docker push gcr.io/lingua-phone/lingua-backend:latest")
-    if returncode != 0:
-        print("Failed to push backend image.")
+    # Unchanged images are skipped unless --force; the rest build and push concurrently
+    result = build_changed(force="--force" in sys.argv)
+    report_pipeline(result)
+    if not result.ok:
+        print("Failed to build and push Docker images.")
         sys.exit(1)
     
-    print("Pushing frontend image...")
-    stdout, stderr, returncode = run_command("docker push gcr.io/lingua-phone/lingua-frontend:latest")
-    if returncode != 0:
-        print("Failed to push frontend image.")
-        sys.exit(1)
-    
-    # Delete existing pods to force recreation with new images
+    # Pin deployments to the content-hash tags, then delete existing pods to force recreation
     print("\n3. Deleting existing pods to force recreation with new images...")
-    stdout, stderr, returncode = run_command("kubectl delete pods -n lingua-app --all")
-    if returncode != 0:
-        print("Failed to delete existing pods.")
+    try:
+        pin_images(cluster, result.images)
+        old_pods = [pod["metadata"]["name"] for pod in cluster.pods()]
+        cluster.delete("pods")
+    except ClusterError as e:
+        print(f"Failed to delete existing pods: {e}")
         sys.exit(1)
     
-    # Wait a moment for pods to be deleted
-    print("Waiting for pods to be deleted...")
-    stdout, stderr, returncode = run_command("timeout /t 30 /nobreak")
+    # Watch until replacement pods are ready (or crash-looping) instead of sleeping
+    print("Waiting for replacement pods to become ready...")
+    try:
+        rollout = wait_for_rollouts(cluster, exclude_pods=old_pods)
+        print("\n".join(rollout.format()))
+    except ClusterError as e:
+        print(f"Error watching rollout: {e}")
     
     # Check pod status
     print("\n4. Checking pod status...")
-    stdout, stderr, returncode = run_command("kubectl get pods -n lingua-app")
-    if returncode == 0:
+    try:
+        pods = [Pod.from_dict(pod) for pod in cluster.pods()]
         print("Pods in lingua-app namespace:")
-        print(stdout)
-    else:
+        print("\n".join(format_pods(pods)))
+    except ClusterError as e:
         print("Error getting pod status:")
-        print(stderr)
+        print(e)
     
     print("\nRebuild and redeployment initiated! Please check the pod status to verify the fix.")
 
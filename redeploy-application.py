@@ -1,84 +1,58 @@
-import subprocess
 import sys
 
-def run_command(command):
-    """Run a command and return the output"""
-    try:
-        print(f"Running command: {command}")
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        print(f"STDOUT: {result.stdout}")
-        if result.stderr:
-            print(f"STDERR: {result.stderr}")
-        print(f"Return code: {result.returncode}")
-        return result.stdout, result.stderr, result.returncode
-    except Exception as e:
-        print(f"Exception occurred: {str(e)}")
-        return "", str(e), 1
+from lingua_ops.cluster import ClusterError, connect, ensure_kubeconfig
+from lingua_ops.images import apply_pinned, build_changed, report_pipeline
+from lingua_ops.rollout import wait_for_rollouts
+from lingua_ops.snapshot import Pod, format_pods
 
 def main():
     print("Redeploying application to GKE cluster...")
     print("=" * 50)
     
-    # Get cluster credentials
+    # Get cluster credentials (skipped when kubeconfig already has the context)
     print("1. Getting cluster credentials...")
-    stdout, stderr, returncode = run_command("gcloud container clusters get-credentials lingua-cluster --zone=us-central1-a")
-    if returncode != 0:
+    if not ensure_kubeconfig():
         print("Failed to get cluster credentials.")
         sys.exit(1)
     
     # Build and push Docker images
     print("\n2. Building and pushing Docker images...")
     
-    print("Building backend image...")
-    stdout, stderr, returncode = run_command("docker build -t gcr.io/lingua-phone/lingua-backend:latest -f docker/backend.Dockerfile .")
-    if returncode != 0:
-        print("Failed to build backend image.")
-        sys.exit(1)
-    
-    print("Building frontend image with Kubernetes-specific configuration...")
-    stdout, stderr, returncode = run_command("docker build -t gcr.io/lingua-phone/lingua-frontend:latest -f docker/frontend-k8s.Dockerfile .")
-    if returncode != 0:
-        print("Failed to build frontend image.")
-        sys.exit(1)
-    
-    print("Pushing backend image...")
-    stdout, stderr, returncode = run_command("docker push gcr.io/lingua-phone/lingua-backend:latest")
-    if returncode != 0:
-        print("Failed to push backend image.")
+    # Unchanged images are skipped; the rest build and push concurrently
+    result = build_changed()
+    report_pipeline(result)
+    if not result.ok:
+        print("Failed to build and push Docker images.")
         sys.exit(1)
     
-    print("Pushing frontend image...")
-    stdout, stderr, returncode = run_command("docker push gcr.io/lingua-phone/lingua-frontend:latest")
-    if returncode != 0:
-        print("Failed to push frontend image.")
-        sys.exit(1)
-    
-    # Apply Kubernetes manifests
+    # Apply Kubernetes manifests with the content-hash image tags rendered in, so there is one rollout
     print("\n3. Applying Kubernetes manifests...")
-    stdout, stderr, returncode = run_command("kubectl apply -k k8s/")
+    for image in result.images:
+        print(f"   {image.deployment} -> {image.reference}")
+    stdout, stderr, returncode = apply_pinned(result.images)
     if returncode != 0:
         print("Failed to apply Kubernetes manifests.")
         sys.exit(1)
     
     # Wait for deployments to be ready
     print("\n4. Waiting for deployments to be ready...")
-    stdout, stderr, returncode = run_command("kubectl rollout status deployment/lingua-backend -n lingua-app")
-    if returncode != 0:
-        print("Backend deployment may not be ready yet.")
-    
-    stdout, stderr, returncode = run_command("kubectl rollout status deployment/lingua-frontend -n lingua-app")
-    if returncode != 0:
-        print("Frontend deployment may not be ready yet.")
+    try:
+        rollout = wait_for_rollouts(connect())
+        print("\n".join(rollout.format()))
+        if not rollout.ok:
+            print("Deployments may not be ready yet.")
+    except ClusterError as e:
+        print(f"Error watching rollout: {e}")
     
     # Check pod status
     print("\n5. Checking pod status...")
-    stdout, stderr, returncode = run_command("kubectl get pods -n lingua-app")
-    if returncode == 0:
+    try:
+        pods = [Pod.from_dict(pod) for pod in connect().pods()]
         print("Pods in lingua-app namespace:")
-        print(stdout)
-    else:
+        print("\n".join(format_pods(pods)))
+    except ClusterError as e:
         print("Error getting pod status:")
-        print(stderr)
+        print(e)
     
     print("\nRedeployment completed!")
 
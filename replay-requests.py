@@ -0,0 +1,8 @@
+import sys
+
+from lingua_ops.replay import main
+
+# Replay a captured JSONL request log against a backend, e.g.
+#   python replay-requests.py capture.jsonl --url http://localhost:3002 --speed 4
+if __name__ == "__main__":
+    sys.exit(main())
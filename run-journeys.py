@@ -0,0 +1,10 @@
+import sys
+
+from lingua_ops.journey import main
+
+# Simulate users running voice shopping journeys (speech -> translate -> chat -> search ->
+# product -> cart -> tts) and see which step dominates, e.g.
+#   python run-journeys.py --users 25 --duration 120
+#   python run-journeys.py --scenarios buy_tshirt_hi --think-scale 0 --journeys 5 --output journeys.json
+if __name__ == "__main__":
+    sys.exit(main())
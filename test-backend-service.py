@@ -1,43 +1,52 @@
-import requests
-import json
+import sys
+
+from lingua_ops.http import shared_client
+from lingua_ops.output import Output
+
+# python test-backend-service.py --json-lines  (or LINGUA_OUTPUT=jsonl) writes one JSON object per endpoint
+
+def check_endpoint(out, client, name, title, url, data):
+    with out.step(name, title) as step:
+        response = client.post(url, json=data, timeout=10.0)
+        step.data.update(url=url, status_code=response.status_code, elapsed_ms=round(response.elapsed * 1000, 1),
+                         attempts=response.attempts, error=response.error, response=response.text)
+        if not response.ok:
+            step.status, step.error = "error", response.error or f"status {response.status_code}"
+
+        step.print(f"Status Code: {response.status_code}")
+        step.print(f"Response: {response.error or response.text}")
+        step.print(f"Time: {response.elapsed * 1000:.0f} ms")
 
 def test_backend_service():
-    # Test if we can access the backend service directly
+    # Test if we can access the backend service directly; both calls reuse one keep-alive connection
+    out = Output("test-backend-service")
+    client = shared_client()
     try:
         # Test the chat endpoint
         chat_data = {
             "message": "I am looking for a women's t-shirt",
             "language": "en"
         }
-
-        print("Testing backend chat endpoint...")
-        response = requests.post(
-            "http://localhost:3002/api/chat",
-            headers={"Content-Type": "application/json"},
-            data=json.dumps(chat_data)
-        )
-
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {response.text}")
+        check_endpoint(out, client, "chat", "Testing backend chat endpoint...",
+                       "http://localhost:3002/api/chat", chat_data)
 
         # Test the translation endpoint
-        print("\nTesting backend translation endpoint...")
         translation_data = {
             "text": "Hello, how are you?",
-            "targetLanguage": "es"
+            "from": "en",
+            "to": "es"
         }
-
-        response = requests.post(
-            "http://localhost:3002/api/translate",
-            headers={"Content-Type": "application/json"},
-            data=json.dumps(translation_data)
-        )
-
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {response.text}")
+        check_endpoint(out, client, "translate", "\nTesting backend translation endpoint...",
+                       "http://localhost:3002/api/translate", translation_data)
 
     except Exception as e:
-        print(f"Error testing backend service: {e}")
+        out.print(f"Error testing backend service: {e}")
+    out.finish()
 
 if __name__ == "__main__":
+    # "load" runs the load generator instead of the one-off smoke test,
+    # e.g. python test-backend-service.py load --rps 20 --duration 60
+    if len(sys.argv) > 1 and sys.argv[1] == "load":
+        from lingua_ops.loadtest import main as load_test
+        sys.exit(load_test(sys.argv[2:]))
     test_backend_service()
@@ -1,52 +1,37 @@
-import requests
-import json
-import time
+from lingua_ops.output import Output
+from lingua_ops.probe import sweep, format_result
+
+# python test-connectivity.py --json-lines  (or LINGUA_OUTPUT=jsonl) writes one JSON object per probe
 
 def test_connectivity():
+    out = Output("test-connectivity")
     results = []
 
-    # Test frontend service
-    results.append("1. Testing frontend service (http://localhost:8080)...")
-    try:
-        response = requests.get("http://localhost:8080", timeout=5)
-        results.append(f"   Frontend status code: {response.status_code}")
-        results.append(f"   Frontend response headers: {dict(response.headers)}")
-    except requests.exceptions.RequestException as e:
-        results.append(f"   Error accessing frontend: {e}")
-
-    # Test backend service
-    results.append("\n2. Testing backend service (http://localhost:3002)...")
-    try:
-        response = requests.get("http://localhost:3002", timeout=5)
-        results.append(f"   Backend status code: {response.status_code}")
-        results.append(f"   Backend response headers: {dict(response.headers)}")
-    except requests.exceptions.RequestException as e:
-        results.append(f"   Error accessing backend: {e}")
-
-    # Test backend chat endpoint
-    results.append("\n3. Testing backend chat endpoint...")
-    try:
-        chat_data = {
-            "message": "I am looking for a women's t-shirt",
-            "language": "en"
-        }
-        response = requests.post(
-            "http://localhost:3002/api/chat",
-            json=chat_data,
-            timeout=10
-        )
-        results.append(f"   Chat endpoint status code: {response.status_code}")
-        results.append(f"   Chat endpoint response: {response.text}")
-    except requests.exceptions.RequestException as e:
-        results.append(f"   Error accessing chat endpoint: {e}")
+    # Probe frontend, backend and every API route concurrently
+    sweep_result = sweep()
+
+    for index, probe_result in enumerate(sweep_result.results, 1):
+        with out.step(probe_result.name) as step:
+            step.data.update(probe_result.to_dict(), headers=probe_result.response.headers)
+            if not probe_result.ok:
+                step.status, step.error = "error", probe_result.response.error or f"status {probe_result.response.status_code}"
+        lines = format_result(probe_result, show_body=True)
+        results.append(f"{index}. {lines[0]}")
+        results.extend(lines[1:])
+        if probe_result.response.headers:
+            results.append(f"   Response headers: {probe_result.response.headers}")
+        results.append("")
+
+    results.append(f"Sweep completed in {sweep_result.elapsed * 1000:.0f} ms")
 
     # Save results to file
     with open("connectivity-test-results.txt", "w") as f:
         for result in results:
             f.write(result + "\n")
-            print(result)
+            out.print(result)
 
-    print("\nConnectivity testing completed. Results saved to connectivity-test-results.txt")
+    out.print("\nConnectivity testing completed. Results saved to connectivity-test-results.txt")
+    out.finish(elapsed_ms=round(sweep_result.elapsed * 1000, 1), file="connectivity-test-results.txt")
 
 if __name__ == "__main__":
     test_connectivity()
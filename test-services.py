@@ -1,45 +1,29 @@
-import requests
-import time
+from lingua_ops.output import Output
+from lingua_ops.probe import sweep, format_result
 
-def test_services():
-    print("Testing services connectivity...")
+# python test-services.py --json-lines  (or LINGUA_OUTPUT=jsonl) writes one JSON object per probe
 
-    # Test frontend service
-    print("\n1. Testing frontend service (http://localhost:8080)...")
-    try:
-        response = requests.get("http://localhost:8080", timeout=5)
-        print(f"   Frontend status code: {response.status_code}")
-        print(f"   Frontend response headers: {dict(response.headers)}")
-    except requests.exceptions.RequestException as e:
-        print(f"   Error accessing frontend: {e}")
+def test_services():
+    out = Output("test-services")
+    out.print("Testing services connectivity...")
 
-    # Test backend service
-    print("\n2. Testing backend service (http://localhost:3002)...")
-    try:
-        response = requests.get("http://localhost:3002", timeout=5)
-        print(f"   Backend status code: {response.status_code}")
-        print(f"   Backend response headers: {dict(response.headers)}")
-    except requests.exceptions.RequestException as e:
-        print(f"   Error accessing backend: {e}")
+    # Probe frontend, backend and every API route concurrently
+    result = sweep()
 
-    # Test backend chat endpoint
-    print("\n3. Testing backend chat endpoint...")
-    try:
-        chat_data = {
-            "message": "I am looking for a women's t-shirt",
-            "language": "en"
-        }
-        response = requests.post(
-            "http://localhost:3002/api/chat",
-            json=chat_data,
-            timeout=10
-        )
-        print(f"   Chat endpoint status code: {response.status_code}")
-        print(f"   Chat endpoint response: {response.text}")
-    except requests.exceptions.RequestException as e:
-        print(f"   Error accessing chat endpoint: {e}")
+    for index, probe_result in enumerate(result.results, 1):
+        with out.step(probe_result.name) as step:
+            step.data.update(probe_result.to_dict())
+            if not probe_result.ok:
+                step.status, step.error = "error", probe_result.response.error or f"status {probe_result.response.status_code}"
+            lines = format_result(probe_result, show_body=probe_result.name == "chat")
+            step.print(f"\n{index}. {lines[0]}")
+            for line in lines[1:]:
+                step.print(line)
 
-    print("\nService testing completed.")
+    out.print(f"\nService testing completed in {result.elapsed * 1000:.0f} ms.")
+    if not result.ok:
+        out.print(f"Failing probes: {', '.join(r.name for r in result.failed)}")
+    out.finish(elapsed_ms=round(result.elapsed * 1000, 1), failing=[r.name for r in result.failed])
 
 if __name__ == "__main__":
     test_services()